@@ -0,0 +1,74 @@
+# board_encoding.py
+# Compact board: a 36 character string with one code per tile, row after row (e.g. "rbyg...").
+from app.db.enums import Colors
+from sqlalchemy import String, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import TypeDecorator
+from typing import Dict, List
+import json
+
+BOARD_SIZE = 6
+
+COLOR_CODES: Dict[Colors | str, str] = {
+    Colors.red: "r",
+    Colors.blue: "b",
+    Colors.yellow: "y",
+    Colors.green: "g",
+    Colors.none: "n",
+}
+# Boards also come with the values of the colors ("red", "blue", ...)
+COLOR_CODES.update({color.value: code for color, code in list(COLOR_CODES.items())})
+
+CODE_COLORS: Dict[str, Colors] = {code: Colors(color) for color, code in COLOR_CODES.items() if isinstance(color, str)}
+CODE_VALUES: Dict[str, str] = {code: color.value for code, color in CODE_COLORS.items()}
+
+
+def encode_board(color_distribution: List[List[Colors | str]]) -> str:
+    return "".join(COLOR_CODES[color] for row in color_distribution for color in row)
+
+
+def decode_board(encoded: str, width: int = BOARD_SIZE) -> List[List[str]]:
+    """Return the board as rows of color values, as it's sent to the clients"""
+    return [[CODE_VALUES[code] for code in encoded[i:i + width]] for i in range(0, len(encoded), width)]
+
+
+def decode_board_colors(encoded: str, width: int = BOARD_SIZE) -> List[List[Colors]]:
+    return [[CODE_COLORS[code] for code in encoded[i:i + width]] for i in range(0, len(encoded), width)]
+
+
+def is_legacy_board(value: str) -> bool:
+    """Boards used to be stored as a JSON list of lists of color values"""
+    return value.startswith("[")
+
+
+class CompactBoard(TypeDecorator):
+    """
+    Stores the color distribution of a board as a compact string.
+    The attribute is still a list of rows of color values, and legacy JSON rows can be read as well.
+    """
+
+    impl = String(BOARD_SIZE * BOARD_SIZE)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        return encode_board(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if is_legacy_board(value):
+            return json.loads(value)
+        return decode_board(value)
+
+
+def migrate_board_encoding(engine: Engine) -> int:
+    """Rewrite the boards still stored as JSON with the compact encoding. Returns how many rows changed."""
+    with engine.begin() as connection:
+        rows = connection.execute(
+            text("SELECT game_id, color_distribution FROM board WHERE color_distribution LIKE '[%'")).all()
+        for game_id, color_distribution in rows:
+            connection.execute(text("UPDATE board SET color_distribution = :board WHERE game_id = :game_id"),
+                               {"board": encode_board(json.loads(color_distribution)), "game_id": game_id})
+    return len(rows)
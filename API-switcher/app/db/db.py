@@ -1,18 +1,247 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Mapping
+import functools
+import logging
+import os
+import time
 
-# Conexión a la base de datos SQLite
-SQLALCHEMY_DATABASE_URL = "sqlite:///./switcher.db"
+# Conexión a la base de datos, por defecto el SQLite local
+DEFAULT_DATABASE_URL = "sqlite:///./switcher.db"
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
+# Drivers of the async session, by backend
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+# Pragmas applied to every new SQLite connection: (setting, environment variable, default)
+SQLITE_PRAGMAS = (
+    ("journal_mode", "SQLITE_JOURNAL_MODE", "WAL"),
+    ("synchronous", "SQLITE_SYNCHRONOUS", "NORMAL"),
+    ("busy_timeout", "SQLITE_BUSY_TIMEOUT", "5000"),
+    ("mmap_size", "SQLITE_MMAP_SIZE", "268435456"),
+)
+
+# Options of engine_options that size the pool, reported by engine_settings
+POOL_OPTIONS = ("pool_size", "max_overflow", "pool_timeout", "pool_recycle")
+
+
+def is_memory_database(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or "mode=memory" in url
+
+
+def engine_options(url: str, env: Mapping[str, str] = os.environ) -> dict:
+    """Keyword arguments for create_engine, taken from the environment"""
+    options = {"pool_pre_ping": env.get("DB_POOL_PRE_PING", "false").lower() == "true"}
+    if make_url(url).get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        # In-memory databases live in a single connection, there is no pool to size
+        if is_memory_database(url):
+            return options
+    options.update(
+        pool_size=int(env.get("DB_POOL_SIZE", "5")),
+        max_overflow=int(env.get("DB_MAX_OVERFLOW", "10")),
+        pool_timeout=float(env.get("DB_POOL_TIMEOUT", "30")),
+        pool_recycle=int(env.get("DB_POOL_RECYCLE", "-1")),
+    )
+    return options
+
+
+def sqlite_pragmas(url: str, env: Mapping[str, str] = os.environ) -> dict:
+    """Pragmas for a SQLite url, empty for any other database"""
+    if make_url(url).get_backend_name() != "sqlite":
+        return {}
+    pragmas = {name: env.get(variable, default) for name, variable, default in SQLITE_PRAGMAS}
+    # WAL needs a file, an in-memory database keeps its own journal
+    if is_memory_database(url):
+        pragmas.pop("journal_mode")
+    return {name: value for name, value in pragmas.items() if value}
+
+
+def async_database_url(url: str) -> str:
+    """Same database with the async driver of its backend, e.g. sqlite+aiosqlite"""
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver:
+        url = url.set(drivername=f"{url.get_backend_name()}+{driver}")
+    return url.render_as_string(hide_password=False)
+
+
+def set_sqlite_pragmas(sync_engine: Engine, pragmas: dict):
+    sync_engine.sqlite_pragmas = pragmas
+    if not pragmas:
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def set_pool_options(sync_engine: Engine, options: dict):
+    sync_engine.pool_options = {name: options[name] for name in POOL_OPTIONS if name in options}
+
+
+def make_engine(url: str | None = None, env: Mapping[str, str] = os.environ) -> Engine:
+    url = url or env.get("DATABASE_URL", DEFAULT_DATABASE_URL)
+    options = engine_options(url, env)
+    new_engine = create_engine(url, **options)
+    set_pool_options(new_engine, options)
+    set_sqlite_pragmas(new_engine, sqlite_pragmas(url, env))
+    return new_engine
+
+
+def make_async_engine(url: str | None = None, env: Mapping[str, str] = os.environ) -> AsyncEngine:
+    url = url or env.get("DATABASE_URL", DEFAULT_DATABASE_URL)
+    options = engine_options(url, env)
+    if "pool_size" in options:
+        # aiosqlite would open a new connection per session (NullPool)
+        options["poolclass"] = AsyncAdaptedQueuePool
+    new_engine = create_async_engine(async_database_url(url), **options)
+    set_pool_options(new_engine.sync_engine, options)
+    set_sqlite_pragmas(new_engine.sync_engine, sqlite_pragmas(url, env))
+    return new_engine
+
+
+def engine_settings(current_engine: Engine) -> dict:
+    pool = current_engine.pool
+    settings = {"url": current_engine.url.render_as_string(hide_password=True),
+                "pool": type(pool).__name__}
+    settings.update(getattr(current_engine, "pool_options", {}))
+    settings.update(getattr(current_engine, "sqlite_pragmas", {}))
+    return settings
+
+
+def log_engine_settings(current_engine: Engine | None = None):
+    settings = engine_settings(current_engine or engine)
+    logging.info("Base de datos: %s", ", ".join(f"{key}={value}" for key, value in settings.items()))
+
+
+engine = make_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+
+def create_missing_indexes():
+    """create_all doesn't add the new indexes to tables that already exist"""
+    for table in Base.metadata.tables.values():
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+
+def commit_keeping_state(db: Session):
+    """
+    Commit without expiring the objects of the session.
+    For a unit of work whose objects already hold everything it wrote, reading them back would be wasted.
+    """
+    expire_on_commit, db.expire_on_commit = db.expire_on_commit, False
+    try:
+        db.commit()
+    finally:
+        db.expire_on_commit = expire_on_commit
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# The async engine is created on first use, the sync path doesn't need the async driver installed
+async_engine: AsyncEngine | None = None
+AsyncSessionLocal: async_sessionmaker | None = None
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    global async_engine, AsyncSessionLocal
+    if AsyncSessionLocal is None:
+        async_engine = make_async_engine()
+        # Nothing is expired on commit, reading an attribute afterwards must not need the database
+        AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return AsyncSessionLocal
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+def async_service(service: Callable) -> Callable:
+    """
+    Async variant of a service written for a Session.
+    The service runs with the sync session behind the AsyncSession (run_sync), so its queries,
+    lazy loads and commits await the driver instead of blocking the event loop.
+    """
+    @functools.wraps(service)
+    async def wrapper(*args, **kwargs):
+        db: AsyncSession = next(arg for arg in (*args, *kwargs.values()) if isinstance(arg, AsyncSession))
+
+        def call(session: Session):
+            return service(*[session if arg is db else arg for arg in args],
+                           **{key: session if value is db else value for key, value in kwargs.items()})
+
+        return await db.run_sync(call)
+    return wrapper
+
+
+class StatementCount:
+    def __init__(self, parent: "StatementCount | None" = None, record: bool = False):
+        self.count = 0
+        self.duration = 0.0
+        # Blocks measured inside another one count for both
+        self.parent = parent
+        # (statement, seconds) of every statement, only when recording
+        self.statements: list | None = [] if record else None
+
+
+# Counter of the block being measured, per task or thread
+current_statement_count: ContextVar[StatementCount | None] = ContextVar("current_statement_count", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = current_statement_count.get()
+    if counter is not None:
+        if context is not None:
+            context.statement_start = time.perf_counter()
+        while counter is not None:
+            counter.count += 1
+            counter = counter.parent
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def time_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = current_statement_count.get()
+    start = getattr(context, "statement_start", None)
+    if counter is None or start is None:
+        return
+    duration = time.perf_counter() - start
+    while counter is not None:
+        counter.duration += duration
+        if counter.statements is not None:
+            counter.statements.append((statement, duration))
+        counter = counter.parent
+
+
+@contextmanager
+def count_statements(record: bool = False):
+    """
+    Count the SQL statements sent to any engine by the current task inside the block, and the time they took.
+    With record, the statements themselves are kept as well.
+    """
+    counter = StatementCount(current_statement_count.get(), record)
+    token = current_statement_count.set(counter)
+    try:
+        yield counter
+    finally:
+        current_statement_count.reset(token)
@@ -0,0 +1,99 @@
+# figure_table.py
+# VALID_PATHS compiled once at import: every figure placed in every in-bounds position of the board.
+from app.db.constants import VALID_PATHS, Movement
+from app.db.enums import FigTypeAndDifficulty
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, NamedTuple, Tuple
+import json
+
+BOARD_SIZE = 6
+
+STRAIGHT_MOVES = (Movement.UP, Movement.DOWN, Movement.LEFT, Movement.RIGHT)
+
+Tile = Tuple[int, int]
+
+
+class FigurePlacement(NamedTuple):
+    fig: FigTypeAndDifficulty
+    rotation: int                   # index of the path in VALID_PATHS[fig]
+    start: Tile
+    tiles: Tuple[Tile, ...]         # in the order the path interpreter visits them
+    tile_set: FrozenSet[Tile]
+    neighbours: FrozenSet[Tile]     # tiles outside the figure checked by the isolation rule
+
+
+def walk_path(path: List[Movement], x: int, y: int) -> List[Tile] | None:
+    """
+    Follow a path from VALID_PATHS starting at (x, y) without looking at colors.
+    Returns the tiles in the same order get_path_valid would, or None if the path leaves the board.
+    """
+    current_tile = (x, y)
+    tiles = []
+    for mov in path:
+        cx, cy = current_tile
+        if mov in (Movement.UP, Movement.TUP) and cx > 0:
+            next_tile = (cx - 1, cy)
+        elif mov in (Movement.DOWN, Movement.TDOWN) and cx < BOARD_SIZE - 1:
+            next_tile = (cx + 1, cy)
+        elif mov in (Movement.LEFT, Movement.TLEFT) and cy > 0:
+            next_tile = (cx, cy - 1)
+        elif mov in (Movement.RIGHT, Movement.TRIGHT) and cy < BOARD_SIZE - 1:
+            next_tile = (cx, cy + 1)
+        else:
+            return None
+        # Temporal moves append the tile outside the path and keep traveling from the previous one
+        if mov in STRAIGHT_MOVES:
+            tiles.append(current_tile)
+            current_tile = next_tile
+        else:
+            tiles.append(next_tile)
+    tiles.append(current_tile)
+    return tiles
+
+
+def adjacent_tiles(x: int, y: int) -> List[Tile]:
+    adjacent = [(x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)]
+    return [(ax, ay) for ax, ay in adjacent if 0 <= ax < BOARD_SIZE and 0 <= ay < BOARD_SIZE]
+
+
+def compile_figure_table() -> Dict[FigTypeAndDifficulty, Tuple[FigurePlacement, ...]]:
+    table = {}
+    for fig in FigTypeAndDifficulty:
+        placements = []
+        for rotation, path in enumerate(VALID_PATHS[fig.value[0]]):
+            for x in range(BOARD_SIZE):
+                for y in range(BOARD_SIZE):
+                    tiles = walk_path(path, x, y)
+                    if tiles is None:
+                        continue
+                    tile_set = frozenset(tiles)
+                    neighbours = frozenset(adjacent for tile in tiles
+                                           for adjacent in adjacent_tiles(*tile) if adjacent not in tile_set)
+                    placements.append(FigurePlacement(fig=fig, rotation=rotation, start=(x, y), tiles=tuple(tiles),
+                                                      tile_set=tile_set, neighbours=neighbours))
+        table[fig] = tuple(placements)
+    return table
+
+
+FIGURE_TABLE: Mapping[FigTypeAndDifficulty, Tuple[FigurePlacement, ...]] = MappingProxyType(compile_figure_table())
+
+# Every placement in the order the path interpreter finds them (figure, rotation, x, y)
+PLACEMENTS: Tuple[FigurePlacement, ...] = tuple(
+    placement for placements in FIGURE_TABLE.values() for placement in placements)
+
+
+def export_figure_table() -> dict:
+    """Return the table as plain data, ready to be dumped as JSON"""
+    return {
+        fig.value[0]: [{
+            "rotation": placement.rotation,
+            "start": list(placement.start),
+            "tiles": [list(tile) for tile in placement.tiles],
+            "neighbours": sorted(list(tile) for tile in placement.neighbours),
+        } for placement in placements]
+        for fig, placements in FIGURE_TABLE.items()
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(export_figure_table(), indent=1))
@@ -1,16 +1,45 @@
 import re
 from fastapi import HTTPException, status, Depends, Body, Query
+from fastapi.requests import HTTPConnection
 from typing import Optional
-from sqlalchemy.orm import Session
-from app.db.db import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload, selectinload
+from app.db.db import get_db, get_async_db
 from app.models.game_models import Game
 from app.models.player_models import Player
 from app.schemas.game_schemas import GameSchemaIn, Annotated
 from app.db.db import get_db
 from app.db.enums import GameStatus
 from typing import List
-from app.schemas.game_schemas import GameSchemaOut
-from app.services.game_services import convert_game_to_schema
+from app.schemas.game_schemas import LobbyPageSchema
+from app.services.lobby_services import lobby_index
+
+# Loading profiles: the relationships of the game a request is going to read, loaded up front
+# with one SELECT per relationship instead of a lazy load per player.
+FULL_SNAPSHOT = "full snapshot"     # players and their cards, what convert_game_to_schema reads
+TURN_ACTION = "turn action"         # full snapshot plus the board and the movements of the players
+
+GAME_LOAD_PROFILES = {
+    FULL_SNAPSHOT: (
+        selectinload(Game.players).selectinload(Player.movement_cards),
+        selectinload(Game.players).selectinload(Player.figure_cards),
+    ),
+    TURN_ACTION: (
+        selectinload(Game.players).selectinload(Player.movement_cards),
+        selectinload(Game.players).selectinload(Player.figure_cards),
+        selectinload(Game.players).selectinload(Player.movements),
+        joinedload(Game.board),
+    ),
+}
+
+
+def game_load_profile(profile: str):
+    """Declare the loading profile of the game an endpoint needs, get_game reads it"""
+    def decorator(endpoint):
+        endpoint.game_load_profile = profile
+        return endpoint
+    return decorator
 
 
 def check_name(game: Annotated[GameSchemaIn, Body()]):
@@ -32,9 +61,35 @@ def get_player(id_player: int, db: Session = Depends(get_db)) -> Player:
     return player
 
 
-def get_game(id_game: int, db: Session = Depends(get_db)) -> Game:
-    """dependency to get a game by ID"""
-    game = db.query(Game).filter(Game.id == id_game).first()
+def get_game(id_game: int, connection: HTTPConnection, db: Session = Depends(get_db)) -> Game:
+    """dependency to get a game by ID, loaded with the profile declared by the endpoint"""
+    profile = getattr(connection.scope.get("endpoint"), "game_load_profile", None)
+    return load_game(id_game, db, profile)
+
+
+def load_game(id_game: int, db: Session, profile: Optional[str] = None) -> Game:
+    query = db.query(Game)
+    if profile:
+        query = query.options(*GAME_LOAD_PROFILES[profile])
+    game = query.filter(Game.id == id_game).first()
+
+    if not game:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Partida no encontrada")
+
+    return game
+
+
+async def get_async_game(id_game: int, connection: HTTPConnection, db: AsyncSession = Depends(get_async_db)) -> Game:
+    """async variant of get_game"""
+    profile = getattr(connection.scope.get("endpoint"), "game_load_profile", None)
+    return await load_async_game(id_game, db, profile)
+
+
+async def load_async_game(id_game: int, db: AsyncSession, profile: Optional[str] = None) -> Game:
+    # Lazy loads can't happen outside run_sync, without a profile everything a turn reads is loaded
+    query = select(Game).options(*GAME_LOAD_PROFILES[profile or TURN_ACTION]).where(Game.id == id_game)
+    game = (await db.execute(query)).scalars().first()
 
     if not game:
         raise HTTPException(
@@ -51,8 +106,6 @@ def get_game_status(status: Optional[str] = Query(None, description="Filtra jueg
     return status
 
 
-def get_game_list() -> List[GameSchemaOut]:
-    db = next(get_db())
-    games = db.query(Game).filter(Game.status == GameStatus.waiting.value).all()
-    games = list(map(convert_game_to_schema, games))
-    return games
+def get_game_list() -> LobbyPageSchema:
+    """First page of the games waiting for players, from the lobby index"""
+    return lobby_index.page(status=GameStatus.waiting)
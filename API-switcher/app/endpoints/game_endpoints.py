@@ -1,36 +1,30 @@
-from app.schemas.game_schemas import GameSchemaIn, GameSchemaOut
-from app.schemas.figure_card_schema import FigureCardSchema
-from app.models.figure_card_model import FigureCard
-from app.schemas.figure_schema import FigureInBoardSchema, FigureToDiscardSchema
+from app.schemas.game_schemas import GameSchemaIn, GameSchemaOut, LobbyPageSchema
+from app.schemas.figure_schema import FigureToDiscardSchema
 from app.schemas.movement_schema import MovementSchema
-from fastapi import APIRouter, HTTPException, Depends, status, Response
+from fastapi import APIRouter, HTTPException, Depends, Query, status, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.db import get_db
+from app.db.db import get_db, get_async_db, count_statements
 from app.db.enums import GameStatus, Colors
-from app.schemas.player_schemas import PlayerGameSchemaOut
 from app.models.game_models import Game
 from app.models.player_models import Player
-from app.dependencies.dependencies import get_game, get_player, check_name, get_game_status
+from app.dependencies.dependencies import (get_game, get_async_game, check_name, get_game_status, game_load_profile,
+                                           FULL_SNAPSHOT, TURN_ACTION)
 from app.services.game_services import (search_player_in_game, is_player_host, remove_player_from_game,
                                         convert_game_to_schema, validate_game_capacity, add_player_to_game,
-                                        validate_players_amount,  random_initial_turn,
-                                        assign_next_turn, is_single_player_victory, is_out_of_figure_cards_victory, initialize_figure_decks,
-                                        deal_figure_cards_to_player, clear_all_cards, end_game,
-                                        has_partial_movement, remove_last_partial_movement, remove_all_partial_movements,
-                                        calculate_partial_board, has_figure_card, erase_figure_card, get_real_card,
-                                        get_real_figure_in_board, serialize_board, get_player_by_id, block_player, unlock_remaining_card)
-from app.models.board_models import Board
-from app.dependencies.dependencies import get_game, check_name, get_game_status
-from app.services.movement_services import (deal_initial_movement_cards, deal_movement_cards,
-                                            discard_movement_card, validate_movement,
-                                            make_partial_move, reassign_all_movement_cards, delete_movement_cards_not_in_hand)
-from app.services.figure_services import (get_figure_in_board)
+                                        validate_players_amount, clear_all_cards)
+from app.services.action_services import (apply_action, save_game_state, save_game_state_async, save_new_game,
+                                          get_game_engine, claimed_figure, finish_game, finish_game_async)
+from app.engine.state import (PlayMovement, UndoMovement, FinishTurn, DiscardFigure, BlockFigure, QuitGame,
+                              GameWon)
 from app.endpoints.websocket_endpoints import game_connection_managers
-from app.services.auth_services import CustomHTTPBearer
+from app.services.auth_services import CustomHTTPBearer, AsyncHTTPBearer
+from app.services.game_state_services import game_state_cache
+from app.services.lobby_services import lobby_index, LOBBY_PAGE_SIZE
+from app.services.event_services import (publish_game_event, GAME_CREATED, PLAYER_JOINED, PLAYER_LEFT,
+                                         GAME_STATUS_CHANGED, GAME_UPDATED)
 from typing import List, Optional
 import asyncio
-import json
-import logging
 
 
 # with prefix we don't need to add /games to our endpoints urls
@@ -40,6 +34,8 @@ router = APIRouter(
 )
 
 auth_scheme = CustomHTTPBearer()
+# The same authentication, for the endpoints on the AsyncSession
+async_auth_scheme = AsyncHTTPBearer()
 
 
 @router.post("/", dependencies=[Depends(check_name)], response_model=GameSchemaOut)
@@ -58,10 +54,13 @@ async def create_game(game: GameSchemaIn, player: Player = Depends(auth_scheme),
     db.commit()
     db.refresh(new_game)
 
+    publish_game_event(GAME_CREATED, new_game)
+
     return new_game
 
 
 @router.put("/{id_game}/join", summary="Join a game")
+@game_load_profile(FULL_SNAPSHOT)
 async def join_game(game: Game = Depends(get_game), player: Player = Depends(auth_scheme), db: Session = Depends(get_db)):
     """
     Join a player to an existing game.
@@ -81,71 +80,72 @@ async def join_game(game: Game = Depends(get_game), player: Player = Depends(aut
     db.refresh(game)
     db.refresh(player)
 
+    game_out = convert_game_to_schema(game)
+
     asyncio.create_task(game_connection_managers[game.id].broadcast_connection(
         game=game, player_id=player.id, player_name=player.name))
 
-    game_out = convert_game_to_schema(game)
+    publish_game_event(PLAYER_JOINED, game_out)
 
     return {"message": f"{player.name} se unido a la partida", "game": game_out}
 
 
 @router.put("/{id_game}/quit")
+@game_load_profile(FULL_SNAPSHOT)
 async def quit_game(player: Player = Depends(auth_scheme), game: Game = Depends(get_game), db: Session = Depends(get_db)):
     player = db.merge(player)
 
-    search_player_in_game(player, game)
+    events = []
+    if game.status is GameStatus.in_game:
+        state, events = apply_action(game, QuitGame(player.id))
 
-    if is_player_host(player, game) and not game.status == GameStatus.in_game:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="El jugador es el host, no puede abandonar")
+        save_game_state(game, state, events, db)
+    else:
+        search_player_in_game(player, game)
 
-    remove_player_from_game(player, game, db)
+        if is_player_host(player, game):
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                                detail="El jugador es el host, no puede abandonar")
 
-    clear_all_cards(player, db)
+        remove_player_from_game(player, game, db)
 
-    player.blocked = False
+        clear_all_cards(player, db)
 
-    db.commit()
-    db.refresh(game)
-    db.refresh(player)
+        player.blocked = False
+
+        db.commit()
+        db.refresh(game)
+        db.refresh(player)
 
     asyncio.create_task(game_connection_managers[game.id].broadcast_disconnection(
         game=game, player_id=player.id, player_name=player.name))
 
-    if is_single_player_victory(game):
+    publish_game_event(PLAYER_LEFT, game)
+
+    if any(isinstance(event, GameWon) for event in events):
         asyncio.create_task(game_connection_managers[game.id].broadcast_game_won(
             game, game.players[0]))
 
-        end_game(game, db)
-
-        db.commit()
-        db.refresh(player)
+        finish_game(game, db)
 
     return {"message": f"{player.name} abandono la partida", "game": convert_game_to_schema(game)}
 
 
 @router.put("/{id_game}/start", summary="Start a game", dependencies=[Depends(auth_scheme)])
+@game_load_profile(FULL_SNAPSHOT)
 async def start_game(game: Game = Depends(get_game), db: Session = Depends(get_db)):
     validate_players_amount(game)
 
-    random_initial_turn(game)
-
-    game.status = GameStatus.in_game
+    state = get_game_engine(game.id).new_game([(player.id, player.name) for player in game.players])
 
-    deal_initial_movement_cards(db, game)
+    save_new_game(game, state, db)
 
-    initialize_figure_decks(game, db)
-
-    for player in game.players:
-        deal_figure_cards_to_player(player, db)
-
-    board = Board(game.id)
-    db.add(board)
-    db.commit()
-    db.refresh(board)
+    game_state_cache.evict(game.id)
 
     game_out = convert_game_to_schema(game)
 
+    publish_game_event(GAME_STATUS_CHANGED, game_out)
+
     player_name = game.players[game.player_turn].name
 
     asyncio.create_task(
@@ -162,109 +162,50 @@ async def start_game(game: Game = Depends(get_game), db: Session = Depends(get_d
 
 
 @router.put("/{id_game}/finish-turn", summary="Finish a turn")
-async def finish_turn(player: Player = Depends(auth_scheme), game: Game = Depends(get_game), db: Session = Depends(get_db)):
-    if game.status is not GameStatus.in_game:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="El juego debe estar comenzado")
-
-    player_turn_obj: Player = game.players[game.player_turn]
+@game_load_profile(TURN_ACTION)
+async def finish_turn(response: Response, player: Player = Depends(async_auth_scheme), game: Game = Depends(get_async_game), db: AsyncSession = Depends(get_async_db)):
+    with count_statements() as statements:
+        state, events = apply_action(game, FinishTurn(player.id))
 
-    if player.id != player_turn_obj.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Es necesario que sea tu turno para poder finalizarlo")
+        await save_game_state_async(game, state, events, db)
 
-    reassign_all_movement_cards(player_turn_obj, db)
+        game_out = convert_game_to_schema(game)
 
-    deal_movement_cards(player_turn_obj, db)
+    response.headers["X-Statement-Count"] = str(statements.count)
 
-    deal_figure_cards_to_player(player_turn_obj, db)
-
-    assign_next_turn(game)
-
-    remove_all_partial_movements(player_turn_obj, db)
-
-    db.commit()
-    db.refresh(game)
-    db.refresh(player_turn_obj)
-
-    game_out = convert_game_to_schema(game)
+    publish_game_event(GAME_UPDATED, game_out)
 
     # Actualizamos el tablero y el juego
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_partial_board(game))
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_figures_in_board(game))
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_game(game))
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_finish_turn(game, game.players[game.player_turn].name))
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_partial_moves_in_board(game)
-    )
+    game_connection_managers[game.id].queue_state_update(
+        game, message="Turno de " + game.players[game.player_turn].name)
 
     return {"message": "Turno finalizado", "game": game_out}
 
 
 @router.put("/{id_game}/movement/back", summary="Cancel movement")
-async def undo_movement(player: Player = Depends(auth_scheme), game: Game = Depends(get_game), db: Session = Depends(get_db)):
-    player_turn_obj: Player = game.players[game.player_turn]
-
-    if player.id != player_turn_obj.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Es necesario que sea tu turno para cancelar el movimiento")
+@game_load_profile(TURN_ACTION)
+async def undo_movement(player: Player = Depends(async_auth_scheme), game: Game = Depends(get_async_game), db: AsyncSession = Depends(get_async_db)):
+    state, events = apply_action(game, UndoMovement(player.id))
 
-    if has_partial_movement(player_turn_obj):
+    await save_game_state_async(game, state, events, db)
 
-        if remove_last_partial_movement(player_turn_obj, db):
+    # Una vez actualizada la base de datos, actualizamos el tablero y el juego
+    game_connection_managers[game.id].queue_state_update(game)
 
-            # Una vez actualizada la base de datos, actualizamos el tablero y el juego
-            asyncio.create_task(
-                game_connection_managers[game.id].broadcast_partial_board(game))
-            asyncio.create_task(
-                game_connection_managers[game.id].broadcast_figures_in_board(game))
-            asyncio.create_task(
-                game_connection_managers[game.id].broadcast_game(game))
-            asyncio.create_task(
-                game_connection_managers[game.id].broadcast_partial_moves_in_board(game)
-                )
-
-            return Response(status_code=status.HTTP_204_NO_CONTENT)
-    else:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="No hay movimientos parciales para eliminar")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.put("/{id_game}/movement/add", summary="Add a movement to the game")
-async def add_movement(movement: MovementSchema, player: Player = Depends(auth_scheme), game: Game = Depends(get_game), db: Session = Depends(get_db)):
-
-    if game.status is not GameStatus.in_game:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                            detail="El juego debe estar comenzado")
-
-    player_turn_obj: Player = game.players[game.player_turn]
-
-    if player.id != player_turn_obj.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Es necesario que sea tu turno para poder realizar un movimiento")
-
-    validate_movement(movement, game)
-
-    discard_movement_card(movement, player, db)
+@game_load_profile(TURN_ACTION)
+async def add_movement(movement: MovementSchema, player: Player = Depends(async_auth_scheme), game: Game = Depends(get_async_game), db: AsyncSession = Depends(get_async_db)):
+    state, events = apply_action(game, PlayMovement(
+        player.id, movement.movement_card.movement_type,
+        movement.piece_1_coordinates.x, movement.piece_1_coordinates.y,
+        movement.piece_2_coordinates.x, movement.piece_2_coordinates.y))
 
-    make_partial_move(movement=movement, player=player, db=db)
+    await save_game_state_async(game, state, events, db)
 
-    db.commit()
-    db.refresh(player_turn_obj)
-
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_partial_board(game))
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_figures_in_board(game))
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_game(game))
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_partial_moves_in_board(game)
-    )
+    game_connection_managers[game.id].queue_state_update(game)
 
     return {"message": f"Movimiento realizado por {player.name}"}
 
@@ -292,171 +233,64 @@ def get_games(
     return games
 
 
-@router.put("/{id_game}/figure/discard", summary="Discard a figure card")
-async def discard_figure_card(figure_to_discard: FigureToDiscardSchema, player: Player = Depends(auth_scheme), db: Session = Depends(get_db), game: Game = Depends(get_game)):
-
-    player_turn_obj: Player = game.players[game.player_turn]
-    board = calculate_partial_board(game)
-
-    figure_card = get_real_card(
-        player=player_turn_obj, figure_to_discard=figure_to_discard, db=db, game=game)
-    figure_in_board = get_real_figure_in_board(
-        figure_to_discard=figure_to_discard, game=game)
-
-    figure_color = board.color_distribution[figure_to_discard.clicked_x][figure_to_discard.clicked_y]
-
-    # Verificar que la carta figura esta en la mano del jugador
-
-    if player.id != player_turn_obj.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Es necesario que sea tu turno para poder descartar una carta")
-
-    if figure_color == game.forbidden_color:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="El color de la figura no puede ser el color prohibido")
-
-    if not has_figure_card(figure_card_schema=figure_card, player=player_turn_obj):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="La carta figura no esta en la mano del jugador")
-
-    figure_type = figure_card.type.value
-    # Verificar que la carta figura esta formada en el tablero
-
-    if figure_in_board.fig not in [x.fig for x in get_figure_in_board(board=board, figure_type=figure_type, f_color=game.forbidden_color)]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="La carta figura no esta formada en el tablero")
-
-    # Actualizar el tablero en la bd
-    game.board.color_distribution = serialize_board(board)
-
-    # Actualizar el color prohibido
-    game.forbidden_color = figure_color
-
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_board(game))
-
-    # Setear movimientos como finales
-    for movement in player_turn_obj.movements:
-        movement.final_movement = True
-
-    delete_movement_cards_not_in_hand(player_turn_obj, db)
-
-    # Registrar la carta figura en el descarte
-    erase_figure_card(player=player_turn_obj, figure=figure_card, db=db)
+@router.get("/lobby", response_model=LobbyPageSchema, summary="Get a page of the lobby", dependencies=[Depends(auth_scheme)])
+def get_lobby(
+    status: Optional[str] = Depends(get_game_status),
+    name: Optional[str] = Query(None, description="Prefijo del nombre de la partida"),
+    cursor: Optional[int] = Query(None, description="next_cursor de la pagina anterior"),
+    limit: int = Query(LOBBY_PAGE_SIZE, ge=1, le=100)
+):
+    """
+    Retrieve a page of lobby rows (id, name, player count, capacity, status) from the in-memory lobby index.
 
-    db.commit()
-    db.refresh(player_turn_obj)
+    **Parameters:**
+    - `status`: The status of the games to filter by (waiting, in_game, finished). Optional.
+    - `name`: Only games whose name starts with it, case insensitive. Optional.
+    - `cursor`: The `next_cursor` of the previous page. Optional.
+    - `limit`: Games per page.
 
-    cards_in_hand = [
-        card for card in player_turn_obj.figure_cards if card.in_hand]
+    **Returns:**
+    - The games, newest first, and the cursor of the next page (null on the last one).
+    """
+    return lobby_index.page(status=GameStatus[status] if status else None, name_prefix=name, cursor=cursor, limit=limit)
 
-    if len(cards_in_hand) == 1:
-        unlock_remaining_card(player_turn_obj, db)
 
-    if not len(cards_in_hand) and player_turn_obj.blocked:
-        player_turn_obj.blocked = False
+@router.put("/{id_game}/figure/discard", summary="Discard a figure card")
+@game_load_profile(TURN_ACTION)
+async def discard_figure_card(figure_to_discard: FigureToDiscardSchema, player: Player = Depends(async_auth_scheme), db: AsyncSession = Depends(get_async_db), game: Game = Depends(get_async_game)):
+    state, events = apply_action(game, DiscardFigure(
+        player.id, claimed_figure(figure_to_discard), figure_to_discard.clicked_x, figure_to_discard.clicked_y))
 
-    db.commit()
-    db.refresh(game)
-    db.refresh(player_turn_obj)
+    await save_game_state_async(game, state, events, db)
 
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_game(game))
+    # El color prohibido ha cambiado: se reenvian todas las figuras formadas en el tablero
+    game_connection_managers[game.id].queue_state_update(game)
 
-    # El color prohibido ha cambiado: reenviar todas las figuras formadas en el tablero.
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_figures_in_board(game)
-    )
-
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_partial_moves_in_board(game) #
-    )
-
-    if is_out_of_figure_cards_victory(player_turn_obj):
+    publish_game_event(GAME_UPDATED, game)
 
+    if any(isinstance(event, GameWon) for event in events):
         asyncio.create_task(game_connection_managers[game.id].broadcast_game_won(
-            game, player_turn_obj))
+            game, game.players[game.player_turn]))
 
-        end_game(game, db)
-
-    db.commit()
-    db.refresh(player_turn_obj)
+        await finish_game_async(game, db)
 
     return {"message": "Carta figura descartada con exito"}
 
 
 @router.put("/{id_game}/figure/block", summary="Block a figure card")
-async def block_figure_card(figure_to_block: FigureToDiscardSchema, player: Player = Depends(auth_scheme), db: Session = Depends(get_db), game: Game = Depends(get_game)):
-
-    player_turn_obj: Player = game.players[game.player_turn]
-
-    if player.id != player_turn_obj.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="Es necesario que sea tu turno para poder bloquear a otro jugador")
-
-    player_to_block = get_player_by_id(figure_to_block.associated_player, game)
-
-    if player_to_block.blocked == True:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="El jugador ya esta bloqueado")
-
-    if len([cards for cards in player_to_block.figure_cards if cards.in_hand]) == 1:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="El jugador solo tiene una carta figura, no puede ser bloqueado")
-
-    if game.players[game.player_turn].id == player_to_block.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="No puedes bloquear tu propia carta")
-    board = calculate_partial_board(game)
-
-    figure_card = get_real_card(
-        player=player_to_block, figure_to_discard=figure_to_block, db=db, game=game)
-    figure_in_board = get_real_figure_in_board(
-        figure_to_discard=figure_to_block, game=game)
-
-    figure_color = board.color_distribution[figure_to_block.clicked_x][figure_to_block.clicked_y]
-
-    if figure_color == game.forbidden_color:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="El color de la figura no puede ser el color prohibido")
-
-    if not has_figure_card(figure_card_schema=figure_card, player=player_to_block):
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="La carta figura no esta en la mano del jugador a bloquear")
+@game_load_profile(TURN_ACTION)
+async def block_figure_card(figure_to_block: FigureToDiscardSchema, player: Player = Depends(async_auth_scheme), db: AsyncSession = Depends(get_async_db), game: Game = Depends(get_async_game)):
+    state, events = apply_action(game, BlockFigure(
+        player.id, figure_to_block.associated_player, claimed_figure(figure_to_block),
+        figure_to_block.clicked_x, figure_to_block.clicked_y))
 
-    figure_type = figure_card.type.value
+    await save_game_state_async(game, state, events, db)
 
-    # Verificar que la carta figura esta formada en el tablero
-    if figure_in_board.fig not in [x.fig for x in get_figure_in_board(board=board, figure_type=figure_type, f_color=game.forbidden_color)]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            detail="La carta figura no esta formada en el tablero")
+    game_connection_managers[game.id].queue_state_update(game)
 
-    # Actualizar el tablero en la bd
-    game.board.color_distribution = serialize_board(board)
+    publish_game_event(GAME_UPDATED, game)
 
-    # Actualizar el color prohibido
-    game.forbidden_color = figure_color
+    blocked_player = state.players[state.seat_of(figure_to_block.associated_player)]
 
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_board(game))
-
-    # Setear movimientos como finales
-    for movement in player_turn_obj.movements:
-        movement.final_movement = True
-
-    delete_movement_cards_not_in_hand(player_turn_obj, db)
-
-    # Actually bloquear al jugador
-    block_player(figure_card, player_to_block, db)
-
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_game(game))
-
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_figures_in_board(game)
-    )
-    asyncio.create_task(
-        game_connection_managers[game.id].broadcast_partial_moves_in_board(game) #
-    )
+    return {"message": f"Bloqueaste a {blocked_player.name}!"}
 
-    return {"message": f"Bloqueaste a {player_to_block.name}!"}
@@ -0,0 +1,9 @@
+from fastapi import APIRouter, Response
+from app.services.metrics_services import metrics_registry, METRICS_CONTENT_TYPE
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics", summary="Metrics in the Prometheus text format", include_in_schema=False)
+def get_metrics():
+    return Response(content=metrics_registry.render(), media_type=METRICS_CONTENT_TYPE)
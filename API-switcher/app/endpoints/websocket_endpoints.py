@@ -1,55 +1,71 @@
 from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
-from sqlalchemy import event
 from sqlalchemy.orm import Session
 from app.db.db import get_db
-from app.models.game_models import Game
-from app.services.websocket_services import GameManager, GameListManager
-from app.dependencies.dependencies import get_game
-from asyncio import AbstractEventLoop
-import asyncio
+from app.services.websocket_services import GameManagerRegistry, GameListManager
+from app.services.event_services import event_bus, GameEvent, GAME_EVENTS, GAME_CREATED, GAME_DELETED
+from app.services.lobby_services import game_to_lobby_row
+from app.services.metrics_services import metrics_registry
+from app.services.broadcast_services import broadcast_backend, Broadcast, LOBBY_CHANNEL, channel_game_id
+from app.dependencies.dependencies import load_game, FULL_SNAPSHOT, TURN_ACTION
+import json
 import logging
-import threading
 
 router = APIRouter()
-game_connection_managers: dict[int, GameManager] = {}
-game_list_manager = GameListManager()
+# Los mensajes pasan por el backend de difusion, que los entrega a los sockets de todos los workers
+game_connection_managers = GameManagerRegistry(backend=broadcast_backend)
+game_list_manager = GameListManager(backend=broadcast_backend)
 
+# Mensajes que recibe el lobby por cada evento de una partida
+LOBBY_MESSAGES = {GAME_CREATED: "game added", GAME_DELETED: "game deleted"}
 
-def start_event_loop(loop: AbstractEventLoop):
-    asyncio.set_event_loop(loop)
-    loop.run_forever()
 
+async def handle_game_event(event: GameEvent):
+    await game_list_manager.broadcast_game(LOBBY_MESSAGES.get(event.type, "game updated"), game_to_lobby_row(event.game))
 
-def get_or_create_event_loop():
-    try:
-        loop = asyncio.get_running_loop()
-        return loop
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        threading.Thread(target=start_event_loop,
-                         args=(loop,), daemon=True).start()
-        return loop
+
+async def forget_finished_game(event: GameEvent):
+    # El game won ya fue encolado por el endpoint que termino la partida
+    game_connection_managers.evict(event.game_id)
+
+
+for event_type in GAME_EVENTS:
+    event_bus.subscribe(event_type, handle_game_event)
+event_bus.subscribe(GAME_DELETED, forget_finished_game)
+
+
+def deliver_broadcast(broadcast: Broadcast):
+    remote = broadcast_backend.is_remote(broadcast)
+    if broadcast.channel == LOBBY_CHANNEL:
+        game_list_manager.deliver(broadcast, remote)
+        return
+    game_id = channel_game_id(broadcast.channel)
+    if game_id is not None:
+        game_connection_managers.deliver(game_id, broadcast, remote)
 
 
-@event.listens_for(Game, 'after_insert')
-def handle_creation(mapper, connection, target: Game):
-    loop = get_or_create_event_loop()
-    asyncio.run_coroutine_threadsafe(
-        game_list_manager.broadcast_game("game added", target), loop)
+broadcast_backend.subscribe(deliver_broadcast)
 
 
-@event.listens_for(Game, 'after_delete')
-def handle_deletion(mapper, connection, target: Game):
-    loop = get_or_create_event_loop()
-    asyncio.run_coroutine_threadsafe(
-        game_list_manager.broadcast_game("game deleted", target), loop)
+def websocket_connections() -> dict:
+    counts = {("lobby",): len(game_list_manager.connection_manager.active_connections), ("game",): 0, ("game_delta",): 0}
+    for manager in game_connection_managers.values():
+        counts[("game",)] += len(manager.connection_manager.active_connections)
+        counts[("game_delta",)] += len(manager.delta_connection_manager.active_connections)
+    return counts
 
 
-@event.listens_for(Game, 'after_update')
-def handle_change(mapper, connection, target: Game):
-    loop = get_or_create_event_loop()
-    asyncio.run_coroutine_threadsafe(
-        game_list_manager.broadcast_game("game updated", target), loop)
+metrics_registry.gauge("websocket_connections", "Open WebSockets, by channel", ("channel",),
+                       collect=websocket_connections)
+metrics_registry.gauge("state_update_queue_depth", "Parts and messages waiting for the next state update, by game",
+                       ("game_id",), collect=lambda: {(game_id,): manager.queue_depth
+                                                      for game_id, manager in game_connection_managers.items()})
+metrics_registry.gauge("game_managers", "Game channels kept in memory",
+                       collect=lambda: {(): len(game_connection_managers)})
+metrics_registry.gauge("game_connections", "Open WebSockets of each game, both protocols", ("game_id",),
+                       collect=lambda: {(game_id,): manager.connections
+                                        for game_id, manager in game_connection_managers.items()})
+metrics_registry.gauge("game_manager_state_bytes", "Size of the state the game channels remember for the delta clients",
+                       collect=lambda: {(): game_connection_managers.stats()["state_bytes"]})
 
 
 @router.websocket("/ws/games")
@@ -68,19 +84,32 @@ async def list(websocket: WebSocket):
 
 @router.websocket("/ws/games/{game_id}")
 async def game(websocket: WebSocket, game_id: int, db: Session = Depends(get_db)):
-    game_manager = game_connection_managers.get(game_id)
-    if not game_manager:
-        game_manager = GameManager()
-        game_connection_managers[game_id] = game_manager
+    game_manager = game_connection_managers[game_id]
 
-    await game_manager.connect(websocket)
+    # Con ?protocol=delta el cliente recibe un snapshot al conectarse y despues solo los cambios
+    delta = websocket.query_params.get("protocol") == "delta"
 
-    game = get_game(game_id, db)
-
-    await game_manager.broadcast_game(game)
+    if delta:
+        # El snapshot incluye el tablero parcial, solo lo recibe el cliente que se conecta
+        game = load_game(game_id, db, TURN_ACTION)
+        await game_manager.connect_delta(websocket, game)
+    else:
+        await game_manager.connect(websocket)
+        game = load_game(game_id, db, FULL_SNAPSHOT)
+        await game_manager.broadcast_game(game)
 
     try:
         while True:
-            await websocket.receive_text()
+            data = await websocket.receive_text()
+            if delta and is_resync_request(data):
+                await game_manager.send_snapshot(websocket)
     except WebSocketDisconnect:
         game_manager.disconnect(websocket)
+
+
+def is_resync_request(data: str) -> bool:
+    """Delta clients ask for a new snapshot when they see a gap in the versions"""
+    try:
+        return json.loads(data).get("type") == "resync"
+    except (ValueError, AttributeError):
+        return False
@@ -0,0 +1,140 @@
+# state.py
+# Plain, immutable values of the game engine: state, actions, events and errors. No ORM and no HTTP.
+from app.db.enums import Colors, FigTypeAndDifficulty, GameStatus, MovementType
+from typing import NamedTuple, Tuple
+
+Board = Tuple[Tuple[Colors, ...], ...]
+
+
+class PartialMove(NamedTuple):
+    movement_type: MovementType
+    x1: int
+    y1: int
+    x2: int
+    y2: int
+
+
+class Seat(NamedTuple):
+    """A player of the game and its cards"""
+    id: int
+    name: str
+    movement_cards: Tuple[MovementType, ...]            # in hand, the ones used by partial moves are in the moves
+    figure_cards: Tuple[FigTypeAndDifficulty, ...]      # in hand
+    figure_deck: Tuple[FigTypeAndDifficulty, ...]       # still to be drawn, the next one first
+    blocked: bool = False
+    blocked_card: FigTypeAndDifficulty | None = None
+
+
+class SwitcherState(NamedTuple):
+    board: Board
+    partial_board: Board                                # board with the partial moves of the player in turn
+    players: Tuple[Seat, ...]
+    turn: int
+    forbidden_color: Colors
+    partial_moves: Tuple[PartialMove, ...]
+    status: GameStatus
+    winner: int | None = None
+
+    @property
+    def player_in_turn(self) -> Seat:
+        return self.players[self.turn]
+
+    def seat_of(self, player_id: int) -> int | None:
+        for index, seat in enumerate(self.players):
+            if seat.id == player_id:
+                return index
+        return None
+
+
+# Actions
+
+class PlayMovement(NamedTuple):
+    player_id: int
+    movement_type: MovementType
+    x1: int
+    y1: int
+    x2: int
+    y2: int
+
+
+class UndoMovement(NamedTuple):
+    player_id: int
+
+
+class FinishTurn(NamedTuple):
+    player_id: int
+
+
+class DiscardFigure(NamedTuple):
+    """Claim a figure formed in the board, (x, y) is one of its tiles"""
+    player_id: int
+    figure: FigTypeAndDifficulty
+    x: int
+    y: int
+
+
+class BlockFigure(NamedTuple):
+    """Block a figure card of another player with a figure formed in the board, (x, y) is one of its tiles"""
+    player_id: int
+    target_id: int
+    figure: FigTypeAndDifficulty
+    x: int
+    y: int
+
+
+class QuitGame(NamedTuple):
+    player_id: int
+
+
+# Events
+
+class MovementPlayed(NamedTuple):
+    player_id: int
+    movement: PartialMove
+
+
+class MovementUndone(NamedTuple):
+    player_id: int
+    movement: PartialMove
+
+
+class TurnFinished(NamedTuple):
+    player_id: int
+    next_player_id: int
+
+
+class FigureDiscarded(NamedTuple):
+    player_id: int
+    figure: FigTypeAndDifficulty
+    forbidden_color: Colors
+
+
+class PlayerBlocked(NamedTuple):
+    player_id: int
+    target_id: int
+    figure: FigTypeAndDifficulty
+    forbidden_color: Colors
+
+
+class PlayerLeft(NamedTuple):
+    player_id: int
+
+
+class GameWon(NamedTuple):
+    player_id: int
+
+
+# Errors
+
+# Why an action was rejected, the adapters translate them (e.g. to an HTTP status)
+INVALID = "invalid"
+FORBIDDEN = "forbidden"
+NOT_FOUND = "not_found"
+PRECONDITION_FAILED = "precondition_failed"
+
+
+class IllegalAction(Exception):
+    def __init__(self, detail: str, reason: str = INVALID):
+        super().__init__(detail)
+        self.detail = detail
+        self.reason = reason
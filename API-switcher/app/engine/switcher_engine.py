@@ -0,0 +1,319 @@
+# switcher_engine.py
+# Rules of the game over the immutable state of state.py, independent of FastAPI and SQLAlchemy.
+from app.db.constants import VALID_MOVES, AMOUNT_OF_FIGURES_DIFFICULT, AMOUNT_OF_FIGURES_EASY
+from app.db.enums import Colors, FigTypeAndDifficulty, GameStatus, MovementType
+from app.db.figure_table import BOARD_SIZE, Tile
+from app.engine.state import (Board, PartialMove, Seat, SwitcherState, PlayMovement, UndoMovement, FinishTurn,
+                              DiscardFigure, BlockFigure, QuitGame, MovementPlayed, MovementUndone, TurnFinished,
+                              FigureDiscarded, PlayerBlocked, PlayerLeft, GameWon, IllegalAction, FORBIDDEN, NOT_FOUND,
+                              PRECONDITION_FAILED)
+from app.services.bitboard_services import find_figure, find_figures
+from typing import Iterable, List, Sequence, Tuple
+import functools
+import random
+
+HAND_SIZE = 3
+
+BOARD_COLORS = (Colors.red, Colors.blue, Colors.yellow, Colors.green)
+
+# Every swap allowed by each movement card, sorted so bots and replays see them in the same order
+MOVEMENT_SWAPS = {movement_type: tuple(sorted(VALID_MOVES[movement_type.name])) for movement_type in MovementType}
+
+# Every figure card is twice in the game
+FIGURE_DECK = {
+    difficulty: [type for type in FigTypeAndDifficulty if type.value[1] == difficulty] * 2
+    for difficulty in ("easy", "difficult")
+}
+
+
+def build_figure_decks(player_amount: int, rng=random) -> List[List[FigTypeAndDifficulty]]:
+    """
+    Shuffle the easy and the difficult cards once and split them between the players,
+    each deck is shuffled again so the hands mix both difficulties.
+    """
+    decks = [[] for _ in range(player_amount)]
+    for difficulty, amount in (("easy", AMOUNT_OF_FIGURES_EASY), ("difficult", AMOUNT_OF_FIGURES_DIFFICULT)):
+        cards = FIGURE_DECK[difficulty][:]
+        rng.shuffle(cards)
+        cards_per_player = amount * 2 // player_amount
+        for i, deck in enumerate(decks):
+            deck.extend(cards[i * cards_per_player:(i + 1) * cards_per_player])
+    for deck in decks:
+        rng.shuffle(deck)
+    return decks
+
+
+def random_board(rng=random) -> Board:
+    """9 tiles of each color, shuffled"""
+    colors = [color for color in BOARD_COLORS for _ in range(BOARD_SIZE * BOARD_SIZE // len(BOARD_COLORS))]
+    rng.shuffle(colors)
+    return tuple(tuple(colors[i:i + BOARD_SIZE]) for i in range(0, len(colors), BOARD_SIZE))
+
+
+def swap_tiles(board: Board, x1: int, y1: int, x2: int, y2: int) -> Board:
+    rows = [list(row) for row in board]
+    rows[x1][y1], rows[x2][y2] = rows[x2][y2], rows[x1][y1]
+    return tuple(tuple(row) for row in rows)
+
+
+def check_swap(movement_type: MovementType, x1: int, y1: int, x2: int, y2: int):
+    """The swap must be one of the swaps of the movement card"""
+    if movement_type.name not in VALID_MOVES:
+        raise IllegalAction("Tipo de movimiento desconocido")
+
+    if (x1, y1, x2, y2) not in VALID_MOVES[movement_type.name]:
+        raise IllegalAction("Movimiento invalido")
+
+
+def check_figure_color(board: Board, x: int, y: int, f_color: Colors) -> Colors:
+    """The figure over the tile (x, y) can't be of the forbidden color. Returns its color."""
+    color = board[x][y]
+    if color == f_color:
+        raise IllegalAction("El color de la figura no puede ser el color prohibido", FORBIDDEN)
+    return color
+
+
+def check_formed_figure(board: Board, figure: FigTypeAndDifficulty, x: int, y: int, f_color: Colors):
+    """The figure must be formed in the board over the tile (x, y)"""
+    if not any((x, y) in tiles for tiles in find_figure(figure, board, f_color)):
+        raise IllegalAction("La carta figura no esta formada en el tablero", FORBIDDEN)
+
+
+def check_figure_card(seat: Seat, figure: FigTypeAndDifficulty, detail: str) -> bool:
+    """
+    The card must be in the hand of the seat, and not be its blocked card unless there is another one of its kind.
+    Returns whether the only card left to claim is the blocked one of a player holding no other figure card.
+    """
+    if figure not in seat.figure_cards:
+        raise IllegalAction(detail, FORBIDDEN)
+
+    if seat.blocked_card != figure or seat.figure_cards.count(figure) > 1:
+        return False
+    if not seat.blocked:
+        # A card is only blocked along with its player
+        raise IllegalAction("Caso borde que no deberia pasar nunca.", PRECONDITION_FAILED)
+    if len(seat.figure_cards) + len(seat.figure_deck) > 1:
+        raise IllegalAction("No puedes descartar una carta bloqueada.", FORBIDDEN)
+    return True
+
+
+@functools.lru_cache(maxsize=4096)
+def card_movements(player_id: int, movement_type: MovementType) -> Tuple[PlayMovement, ...]:
+    """The movements a card allows, built once per player and card"""
+    return tuple(PlayMovement(player_id, movement_type, *swap) for swap in MOVEMENT_SWAPS[movement_type])
+
+
+def remove_card(cards: Tuple, card) -> Tuple:
+    index = cards.index(card)
+    return cards[:index] + cards[index + 1:]
+
+
+class SwitcherEngine:
+    """
+    The game as a state machine: `apply(state, action)` returns the next state and what happened, or raises
+    IllegalAction. States are immutable, so they can be kept, compared and replayed.
+    Everything random (board, decks, dealt cards) comes from the engine's generator, the same seed and the
+    same actions always give the same game.
+    """
+
+    def __init__(self, seed=None, rng: random.Random | None = None):
+        self.rng = rng or random.Random(seed)
+        self.handlers = {
+            PlayMovement: self._play_movement,
+            UndoMovement: self._undo_movement,
+            FinishTurn: self._finish_turn,
+            DiscardFigure: self._discard_figure,
+            BlockFigure: self._block_figure,
+            QuitGame: self._quit_game,
+        }
+
+    def new_game(self, players: Sequence[Tuple[int, str]]) -> SwitcherState:
+        """Start a game for the (id, name) of each player: first turn, hands, figure decks and board"""
+        turn = self.rng.randrange(len(players))
+        movement_hands = [self._draw_movement_cards(()) for _ in players]
+        decks = build_figure_decks(len(players), self.rng)
+        seats = tuple(Seat(id=player_id, name=name, movement_cards=movement_hand,
+                           figure_cards=tuple(deck[:HAND_SIZE]), figure_deck=tuple(deck[HAND_SIZE:]))
+                      for (player_id, name), movement_hand, deck in zip(players, movement_hands, decks))
+        board = random_board(self.rng)
+        return SwitcherState(board=board, partial_board=board, players=seats, turn=turn,
+                             forbidden_color=Colors.none, partial_moves=(), status=GameStatus.in_game)
+
+    def apply(self, state: SwitcherState, action) -> Tuple[SwitcherState, list]:
+        if state.status is not GameStatus.in_game:
+            raise IllegalAction("El juego debe estar comenzado")
+
+        handler = self.handlers.get(type(action))
+        if not handler:
+            raise IllegalAction(f"Accion desconocida: {type(action).__name__}")
+
+        return handler(state, action)
+
+    def replay(self, players: Sequence[Tuple[int, str]], actions: Iterable) -> Tuple[SwitcherState, list]:
+        """Play a whole game from the start, the engine must have been created with the seed of the game"""
+        state = self.new_game(players)
+        events = []
+        for action in actions:
+            state, new_events = self.apply(state, action)
+            events.extend(new_events)
+        return state, events
+
+    # Queries
+
+    def legal_movements(self, state: SwitcherState) -> List[PlayMovement]:
+        """Every movement the player in turn can play with the cards in hand"""
+        seat = state.player_in_turn
+        return [movement for movement_type in sorted(set(seat.movement_cards), key=lambda movement_type: movement_type.name)
+                for movement in card_movements(seat.id, movement_type)]
+
+    def formed_figures(self, state: SwitcherState) -> List[Tuple[FigTypeAndDifficulty, List[Tile]]]:
+        """Figures formed in the partial board that can be claimed, i.e. not of the forbidden color"""
+        return find_figures(state.partial_board, state.forbidden_color)
+
+    # Actions
+
+    def _check_turn(self, state: SwitcherState, player_id: int, detail: str) -> Seat:
+        seat = state.player_in_turn
+        if seat.id != player_id:
+            raise IllegalAction(detail, FORBIDDEN)
+        return seat
+
+    def _play_movement(self, state: SwitcherState, action: PlayMovement):
+        seat = self._check_turn(state, action.player_id,
+                                "Es necesario que sea tu turno para poder realizar un movimiento")
+        check_swap(action.movement_type, action.x1, action.y1, action.x2, action.y2)
+
+        if action.movement_type not in seat.movement_cards:
+            raise IllegalAction("Movement card not found in player's hand")
+
+        move = PartialMove(action.movement_type, action.x1, action.y1, action.x2, action.y2)
+        seat = seat._replace(movement_cards=remove_card(seat.movement_cards, action.movement_type))
+        state = self._replace_seat(state, state.turn, seat)._replace(
+            partial_board=swap_tiles(state.partial_board, move.x1, move.y1, move.x2, move.y2),
+            partial_moves=state.partial_moves + (move,))
+        return state, [MovementPlayed(seat.id, move)]
+
+    def _undo_movement(self, state: SwitcherState, action: UndoMovement):
+        seat = self._check_turn(state, action.player_id,
+                                "Es necesario que sea tu turno para cancelar el movimiento")
+        if not state.partial_moves:
+            raise IllegalAction("No hay movimientos parciales para eliminar")
+
+        move = state.partial_moves[-1]
+        seat = seat._replace(movement_cards=seat.movement_cards + (move.movement_type,))
+        state = self._replace_seat(state, state.turn, seat)._replace(
+            partial_board=swap_tiles(state.partial_board, move.x1, move.y1, move.x2, move.y2),
+            partial_moves=state.partial_moves[:-1])
+        return state, [MovementUndone(seat.id, move)]
+
+    def _finish_turn(self, state: SwitcherState, action: FinishTurn):
+        seat = self._check_turn(state, action.player_id,
+                                "Es necesario que sea tu turno para poder finalizarlo")
+
+        # The cards of the partial moves go back to the hand and the board loses the moves
+        movement_cards = seat.movement_cards + tuple(move.movement_type for move in state.partial_moves)
+        seat = seat._replace(movement_cards=self._draw_movement_cards(movement_cards))
+        if not seat.blocked:
+            seat = self._draw_figure_cards(seat)
+
+        turn = (state.turn + 1) % len(state.players)
+        state = self._replace_seat(state, state.turn, seat)._replace(
+            partial_board=state.board, partial_moves=(), turn=turn)
+        return state, [TurnFinished(seat.id, state.player_in_turn.id)]
+
+    def _discard_figure(self, state: SwitcherState, action: DiscardFigure):
+        seat = self._check_turn(state, action.player_id,
+                                "Es necesario que sea tu turno para poder descartar una carta")
+
+        color = check_figure_color(state.partial_board, action.x, action.y, state.forbidden_color)
+        only_blocked = check_figure_card(seat, action.figure, "La carta figura no esta en la mano del jugador")
+        check_formed_figure(state.partial_board, action.figure, action.x, action.y, state.forbidden_color)
+        if only_blocked:
+            raise IllegalAction("Figure card not found in player's hand")
+
+        seat = seat._replace(figure_cards=remove_card(seat.figure_cards, action.figure))
+        # The blocked card is freed when it's the last one in hand, and the player when the hand is empty
+        if len(seat.figure_cards) == 1:
+            seat = seat._replace(blocked_card=None)
+        if not seat.figure_cards:
+            seat = seat._replace(blocked=False)
+
+        state = self._claim_figure(self._replace_seat(state, state.turn, seat), color)
+        events = [FigureDiscarded(seat.id, action.figure, color)]
+
+        if not seat.figure_cards and not seat.figure_deck:
+            state = state._replace(status=GameStatus.finished, winner=seat.id)
+            events.append(GameWon(seat.id))
+
+        return state, events
+
+    def _block_figure(self, state: SwitcherState, action: BlockFigure):
+        seat = self._check_turn(state, action.player_id,
+                                "Es necesario que sea tu turno para poder bloquear a otro jugador")
+
+        target_index = state.seat_of(action.target_id)
+        if target_index is None:
+            raise IllegalAction("El jugador no esta en la partida", NOT_FOUND)
+        target = state.players[target_index]
+
+        if target.blocked:
+            raise IllegalAction("El jugador ya esta bloqueado", FORBIDDEN)
+
+        if len(target.figure_cards) == 1:
+            raise IllegalAction("El jugador solo tiene una carta figura, no puede ser bloqueado", FORBIDDEN)
+
+        if target.id == seat.id:
+            raise IllegalAction("No puedes bloquear tu propia carta", FORBIDDEN)
+
+        color = check_figure_color(state.partial_board, action.x, action.y, state.forbidden_color)
+        check_figure_card(target, action.figure, "La carta figura no esta en la mano del jugador a bloquear")
+        check_formed_figure(state.partial_board, action.figure, action.x, action.y, state.forbidden_color)
+
+        target = target._replace(blocked=True, blocked_card=action.figure)
+        state = self._claim_figure(self._replace_seat(state, target_index, target), color)
+        return state, [PlayerBlocked(seat.id, target.id, action.figure, color)]
+
+    def _quit_game(self, state: SwitcherState, action: QuitGame):
+        index = state.seat_of(action.player_id)
+        if index is None:
+            raise IllegalAction("El jugador no esta en la partida", NOT_FOUND)
+
+        if index <= state.turn:
+            # The turn keeps its index, so it goes to the player seated after the one in turn. The partial moves are
+            # lost, a player who stays gets the cards of theirs back.
+            if index < state.turn:
+                seat = state.player_in_turn
+                seat = seat._replace(movement_cards=seat.movement_cards +
+                                     tuple(move.movement_type for move in state.partial_moves))
+                state = self._replace_seat(state, state.turn, seat)
+            state = state._replace(partial_board=state.board, partial_moves=())
+
+        players = state.players[:index] + state.players[index + 1:]
+        state = state._replace(players=players)
+        events = [PlayerLeft(action.player_id)]
+
+        if len(players) == 1:
+            state = state._replace(status=GameStatus.finished, winner=players[0].id)
+            events.append(GameWon(players[0].id))
+        elif state.turn >= len(players):
+            state = state._replace(turn=0)
+
+        return state, events
+
+    # Helpers
+
+    def _claim_figure(self, state: SwitcherState, color: Colors) -> SwitcherState:
+        """A claimed figure makes the partial moves final and its color forbidden"""
+        return state._replace(board=state.partial_board, partial_moves=(), forbidden_color=color)
+
+    def _draw_movement_cards(self, movement_cards: Tuple[MovementType, ...]) -> Tuple[MovementType, ...]:
+        drawn = tuple(self.rng.choice(list(MovementType)) for _ in range(HAND_SIZE - len(movement_cards)))
+        return movement_cards + drawn
+
+    def _draw_figure_cards(self, seat: Seat) -> Seat:
+        amount = max(HAND_SIZE - len(seat.figure_cards), 0)
+        return seat._replace(figure_cards=seat.figure_cards + seat.figure_deck[:amount],
+                             figure_deck=seat.figure_deck[amount:])
+
+    def _replace_seat(self, state: SwitcherState, index: int, seat: Seat) -> SwitcherState:
+        return state._replace(players=state.players[:index] + (seat,) + state.players[index + 1:])
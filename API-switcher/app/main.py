@@ -1,20 +1,43 @@
 from fastapi import FastAPI
-from app.endpoints import game_endpoints, player_endpoints, websocket_endpoints
-from app.db.db import Base, engine
+from app.endpoints import game_endpoints, player_endpoints, websocket_endpoints, metrics_endpoints
+from app.db.db import Base, engine, create_missing_indexes, log_engine_settings
+from app.db.board_encoding import migrate_board_encoding
+from app.services.game_state_services import game_state_cache
+from app.services.figure_scan_services import figure_scan_pool
+from app.services.broadcast_services import broadcast_backend
+from app.services.metrics_services import MetricsMiddleware
+from app.services.sql_profiler_services import SQLProfilerMiddleware
+from contextlib import asynccontextmanager
 import logging
 from fastapi.middleware.cors import CORSMiddleware
 
 logging.basicConfig(level=logging.DEBUG)
 
+log_engine_settings()
 Base.metadata.create_all(bind=engine)
+create_missing_indexes()
+# Los tableros guardados como JSON pasan a la codificacion compacta
+migrate_board_encoding(engine)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await broadcast_backend.start()
+    yield
+    await broadcast_backend.stop()
+    # Write the boards that are still waiting to be saved
+    game_state_cache.flush_all()
+    figure_scan_pool.shutdown()
+
 
 app = FastAPI(
     title="El Switcher API documentation",
+    lifespan=lifespan,
 )
 
 app.include_router(router=game_endpoints.router)
 app.include_router(router=player_endpoints.router)
 app.include_router(router=websocket_endpoints.router)
+app.include_router(router=metrics_endpoints.router)
 
 app.add_middleware(
     CORSMiddleware,
@@ -22,4 +45,10 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-)
\ No newline at end of file
+)
+
+# SQL statements of each request in a Server-Timing header, only with SQL_PROFILER=1
+app.add_middleware(SQLProfilerMiddleware)
+
+# Latency and SQL statements of every request, exposed in /metrics
+app.add_middleware(MetricsMiddleware)
@@ -1,6 +1,7 @@
 from app.db.db import Base
 from app.db.enums import Colors
-from sqlalchemy import Column, Integer, ForeignKey, JSON
+from app.db.board_encoding import CompactBoard
+from sqlalchemy import Column, Integer, ForeignKey
 from sqlalchemy.orm import relationship
 from app.models.game_models import Game
 import numpy as np
@@ -10,14 +11,19 @@ class Board(Base):
     __tablename__ = "board"
 
     game_id = Column (Integer, ForeignKey("game.id"), primary_key=True)
-    color_distribution = Column(JSON, nullable=True) #Almacena la matriz como un JSON
+    color_distribution = Column(CompactBoard, nullable=True) #Almacena la matriz como un string de 36 caracteres, uno por color
     
     #Relacion one-to-one entre game y borad
     game = relationship ("Game", back_populates="board", uselist=False)
 
-    def __init__ (self, game_id):
+    def __init__ (self, game_id, color_distribution=None):
         self.game_id = game_id
 
+        # Tablero dado, por ejemplo el que reparte el motor del juego
+        if color_distribution is not None:
+            self.color_distribution = color_distribution
+            return
+
         #Crear una lista con 9 elementos de cada color
         colors = ([Colors.red.value] * 9 + [Colors.blue.value] * 9 +
                   [Colors.yellow.value] * 9 + [Colors.green.value] * 9)
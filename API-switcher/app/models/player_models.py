@@ -12,7 +12,7 @@ class Player(Base):
     id = Column(Integer, primary_key=True, autoincrement = True)
     name = Column(String, nullable = False)
     playerState = Column(Enum(PlayerState), nullable = False, default = PlayerState.SEARCHING)
-    token = Column(String, default = None)
+    token = Column(String, default = None, index = True)
     blocked = Column(Boolean, default=False)
 
     #relation many-to-one between player and game
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
 from app.db.enums import (GameStatus, Colors)
-from typing import List
+from typing import List, Optional
 from app.schemas.player_schemas import PlayerGameSchemaOut
 from typing_extensions import Annotated
 from pydantic.functional_validators import AfterValidator
@@ -31,4 +31,19 @@ class GameSchemaOut(BaseModel):
         from_attributes = True
 
     def get_players_connected(self) -> int:
-        return len(self.players)
\ No newline at end of file
+        return len(self.players)
+
+
+class LobbyGameSchema(BaseModel):
+    """Row of the lobby, without the cards of the players"""
+    id: int
+    name: str
+    player_count: int
+    player_amount: int
+    status: GameStatus
+    host_id: int
+
+
+class LobbyPageSchema(BaseModel):
+    games: List[LobbyGameSchema]
+    next_cursor: Optional[int] = None
@@ -0,0 +1,256 @@
+from collections import Counter
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+from app.db.db import commit_keeping_state, async_service
+from app.db.enums import Colors, FigTypeAndDifficulty, GameStatus
+from app.engine.state import (Board, PartialMove, Seat, SwitcherState, MovementPlayed, MovementUndone,
+                              TurnFinished, FigureDiscarded, PlayerBlocked, PlayerLeft, IllegalAction)
+from app.engine.switcher_engine import SwitcherEngine
+from app.models.board_models import Board as BoardModel
+from app.models.game_models import Game
+from app.models.movement_card_model import MovementCard
+from app.models.movement_model import Movement
+from app.models.player_models import Player
+from app.schemas.figure_schema import FigureToDiscardSchema
+from app.services.engine_services import to_http_exception
+from app.services.event_services import publish_game_event, GAME_DELETED
+from app.services.figure_services import forget_figure_detector
+from app.services.game_services import (initialize_figure_decks, load_player_cards, remove_player_from_game,
+                                        get_real_FigType, convert_game_to_schema, end_game)
+from app.services.game_state_services import game_state_cache
+from app.services.movement_services import deal_initial_movement_cards
+from app.services.turn_services import get_game_rng, forget_game_rng
+from typing import List, Sequence, Tuple
+
+
+# Adapter between the ORM game and the game engine: the endpoints load the state of the game, the engine applies
+# the action of the player and what changed is written back in a single commit.
+
+
+def get_game_engine(game_id: int) -> SwitcherEngine:
+    """The engine of a game draws from the generator of the game, so a replay with its seed deals the same cards"""
+    return SwitcherEngine(rng=get_game_rng(game_id))
+
+
+def to_board(color_distribution: List[List[Colors]]) -> Board:
+    return tuple(tuple(Colors(color) for color in row) for row in color_distribution)
+
+
+def to_color_distribution(board: Board) -> List[List[str]]:
+    return [[color.value for color in row] for row in board]
+
+
+def partial_movements(player: Player) -> List[Movement]:
+    return sorted([movement for movement in player.movements if not movement.final_movement],
+                  key=lambda movement: movement.id or 0)
+
+
+def load_seat(player: Player) -> Seat:
+    figure_cards = sorted(player.figure_cards, key=lambda card: card.id or 0)
+    hand = [card for card in figure_cards if card.in_hand]
+    return Seat(id=player.id, name=player.name,
+                movement_cards=tuple(card.movement_type for card in player.movement_cards if card.in_hand),
+                figure_cards=tuple(card.type_and_difficulty for card in hand),
+                # The deck keeps the order of the ids, the next card to draw first
+                figure_deck=tuple(card.type_and_difficulty for card in figure_cards if not card.in_hand),
+                blocked=bool(player.blocked),
+                blocked_card=next((card.type_and_difficulty for card in hand if card.blocked), None))
+
+
+def load_game_state(game: Game) -> SwitcherState:
+    if game.status is not GameStatus.in_game:
+        # The engine rejects every action of a game that isn't being played, there is no board to read
+        return SwitcherState(board=(), partial_board=(), players=(), turn=0, forbidden_color=game.forbidden_color,
+                             partial_moves=(), status=game.status)
+
+    player_in_turn = game.players[game.player_turn]
+    return SwitcherState(
+        board=to_board(game_state_cache.get_board(game).color_distribution),
+        partial_board=to_board(game_state_cache.get_partial_board(game).color_distribution),
+        players=tuple(load_seat(player) for player in game.players),
+        turn=game.player_turn,
+        forbidden_color=game.forbidden_color,
+        partial_moves=tuple(PartialMove(movement.movement_type, movement.x1, movement.y1, movement.x2, movement.y2)
+                            for movement in partial_movements(player_in_turn)),
+        status=game.status)
+
+
+def apply_action(game: Game, action) -> Tuple[SwitcherState, list]:
+    """The next state of the game and its events, the rules of the engine are the only ones checked"""
+    try:
+        return get_game_engine(game.id).apply(load_game_state(game), action)
+    except IllegalAction as error:
+        raise to_http_exception(error)
+
+
+def claimed_figure(figure_to_claim: FigureToDiscardSchema) -> FigTypeAndDifficulty:
+    """Figure of the card to discard or block, the engine checks it's formed over the clicked tile"""
+    figure = get_real_FigType(figure_to_claim.figure_card)
+    if not figure:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Tipo de figura desconocido")
+    return figure
+
+
+# Persistence
+
+def save_movement_cards(player: Player, seat: Seat, partial_moves: Sequence[PartialMove], db: Session):
+    """The cards in hand are the ones of the seat and the ones out of the hand the cards of the partial moves"""
+    wanted = {True: Counter(seat.movement_cards),
+              False: Counter(move.movement_type for move in partial_moves)}
+    # Cards already where they should be are left alone, the rest change place or are deleted
+    misplaced = []
+    for card in player.movement_cards:
+        if wanted[bool(card.in_hand)][card.movement_type]:
+            wanted[bool(card.in_hand)][card.movement_type] -= 1
+        else:
+            misplaced.append(card)
+
+    for card in misplaced:
+        if wanted[not card.in_hand][card.movement_type]:
+            wanted[not card.in_hand][card.movement_type] -= 1
+            card.in_hand = not card.in_hand
+        else:
+            player.movement_cards.remove(card)
+            db.delete(card)
+
+    for in_hand, movement_types in wanted.items():
+        for movement_type in movement_types.elements():
+            player.movement_cards.append(MovementCard(movement_type=movement_type, associated_player=player.id,
+                                                      in_hand=in_hand))
+
+
+def save_figure_cards(player: Player, seat: Seat, db: Session):
+    """Cards drawn from the top of the deck go to the hand, the claimed ones are deleted"""
+    figure_cards = sorted(player.figure_cards, key=lambda card: card.id or 0)
+    deck = [card for card in figure_cards if not card.in_hand]
+    for card in deck[:len(deck) - len(seat.figure_deck)]:
+        card.in_hand = True
+
+    wanted = Counter(seat.figure_cards)
+    blocked_card = seat.blocked_card
+    # The blocked card is kept over another one of its kind
+    for card in sorted((card for card in figure_cards if card.in_hand), key=lambda card: not card.blocked):
+        if not wanted[card.type_and_difficulty]:
+            player.figure_cards.remove(card)
+            db.delete(card)
+            continue
+        wanted[card.type_and_difficulty] -= 1
+        card.blocked = card.type_and_difficulty == blocked_card
+        if card.blocked:
+            blocked_card = None
+
+    player.blocked = seat.blocked
+
+
+def save_partial_movements(player: Player, partial_moves: Sequence[PartialMove], db: Session):
+    movements = partial_movements(player)
+    kept = 0
+    while (kept < min(len(movements), len(partial_moves)) and
+           PartialMove(movements[kept].movement_type, movements[kept].x1, movements[kept].y1,
+                       movements[kept].x2, movements[kept].y2) == partial_moves[kept]):
+        kept += 1
+
+    for movement in movements[kept:]:
+        player.movements.remove(movement)
+        db.delete(movement)
+
+    for move in partial_moves[kept:]:
+        player.movements.append(Movement(movement_type=move.movement_type, final_movement=False, player_id=player.id,
+                                         x1=move.x1, y1=move.y1, x2=move.x2, y2=move.y2))
+
+
+def leave_game(player: Player, game: Game, db: Session):
+    remove_player_from_game(player, game, db)
+    game.players.remove(player)
+
+    for card in player.movement_cards + player.figure_cards:
+        db.delete(card)
+    for movement in partial_movements(player):
+        db.delete(movement)
+    player.blocked = False
+
+
+def save_game_state(game: Game, state: SwitcherState, events: list, db: Session):
+    """
+    Write the state the engine returned for the game, in a single commit.
+    The board cache follows the events once they are in the database.
+    """
+    players = {player.id: player for player in game.players}
+    claimed = any(isinstance(event, (FigureDiscarded, PlayerBlocked)) for event in events)
+
+    if claimed:
+        # The partial moves that formed the figure become final
+        for movement in partial_movements(players[state.player_in_turn.id]):
+            movement.final_movement = True
+
+    for event in events:
+        if isinstance(event, PlayerLeft):
+            leave_game(players.pop(event.player_id), game, db)
+
+    for index, seat in enumerate(state.players):
+        player = players[seat.id]
+        partial_moves = state.partial_moves if index == state.turn else ()
+        save_movement_cards(player, seat, partial_moves, db)
+        save_figure_cards(player, seat, db)
+        save_partial_movements(player, partial_moves, db)
+
+    game.player_turn = state.turn
+    game.forbidden_color = state.forbidden_color
+    if claimed and game_state_cache.shared:
+        # Other workers read the board from the database as soon as the action is committed
+        game.board.color_distribution = to_color_distribution(state.board)
+
+    commit_keeping_state(db)
+
+    for event in events:
+        if isinstance(event, MovementPlayed):
+            game_state_cache.add_move(game.id, event.movement.x1, event.movement.y1,
+                                      event.movement.x2, event.movement.y2)
+        elif isinstance(event, MovementUndone):
+            game_state_cache.undo_move(game.id)
+        elif isinstance(event, TurnFinished):
+            game_state_cache.clear_moves(game.id)
+        elif isinstance(event, PlayerLeft):
+            # The player in turn may have changed
+            game_state_cache.reset_moves(game.id)
+
+    if claimed:
+        # Once the movements are final in the database, the cache takes the board and saves it in the background
+        game_state_cache.commit_board(game.id, to_color_distribution(state.board))
+
+
+def save_new_game(game: Game, state: SwitcherState, db: Session):
+    """
+    First turn, hands, figure decks and board of a new game. Cards and board are inserted together,
+    in a single transaction, one INSERT per table.
+    """
+    game.status = state.status
+    game.player_turn = state.turn
+
+    deal_initial_movement_cards(db, game, [seat.movement_cards for seat in state.players])
+
+    initialize_figure_decks(game, db, [seat.figure_cards + seat.figure_deck for seat in state.players])
+
+    db.add(BoardModel(game.id, to_color_distribution(state.board)))
+    commit_keeping_state(db)
+
+    load_player_cards(game, db)
+
+
+def finish_game(game: Game, db: Session):
+    """The game was won: it's deleted with the cards of its players and forgotten by the caches"""
+    end_game(game, db)
+    forget_figure_detector(game.id)
+    forget_game_rng(game.id)
+    game_state_cache.evict(game.id)
+    finished_game = convert_game_to_schema(game)
+
+    db.commit()
+
+    publish_game_event(GAME_DELETED, finished_game)
+
+
+# Async variants, for the endpoints that use the AsyncSession
+save_game_state_async = async_service(save_game_state)
+finish_game_async = async_service(finish_game)
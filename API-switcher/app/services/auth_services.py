@@ -1,38 +1,47 @@
 from starlette.requests import Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.db import get_db
+from app.db.db import get_db, get_async_db, async_service
 from app.models.player_models import Player
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi import HTTPException, status
+from fastapi import Depends, HTTPException, status
 from typing import Optional
 
-async def verify_token_in_db(token: str, db: Session):
-    # query the db in search for the token
+def verify_token_in_db(token: str, db: Session) -> Player:
+    # query the db in search for the token (indexed column)
     user = db.query(Player).filter(Player.token == token).first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
     return user
 
+
+# Async variant, for the endpoints that use the AsyncSession
+verify_token_in_db_async = async_service(verify_token_in_db)
+
+
 class CustomHTTPBearer(HTTPBearer):
-    async def __call__(self, request: Request) -> Optional[Player]:
+    async def bearer_token(self, request: Request) -> str:
         # we call the base method to obtain the header
         credentials: HTTPAuthorizationCredentials = await super().__call__(request)
 
         if credentials:
-            scheme = credentials.scheme
-            token = credentials.credentials
-
             # verify that scheme is Bearer
-            if scheme.lower() != "bearer":
+            if credentials.scheme.lower() != "bearer":
                 raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid authentication scheme")
 
-            # open db session
-            db: Session = next(get_db())
-            
-            user = await verify_token_in_db(token, db)
+            return credentials.credentials
 
-            return user
-        
         # if no token or is it invalid, return None
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid authorization")
\ No newline at end of file
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid authorization")
+
+    async def __call__(self, request: Request, db: Session = Depends(get_db)) -> Optional[Player]:
+        # the session of the request, the endpoint gets the same player object
+        return verify_token_in_db(await self.bearer_token(request), db)
+
+
+class AsyncHTTPBearer(CustomHTTPBearer):
+    """The player of the token read with the AsyncSession of the request, for the endpoints that use it"""
+
+    async def __call__(self, request: Request, db: AsyncSession = Depends(get_async_db)) -> Optional[Player]:
+        return await verify_token_in_db_async(await self.bearer_token(request), db)
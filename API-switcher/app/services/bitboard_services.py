@@ -0,0 +1,215 @@
+from app.db.figure_table import BOARD_SIZE, FIGURE_TABLE, PLACEMENTS, FigurePlacement, Tile
+from app.db.enums import FigTypeAndDifficulty, Colors
+from typing import Dict, List, Tuple
+import logging
+
+# The 6x6 board is represented as a 36-bit integer per color.
+# Tile (x, y) is stored in bit x * BOARD_SIZE + y, so each row uses 6 consecutive bits.
+FULL_BOARD = (1 << BOARD_SIZE * BOARD_SIZE) - 1
+
+# Masks used to avoid wrapping around the board when shifting left/right
+FIRST_COLUMN = sum(1 << (x * BOARD_SIZE) for x in range(BOARD_SIZE))
+LAST_COLUMN = FIRST_COLUMN << (BOARD_SIZE - 1)
+
+
+def tile_bit(x: int, y: int) -> int:
+    return 1 << (x * BOARD_SIZE + y)
+
+
+def tiles_to_mask(tiles) -> int:
+    mask = 0
+    for x, y in tiles:
+        mask |= tile_bit(x, y)
+    return mask
+
+
+def neighbours_mask(mask: int) -> int:
+    """Return the tiles that are 4-adjacent to the mask, without the mask itself"""
+    spread = ((mask << BOARD_SIZE) | (mask >> BOARD_SIZE) |
+              ((mask << 1) & ~FIRST_COLUMN) | ((mask >> 1) & ~LAST_COLUMN))
+    return spread & FULL_BOARD & ~mask
+
+
+# Placement table as masks: (start bit, figure mask, neighbours mask, placement) for each figure type
+PLACEMENT_MASKS: Dict[FigTypeAndDifficulty, Tuple[Tuple[int, int, int, FigurePlacement], ...]] = {
+    fig: tuple((tile_bit(*placement.start), tiles_to_mask(placement.tile_set),
+                tiles_to_mask(placement.neighbours), placement) for placement in placements)
+    for fig, placements in FIGURE_TABLE.items()
+}
+
+# Every placement indexed by its mask, with its position in the table to keep the interpreter order
+FIGURE_MASKS: Dict[int, Tuple[int, FigurePlacement]] = {
+    tiles_to_mask(placement.tile_set): (order, placement) for order, placement in enumerate(PLACEMENTS)
+}
+
+# Every figure has 4 or 5 tiles, bigger or smaller groups of the same color can't be a figure
+FIGURE_SIZES = {mask.bit_count() for mask in FIGURE_MASKS}
+
+
+def board_to_masks(color_distribution: List[List[Colors]]) -> Dict[Colors, int]:
+    """Build one mask per color from the color distribution of the board"""
+    masks = {}
+    bit = 1
+    for row in color_distribution:
+        for color in row:
+            masks[color] = masks.get(color, 0) | bit
+            bit <<= 1
+    return masks
+
+
+def connected_group(seed: int, mask: int) -> int:
+    """Return the 4-connected group of tiles inside the mask that contains the seed"""
+    group = seed
+    while True:
+        grown = (group | neighbours_mask(group)) & mask
+        if grown == group:
+            return group
+        group = grown
+
+
+def connected_groups(mask: int):
+    """Yield the 4-connected groups of tiles inside the mask"""
+    while mask:
+        group = connected_group(mask & -mask, mask)
+        yield group
+        mask &= ~group
+
+
+def formed_placements(masks: Dict[Colors, int], f_color: Colors, region: int = FULL_BOARD) -> Dict[int, int]:
+    """
+    Return the placements formed in the board that overlap the region, as {mask: order}.
+    A figure is formed when a group of same colored tiles is exactly one of the precomputed placements,
+    that way the tiles share the color and the figure is isolated at the same time.
+    """
+    formed = {}
+    for color, mask in masks.items():
+        if color == f_color:
+            continue
+        pending = mask & region
+        while pending:
+            group = connected_group(pending & -pending, mask)
+            pending &= ~group
+            if group.bit_count() not in FIGURE_SIZES:
+                continue
+            placement = FIGURE_MASKS.get(group)
+            if placement:
+                formed[group] = placement[0]
+    return formed
+
+
+def find_figure(fig: FigTypeAndDifficulty, color_distribution: List[List[Colors]], f_color: Colors) -> List[Tile]:
+    """
+    Find every placement of one figure type formed in the board, checking the colors against the table:
+    all the tiles share the color of the start tile and none of the neighbours does.
+    """
+    found = []
+    masks = [mask for color, mask in board_to_masks(color_distribution).items() if color != f_color]
+    for start, figure, neighbours, placement in PLACEMENT_MASKS[fig]:
+        for mask in masks:
+            if mask & start:
+                if mask & figure == figure and not mask & neighbours:
+                    found.append(list(placement.tiles))
+                break
+    return found
+
+
+def find_figures(color_distribution: List[List[Colors]], f_color: Colors) -> List[Tuple[FigTypeAndDifficulty, List[Tile]]]:
+    """Find every figure formed in the board"""
+    formed = formed_placements(board_to_masks(color_distribution), f_color)
+    return placements_to_figures(formed.values())
+
+
+def placements_to_figures(orders) -> List[Tuple[FigTypeAndDifficulty, List[Tile]]]:
+    """Convert placement orders to (figure, tiles), sorted as the path interpreter finds them"""
+    return [(PLACEMENTS[order].fig, list(PLACEMENTS[order].tiles)) for order in sorted(orders)]
+
+
+class IncrementalFigureDetector:
+    """
+    Keeps the figures formed in a board and, when some tiles change (a swap changes two),
+    re-evaluates only the placements that overlap the changed tiles or their 4-neighbourhoods.
+    Any placement outside that region keeps its tiles and its neighbours, so it can't change.
+    In debug mode every incremental result is checked against a full scan.
+    """
+
+    # Beyond this amount of changed tiles a full scan is cheaper than tracking the region
+    MAX_CHANGED_TILES = 8
+
+    def __init__(self, debug: bool = False):
+        self.debug = debug
+        self.masks: Dict[Colors, int] | None = None
+        self.f_color: Colors | None = None
+        self.formed: Dict[int, int] = {}
+        self.full_scans = 0
+        self.incremental_scans = 0
+        self.mismatches = 0
+
+    def figures(self) -> List[Tuple[FigTypeAndDifficulty, List[Tile]]]:
+        return placements_to_figures(self.formed.values())
+
+    def rescan(self, color_distribution: List[List[Colors]], f_color: Colors) -> List[Tuple[FigTypeAndDifficulty, List[Tile]]]:
+        """Full-rescan fallback: forget the tracked figures and look for them in the whole board"""
+        self.masks = board_to_masks(color_distribution)
+        self.f_color = f_color
+        self.formed = formed_placements(self.masks, f_color)
+        self.full_scans += 1
+        return self.figures()
+
+    def load(self, masks: Dict[Colors, int], f_color: Colors, formed: Dict[int, int]) -> List[Tuple[FigTypeAndDifficulty, List[Tile]]]:
+        """Take the result of a full scan made somewhere else (e.g. in a worker of the scan pool)"""
+        self.masks = masks
+        self.f_color = f_color
+        self.formed = formed
+        self.full_scans += 1
+        return self.figures()
+
+    def changed_tiles(self, masks: Dict[Colors, int], f_color: Colors) -> int | None:
+        """Tiles that differ from the tracked board, None when only a full scan can bring the detector up to date"""
+        if self.masks is None or f_color != self.f_color or masks.keys() != self.masks.keys():
+            return None
+
+        changed = 0
+        for color, mask in masks.items():
+            changed |= mask ^ self.masks[color]
+
+        return None if changed.bit_count() > self.MAX_CHANGED_TILES else changed
+
+    def update(self, color_distribution: List[List[Colors]], f_color: Colors) -> List[Tuple[FigTypeAndDifficulty, List[Tile]]]:
+        """Bring the detector up to date with the board, re-evaluating only what changed since the last call"""
+        masks = board_to_masks(color_distribution)
+        changed = self.changed_tiles(masks, f_color)
+        if changed is None:
+            return self.rescan(color_distribution, f_color)
+        return self.apply(masks, changed)
+
+    def apply(self, masks: Dict[Colors, int], changed: int) -> List[Tuple[FigTypeAndDifficulty, List[Tile]]]:
+        self.masks = masks
+        return self._reevaluate(changed)
+
+    def swap(self, tile_1: Tile, tile_2: Tile) -> List[Tuple[FigTypeAndDifficulty, List[Tile]]]:
+        """Swap two tiles of the tracked board and re-evaluate the figures around them"""
+        bit_1, bit_2 = tile_bit(*tile_1), tile_bit(*tile_2)
+        for color, mask in self.masks.items():
+            if bool(mask & bit_1) != bool(mask & bit_2):
+                self.masks[color] = mask ^ (bit_1 | bit_2)
+        return self._reevaluate(bit_1 | bit_2)
+
+    def _reevaluate(self, changed: int) -> List[Tuple[FigTypeAndDifficulty, List[Tile]]]:
+        self.incremental_scans += 1
+        if changed:
+            region = changed | neighbours_mask(changed)
+            self.formed = {mask: order for mask, order in self.formed.items() if not mask & region}
+            self.formed.update(formed_placements(self.masks, self.f_color, region))
+
+        if self.debug:
+            self._verify()
+
+        return self.figures()
+
+    def _verify(self):
+        expected = formed_placements(self.masks, self.f_color)
+        if expected != self.formed:
+            self.mismatches += 1
+            logging.error("Incremental figure detection differs from full scan: %s != %s",
+                          sorted(self.formed.values()), sorted(expected.values()))
+            self.formed = expected
@@ -0,0 +1,200 @@
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, NamedTuple
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+import uuid
+
+# Where the broadcasts go: "memory" (the sockets of this process) or "sqlite" (every worker sharing the file)
+BROADCAST_BACKEND = os.getenv("BROADCAST_BACKEND", "memory")
+BROADCAST_SQLITE_PATH = os.getenv("BROADCAST_SQLITE_PATH", "./broadcast.db")
+# Seconds between two reads of the log
+BROADCAST_POLL_INTERVAL = float(os.getenv("BROADCAST_POLL_INTERVAL", "0.01"))
+# Seconds a frame stays in the log, a worker further behind than this misses it
+BROADCAST_RETENTION = float(os.getenv("BROADCAST_RETENTION", "60"))
+
+LOBBY_CHANNEL = "lobby"
+
+# Connections of a game channel a frame goes to
+TARGET_ALL = "all"
+TARGET_FULL = "full"  # clients of the full protocol
+TARGET_DELTA = "delta"  # clients of the delta protocol
+
+
+def game_channel(game_id: int) -> str:
+    return f"game:{game_id}"
+
+
+def channel_game_id(channel: str) -> int | None:
+    prefix, _, game_id = channel.partition(":")
+    return int(game_id) if prefix == "game" else None
+
+
+class Broadcast(NamedTuple):
+    channel: str
+    target: str
+    # The message already serialized, as the sockets get it
+    frame: str
+    # Part of the state the frame carries whole, see ConnectionManager.broadcast
+    snapshot: str | None
+    # Backend that published it, one per process
+    origin: str
+
+
+class BroadcastBackend(ABC):
+    """
+    Carries the frames of the broadcasts to every process serving WebSockets, the publisher included.
+    The handler of each process gets the frames of a channel in the order they were published.
+    """
+
+    def __init__(self):
+        self.origin = uuid.uuid4().hex
+        self.handler: Callable[[Broadcast], None] | None = None
+
+    def subscribe(self, handler: Callable[[Broadcast], None]):
+        self.handler = handler
+
+    def is_remote(self, broadcast: Broadcast) -> bool:
+        return broadcast.origin != self.origin
+
+    @abstractmethod
+    async def publish(self, channel: str, target: str, frame: str, snapshot: str | None = None):
+        """Send the frame to the handler of every process, this one included"""
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def _deliver(self, broadcast: Broadcast):
+        if self.handler is None:
+            return
+        try:
+            self.handler(broadcast)
+        except Exception:
+            logging.exception("Error entregando una difusion del canal %s", broadcast.channel)
+
+
+class InMemoryBroadcastBackend(BroadcastBackend):
+    """A single worker: the frame goes straight to the handler"""
+
+    async def publish(self, channel: str, target: str, frame: str, snapshot: str | None = None):
+        self._deliver(Broadcast(channel, target, frame, snapshot, self.origin))
+
+
+class SQLiteBroadcastBackend(BroadcastBackend):
+    """
+    Log of frames in a SQLite file shared by the workers of one host.
+    Publishing appends a row, and every worker (the publisher too) reads the rows after the last one it delivered.
+    SQLite commits one writer at a time, so the ids follow the order of the publications and every process
+    delivers the frames of a game in the same order. Publishers delete the rows older than `retention` seconds.
+    The statements wait for the lock of the file when another worker is writing, so they run in a thread of their own,
+    one per worker: it keeps the publications of this worker in order and the loop only delivers the rows read.
+    """
+
+    def __init__(self, path: str = BROADCAST_SQLITE_PATH, poll_interval: float = BROADCAST_POLL_INTERVAL,
+                 retention: float = BROADCAST_RETENTION):
+        super().__init__()
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.connection: sqlite3.Connection | None = None
+        self.executor: ThreadPoolExecutor | None = None
+        self.last_id = 0
+        self.last_prune = 0.0
+        self.poller: asyncio.Task | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS broadcast ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT NOT NULL, target TEXT NOT NULL, "
+                "frame TEXT NOT NULL, snapshot TEXT, origin TEXT NOT NULL, created REAL NOT NULL)")
+            self.connection = connection
+        return self.connection
+
+    async def _run(self, fn: Callable, *args):
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="broadcast")
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def _last_id(self) -> int:
+        return self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM broadcast").fetchone()[0]
+
+    def _insert(self, channel: str, target: str, frame: str, snapshot: str | None):
+        now = time.time()
+        connection = self._connect()
+        connection.execute("INSERT INTO broadcast (channel, target, frame, snapshot, origin, created) "
+                           "VALUES (?, ?, ?, ?, ?, ?)", (channel, target, frame, snapshot, self.origin, now))
+        if now - self.last_prune >= self.retention:
+            connection.execute("DELETE FROM broadcast WHERE created < ?", (now - self.retention,))
+            self.last_prune = now
+
+    def _fetch(self, last_id: int) -> list:
+        return self._connect().execute(
+            "SELECT id, channel, target, frame, snapshot, origin FROM broadcast WHERE id > ? ORDER BY id",
+            (last_id,)).fetchall()
+
+    def _close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    async def start(self):
+        # Only the frames published from now on
+        self.last_id = await self._run(self._last_id)
+        if self.poller is None:
+            self.poller = asyncio.create_task(self._poll_forever())
+
+    async def stop(self):
+        if self.poller is not None:
+            self.poller.cancel()
+            self.poller = None
+        if self.executor is not None:
+            # Closed by its thread, once the statement it may be running ends
+            await self._run(self._close)
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        self._close()
+
+    async def publish(self, channel: str, target: str, frame: str, snapshot: str | None = None):
+        await self._run(self._insert, channel, target, frame, snapshot)
+
+    async def poll(self) -> int:
+        """Deliver the frames published since the last poll, returns how many"""
+        delivered = 0
+        for row_id, *broadcast in await self._run(self._fetch, self.last_id):
+            if row_id <= self.last_id:
+                # Delivered by a poll that ended while this one was reading
+                continue
+            self.last_id = row_id
+            self._deliver(Broadcast(*broadcast))
+            delivered += 1
+        return delivered
+
+    async def _poll_forever(self):
+        # start() just read the last id, the first poll waits an interval
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll()
+            except sqlite3.Error:
+                logging.exception("Error leyendo las difusiones de %s", self.path)
+
+
+def create_broadcast_backend(kind: str = BROADCAST_BACKEND) -> BroadcastBackend:
+    if kind == "memory":
+        return InMemoryBroadcastBackend()
+    if kind == "sqlite":
+        return SQLiteBroadcastBackend()
+    raise ValueError(f"Unknown broadcast backend {kind}")
+
+
+broadcast_backend = create_broadcast_backend()
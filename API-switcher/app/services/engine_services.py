@@ -0,0 +1,14 @@
+from app.engine.state import IllegalAction, INVALID, FORBIDDEN, NOT_FOUND, PRECONDITION_FAILED
+from fastapi import HTTPException, status
+
+# HTTP status of each reason the engine gives to reject an action
+ACTION_ERROR_STATUS = {
+    INVALID: status.HTTP_400_BAD_REQUEST,
+    FORBIDDEN: status.HTTP_403_FORBIDDEN,
+    NOT_FOUND: status.HTTP_404_NOT_FOUND,
+    PRECONDITION_FAILED: status.HTTP_412_PRECONDITION_FAILED,
+}
+
+
+def to_http_exception(error: IllegalAction) -> HTTPException:
+    return HTTPException(status_code=ACTION_ERROR_STATUS[error.reason], detail=error.detail)
@@ -0,0 +1,79 @@
+from app.models.game_models import Game
+from app.schemas.game_schemas import GameSchemaOut
+from app.services.game_services import convert_game_to_schema
+from typing import Awaitable, Callable, Dict, List, NamedTuple
+import asyncio
+import logging
+
+# Domain events, published by the endpoints once their changes are committed
+GAME_CREATED = "game created"
+PLAYER_JOINED = "player joined"
+PLAYER_LEFT = "player left"
+GAME_STATUS_CHANGED = "game status changed"
+GAME_UPDATED = "game updated"
+GAME_DELETED = "game deleted"
+GAME_EVENTS = (GAME_CREATED, PLAYER_JOINED, PLAYER_LEFT, GAME_STATUS_CHANGED, GAME_UPDATED, GAME_DELETED)
+
+
+class GameEvent(NamedTuple):
+    type: str
+    game_id: int
+    game: GameSchemaOut     # snapshot taken when the event is published, no orm object travels with it
+
+
+Handler = Callable[[GameEvent], Awaitable[None]]
+
+
+class EventBus:
+    """
+    In-process publish/subscribe on the server's event loop.
+    Events are delivered in the order they were published by a single worker task,
+    a failing subscriber is logged and doesn't stop the others.
+    """
+
+    def __init__(self):
+        self.subscribers: Dict[str, List[Handler]] = {}
+        self.queue: asyncio.Queue | None = None
+        self.worker: asyncio.Task | None = None
+
+    def subscribe(self, event_type: str, handler: Handler):
+        self.subscribers.setdefault(event_type, []).append(handler)
+
+    def publish(self, event: GameEvent):
+        if not self.subscribers.get(event.type):
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logging.warning("Evento %s publicado fuera del event loop, se descarta", event.type)
+            return
+        if self.worker is None or self.worker.get_loop() is not loop:
+            self.queue = asyncio.Queue()
+            self.worker = None
+        if self.worker is None or self.worker.done():
+            self.worker = loop.create_task(self._deliver_events(self.queue))
+        self.queue.put_nowait(event)
+
+    async def _deliver_events(self, queue: asyncio.Queue):
+        # The worker stops once the queue is empty, the next publish starts a new one
+        while not queue.empty():
+            event = queue.get_nowait()
+            for handler in self.subscribers.get(event.type, []):
+                try:
+                    await handler(event)
+                except Exception:
+                    logging.exception("Error entregando el evento %s de la partida %s", event.type, event.game_id)
+            queue.task_done()
+
+    async def drain(self):
+        """Wait until every published event has been delivered"""
+        if self.queue is not None and self.worker is not None and not self.worker.done():
+            await self.queue.join()
+
+
+event_bus = EventBus()
+
+
+def publish_game_event(event_type: str, game: Game | GameSchemaOut):
+    game_schema = game if isinstance(game, GameSchemaOut) else convert_game_to_schema(game)
+    event_bus.publish(GameEvent(type=event_type, game_id=game_schema.id, game=game_schema))
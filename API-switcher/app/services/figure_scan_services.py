@@ -0,0 +1,93 @@
+from app.db.board_encoding import decode_board_colors
+from app.db.enums import Colors
+from app.services.bitboard_services import board_to_masks, formed_placements
+from app.services.metrics_services import LatencyMetric
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict
+import asyncio
+import os
+import time
+
+# Where the full figure scans run: "thread", "process" or "inline" (on the event loop)
+FIGURE_SCAN_EXECUTOR = os.getenv("FIGURE_SCAN_EXECUTOR", "thread")
+FIGURE_SCAN_WORKERS = int(os.getenv("FIGURE_SCAN_WORKERS", "2"))
+# Scans waiting for a worker, beyond this the callers wait before submitting theirs
+FIGURE_SCAN_QUEUE_SIZE = int(os.getenv("FIGURE_SCAN_QUEUE_SIZE", "32"))
+
+
+def scan_board(tiles: str, forbidden_color: str) -> Dict[int, int]:
+    """
+    Full figure scan of a compact board (see board_encoding), run by the workers.
+    Only strings go in and only ints come out (figure mask -> placement order), cheap to send to another process.
+    """
+    return formed_placements(board_to_masks(decode_board_colors(tiles)), Colors(forbidden_color))
+
+
+class FigureScanPool:
+    """
+    Runs the full figure scans out of the event loop, in a thread or process pool.
+    At most workers + queue_size scans are submitted at once, the next callers wait their turn.
+    The latency goes from the call to the result, waiting included.
+    """
+
+    def __init__(self, kind: str = FIGURE_SCAN_EXECUTOR, workers: int = FIGURE_SCAN_WORKERS,
+                 queue_size: int = FIGURE_SCAN_QUEUE_SIZE):
+        if kind not in ("thread", "process", "inline"):
+            raise ValueError(f"Unknown figure scan executor {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.queue_size = queue_size
+        self.executor: Executor | None = None
+        self.slots: asyncio.Semaphore | None = None
+        self.slots_loop: asyncio.AbstractEventLoop | None = None
+        self.in_flight = 0
+        self.waiting = 0
+        self.latency = LatencyMetric()
+
+    def _executor(self) -> Executor:
+        if self.executor is None:
+            executor_class = ProcessPoolExecutor if self.kind == "process" else ThreadPoolExecutor
+            self.executor = executor_class(max_workers=self.workers)
+        return self.executor
+
+    def _slots(self) -> asyncio.Semaphore:
+        # A semaphore belongs to the loop it's first used in
+        loop = asyncio.get_running_loop()
+        if self.slots is None or self.slots_loop is not loop:
+            self.slots = asyncio.Semaphore(self.workers + self.queue_size)
+            self.slots_loop = loop
+        return self.slots
+
+    async def scan(self, tiles: str, forbidden_color: str) -> Dict[int, int]:
+        start = time.perf_counter()
+        slots = self._slots()
+        self.waiting += 1
+        try:
+            await slots.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        try:
+            if self.kind == "inline":
+                formed = scan_board(tiles, forbidden_color)
+            else:
+                formed = await asyncio.get_running_loop().run_in_executor(
+                    self._executor(), scan_board, tiles, forbidden_color)
+        finally:
+            self.in_flight -= 1
+            slots.release()
+            self.latency.observe(time.perf_counter() - start)
+        return formed
+
+    def stats(self) -> dict:
+        return {"executor": self.kind, "workers": self.workers, "queue_size": self.queue_size,
+                "in_flight": self.in_flight, "waiting": self.waiting, "latency": self.latency.stats()}
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+
+figure_scan_pool = FigureScanPool()
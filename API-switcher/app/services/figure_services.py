@@ -1,6 +1,4 @@
-from app.db.constants import VALID_PATHS
 from app.db.constants import Movement
-from app.db.enums import FigTypeAndDifficulty
 from app.models.game_models import Game
 from app.schemas.movement_schema import Coordinate
 from typing import List
@@ -8,7 +6,21 @@ from app.schemas.board_schemas import BoardSchemaOut
 from app.services.game_services import calculate_partial_board
 from app.schemas.figure_schema import FigureInBoardSchema
 from app.db.enums import Colors
+from app.db.enums import FigTypeAndDifficulty
+from app.services.bitboard_services import find_figure, board_to_masks, IncrementalFigureDetector
+from app.services.figure_scan_services import figure_scan_pool
+from app.services.metrics_services import FIGURE_SCAN_SECONDS
+from app.db.board_encoding import encode_board
+import asyncio
 import logging
+import os
+import time
+
+# Check every incremental figure detection against a full scan of the board
+FIGURE_DETECTION_DEBUG = os.getenv("FIGURE_DETECTION_DEBUG", "0") == "1"
+
+# Figures formed in the board of each game, kept up to date incrementally
+figure_detectors: dict[int, IncrementalFigureDetector] = {}
 
 def is_figure_isolated(tiles:List[Coordinate], board:BoardSchemaOut) -> bool:
     """Check if a figure is isolated. i.e if the adyacent tiles don't share the same color"""
@@ -69,34 +81,73 @@ def get_figure_in_board(figure_type:tuple, board: BoardSchemaOut, f_color: Color
     """
     Get all figures of a certain type in the board. If the list is empty, the figure is not in the board.
     """
-    figures = []
-    possible_paths = VALID_PATHS[figure_type[0]]
-    for path in possible_paths:
-        for x in range(6):
-            for y in range(6):
-                valid_fig = get_path_valid(path=path, board=board, start=Coordinate(x=x, y=y), f_color=f_color)
-                if valid_fig and is_figure_isolated(valid_fig, board):
-                    figures.append(FigureInBoardSchema(fig=figure_type, tiles=valid_fig))
-    return figures
+    fig = FigTypeAndDifficulty(figure_type)
+    return [FigureInBoardSchema(fig=fig, tiles=[Coordinate(x=x, y=y) for x, y in tiles])
+            for tiles in find_figure(fig, board.color_distribution, f_color)]
+
+
+def get_figure_detector(game_id: int) -> IncrementalFigureDetector:
+    """Get the incremental figure detector of a game, creating it if needed."""
+    detector = figure_detectors.get(game_id)
+    if not detector:
+        detector = IncrementalFigureDetector(debug=FIGURE_DETECTION_DEBUG)
+        figure_detectors[game_id] = detector
+    return detector
+
+
+def forget_figure_detector(game_id: int):
+    figure_detectors.pop(game_id, None)
 
 
 def get_all_figures_in_board(game: Game) -> List[FigureInBoardSchema]:
     """
-    Get all the figures that are in player's hands.
+    Get all the figures formed in the board.
+    Only the tiles changed since the last call are re-evaluated (e.g. the two tiles of a partial movement).
+    """
+    board = calculate_partial_board(game)
+    detector = get_figure_detector(game.id)
+
+    start, full_scans = time.perf_counter(), detector.full_scans
+    figures = detector.update(board.color_distribution, game.forbidden_color)
+    FIGURE_SCAN_SECONDS.labels("full" if detector.full_scans != full_scans else "incremental").observe(
+        time.perf_counter() - start)
+
+    return figures_to_schema(figures)
+
+
+def figures_to_schema(figures) -> List[FigureInBoardSchema]:
+    return [FigureInBoardSchema(fig=fig, tiles=[Coordinate(x=x, y=y) for x, y in tiles]) for fig, tiles in figures]
+
+
+def request_figures_in_board(game: Game) -> List[FigureInBoardSchema] | asyncio.Task:
+    """
+    Same as get_all_figures_in_board, but a full scan (new game, new forbidden color, many changed tiles)
+    goes to the figure scan pool and a task with the result is returned instead.
+    The board is read right away, the task doesn't touch the game.
     """
     board = calculate_partial_board(game)
-    # figures = []
-    all_figures = []
-
-    # for player in game.players:
-    #     for card in player.figure_cards:
-    #         if card.type_and_difficulty not in figures:
-    #             figures.append(card.type_and_difficulty)
-    
-    for fig in FigTypeAndDifficulty:
-        fig_in_board = get_figure_in_board(figure_type=fig.value, board=board, f_color=game.forbidden_color)
-        if fig_in_board:
-            all_figures.extend(fig_in_board)
-
-    return all_figures
+    detector = get_figure_detector(game.id)
+    start = time.perf_counter()
+    masks = board_to_masks(board.color_distribution)
+    changed = detector.changed_tiles(masks, game.forbidden_color)
+    if changed is not None:
+        figures = detector.apply(masks, changed)
+        FIGURE_SCAN_SECONDS.labels("incremental").observe(time.perf_counter() - start)
+        return figures_to_schema(figures)
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        figures = detector.rescan(board.color_distribution, game.forbidden_color)
+        FIGURE_SCAN_SECONDS.labels("full").observe(time.perf_counter() - start)
+        return figures_to_schema(figures)
+    return loop.create_task(scan_figures_in_pool(detector, masks, game.forbidden_color,
+                                                 encode_board(board.color_distribution)))
+
+
+async def scan_figures_in_pool(detector: IncrementalFigureDetector, masks, f_color: Colors, tiles: str) -> List[FigureInBoardSchema]:
+    start = time.perf_counter()
+    formed = await figure_scan_pool.scan(tiles, f_color.value)
+    FIGURE_SCAN_SECONDS.labels("pool").observe(time.perf_counter() - start)
+    return figures_to_schema(detector.load(masks, f_color, formed))
 
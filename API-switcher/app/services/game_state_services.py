@@ -0,0 +1,243 @@
+from app.db.board_encoding import encode_board, decode_board_colors
+from app.db.db import SessionLocal
+from app.db.enums import Colors
+from app.models.board_models import Board
+from app.models.game_models import Game
+from app.services.broadcast_services import BROADCAST_BACKEND
+from app.schemas.board_schemas import BoardSchemaOut
+from app.services.metrics_services import BOARD_FLUSH_ERRORS
+from typing import Dict, List, Tuple
+import asyncio
+import logging
+import os
+
+Swap = Tuple[int, int, int, int]
+
+# Times a failed write of a board is retried before giving up until the board changes again
+BOARD_FLUSH_RETRIES = int(os.getenv("BOARD_FLUSH_RETRIES", "5"))
+# Seconds before the first retry, doubled after each one
+BOARD_FLUSH_BACKOFF = float(os.getenv("BOARD_FLUSH_BACKOFF", "0.1"))
+# Workers sharing the games (see BROADCAST_BACKEND): the next action on a game may reach another worker,
+# so nothing is kept between requests and a changed board is saved by the action that changed it
+GAME_STATE_SHARED = BROADCAST_BACKEND != "memory"
+
+
+def encode_tiles(color_distribution: List[List[Colors | str]]) -> Tuple[bytearray, int]:
+    """Return the board as a compact array, one byte per tile with the code of its color, and the length of its rows"""
+    width = len(color_distribution[0]) if color_distribution else 0
+    return bytearray(encode_board(color_distribution), "ascii"), width
+
+
+def decode_tiles(tiles: bytearray, width: int) -> List[List[Colors]]:
+    return decode_board_colors(tiles.decode("ascii"), width)
+
+
+class GameState:
+    """
+    Board state of one game.
+    `committed` is the board of the game (the one in the board table once flushed) and
+    `partial` is that board with the partial movements of the player in turn applied.
+    The partial board is built lazily, since reading the movements needs the players of the game.
+    """
+
+    def __init__(self, committed: bytearray, width: int):
+        self.committed = committed
+        self.width = width
+        self.partial: bytearray | None = None
+        self.moves: List[Swap] | None = None
+        self.version = 0
+        self.flushed_version = 0
+
+    @property
+    def dirty(self) -> bool:
+        return self.version != self.flushed_version
+
+    def swap(self, x1: int, y1: int, x2: int, y2: int):
+        i, j = x1 * self.width + y1, x2 * self.width + y2
+        self.partial[i], self.partial[j] = self.partial[j], self.partial[i]
+
+
+class GameStateCache:
+    """
+    In-process cache of the board state of each game, keyed by game id.
+    Entries are loaded from the database on the first read and then updated in place by the endpoints,
+    updates on a game that is not cached are ignored (the next read loads it already updated).
+    Changes to the committed board are written back to the board table asynchronously, a failed write is retried
+    with a growing delay up to `flush_retries` times.
+    A `shared` cache keeps nothing: every read is built from the game it gets, and the board is saved by the caller.
+    """
+
+    def __init__(self, session_factory=SessionLocal, flush_retries: int = BOARD_FLUSH_RETRIES,
+                 flush_backoff: float = BOARD_FLUSH_BACKOFF, shared: bool = GAME_STATE_SHARED):
+        self.session_factory = session_factory
+        self.shared = shared
+        self.flush_retries = flush_retries
+        self.flush_backoff = flush_backoff
+        self.states: Dict[int, GameState] = {}
+        self.pending_flushes: Dict[int, asyncio.Task] = {}
+        # Games forgotten as soon as their board is saved
+        self.releasing: set[int] = set()
+
+    def clear(self):
+        self.states.clear()
+        self.pending_flushes.clear()
+        self.releasing.clear()
+
+    # Reads
+
+    def _get_state(self, game: Game) -> GameState:
+        state = self.states.get(game.id)
+        if not state:
+            committed, width = encode_tiles(game.board.color_distribution)
+            state = GameState(committed, width)
+            if not self.shared:
+                self.states[game.id] = state
+        return state
+
+    def _get_partial_state(self, game: Game) -> GameState:
+        state = self._get_state(game)
+        if state.partial is None:
+            actual_player = game.players[game.player_turn]
+            partial_movs = sorted([mov for mov in actual_player.movements if not mov.final_movement],
+                                  key=lambda mov: mov.id)
+            state.partial = state.committed[:]
+            state.moves = []
+            for mov in partial_movs:
+                state.moves.append((mov.x1, mov.y1, mov.x2, mov.y2))
+                state.swap(mov.x1, mov.y1, mov.x2, mov.y2)
+        return state
+
+    def get_board(self, game: Game) -> BoardSchemaOut:
+        state = self._get_state(game)
+        return BoardSchemaOut.model_construct(color_distribution=decode_tiles(state.committed, state.width))
+
+    def get_partial_board(self, game: Game) -> BoardSchemaOut:
+        state = self._get_partial_state(game)
+        return BoardSchemaOut.model_construct(color_distribution=decode_tiles(state.partial, state.width))
+
+    def get_partial_moves(self, game: Game) -> List[Swap]:
+        return list(self._get_partial_state(game).moves)
+
+    # Updates
+
+    def add_move(self, game_id: int, x1: int, y1: int, x2: int, y2: int):
+        state = self.states.get(game_id)
+        if state and state.partial is not None:
+            state.moves.append((x1, y1, x2, y2))
+            state.swap(x1, y1, x2, y2)
+
+    def undo_move(self, game_id: int):
+        state = self.states.get(game_id)
+        if state and state.partial is not None and state.moves:
+            state.swap(*state.moves.pop())
+
+    def clear_moves(self, game_id: int):
+        """The partial movements were discarded, the partial board is the committed one again"""
+        state = self.states.get(game_id)
+        if state:
+            state.partial = state.committed[:]
+            state.moves = []
+
+    def reset_moves(self, game_id: int):
+        """Forget the partial movements, they are read again from the database when needed"""
+        state = self.states.get(game_id)
+        if state:
+            state.partial = None
+            state.moves = None
+
+    def commit_board(self, game_id: int, color_distribution: List[List[Colors | str]]):
+        """Set the board of the game, its partial movements become final. It's flushed to the database later."""
+        if self.shared:
+            return
+        committed, width = encode_tiles(color_distribution)
+        state = self.states.get(game_id)
+        if state:
+            state.committed, state.width = committed, width
+        else:
+            state = GameState(committed, width)
+            self.states[game_id] = state
+        state.partial = committed[:]
+        state.moves = []
+        state.version += 1
+        self.schedule_flush(game_id)
+
+    def evict(self, game_id: int):
+        self.states.pop(game_id, None)
+        self.releasing.discard(game_id)
+
+    def release(self, game_id: int):
+        """Forget a game nobody is using, a board not saved yet is kept until its write succeeds"""
+        state = self.states.get(game_id)
+        if state is None:
+            return
+        if not state.dirty and game_id not in self.pending_flushes:
+            self.evict(game_id)
+            return
+        self.releasing.add(game_id)
+        self.schedule_flush(game_id)
+        # Without a running loop the board was written right away
+        if game_id not in self.pending_flushes and not state.dirty:
+            self.evict(game_id)
+
+    # Write-behind
+
+    def schedule_flush(self, game_id: int):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush(game_id)
+            return
+        if game_id not in self.pending_flushes:
+            self.pending_flushes[game_id] = loop.create_task(self._flush_later(game_id))
+
+    async def _flush_later(self, game_id: int):
+        delay = self.flush_backoff
+        try:
+            for attempt in range(self.flush_retries + 1):
+                if await asyncio.to_thread(self.flush, game_id):
+                    break
+                if attempt == self.flush_retries:
+                    # The board stays dirty, the next change of the game or the shutdown try again
+                    BOARD_FLUSH_ERRORS.labels("gave up").inc()
+                    logging.error("El tablero de la partida %s no se pudo guardar tras %s reintentos",
+                                  game_id, self.flush_retries)
+                    return
+                BOARD_FLUSH_ERRORS.labels("retried").inc()
+                await asyncio.sleep(delay)
+                delay *= 2
+        finally:
+            self.pending_flushes.pop(game_id, None)
+        # The board may have changed again while we were writing it
+        state = self.states.get(game_id)
+        if state and state.dirty:
+            self.schedule_flush(game_id)
+        elif game_id in self.releasing:
+            self.evict(game_id)
+
+    def flush(self, game_id: int) -> bool:
+        """Write the committed board of the game to the board table, returns False when the write failed"""
+        state = self.states.get(game_id)
+        if not state or not state.dirty:
+            return True
+        version = state.version
+        # The compact array is already the encoding of the board column
+        color_distribution = state.committed.decode("ascii")
+        db = self.session_factory()
+        try:
+            db.query(Board).filter(Board.game_id == game_id).update({Board.color_distribution: color_distribution})
+            db.commit()
+            state.flushed_version = version
+            return True
+        except Exception:
+            db.rollback()
+            logging.exception("Error guardando el tablero de la partida %s", game_id)
+            return False
+        finally:
+            db.close()
+
+    def flush_all(self):
+        for game_id in list(self.states):
+            self.flush(game_id)
+
+
+game_state_cache = GameStateCache()
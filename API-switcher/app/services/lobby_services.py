@@ -0,0 +1,137 @@
+from app.db.db import SessionLocal
+from app.db.enums import GameStatus
+from app.models.game_models import Game
+from app.models.player_models import Player
+from app.schemas.game_schemas import GameSchemaOut, LobbyGameSchema, LobbyPageSchema
+from app.services.event_services import event_bus, GameEvent, GAME_EVENTS, GAME_DELETED
+from app.services.metrics_services import metrics_registry
+from bisect import bisect_left, insort
+from sqlalchemy import func
+from typing import Dict, List, Optional, Tuple
+
+LOBBY_PAGE_SIZE = 50
+
+
+def game_to_lobby_row(game: GameSchemaOut) -> LobbyGameSchema:
+    return LobbyGameSchema(id=game.id, name=game.name, player_count=len(game.players),
+                           player_amount=game.player_amount, status=game.status, host_id=game.host_id)
+
+
+class LobbyIndex:
+    """
+    In-memory index of the lobby rows, loaded once from the database and then kept up to date with the game events.
+    Pages go from the newest game to the oldest one, the cursor is the id of the last game of the previous page.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.clear()
+
+    def clear(self):
+        self.loaded = False
+        self.rows: Dict[int, LobbyGameSchema] = {}
+        # Sorted ids, all of them and by status
+        self.ids: List[int] = []
+        self.ids_by_status: Dict[GameStatus, List[int]] = {game_status: [] for game_status in GameStatus}
+        # Sorted (lowercase name, id), for the name prefix search
+        self.names: List[Tuple[str, int]] = []
+
+    def load(self):
+        db = self.session_factory()
+        try:
+            player_count = (db.query(Player.game_id, func.count(Player.id).label("player_count"))
+                            .group_by(Player.game_id).subquery())
+            games = (db.query(Game.id, Game.name, Game.player_amount, Game.status, Game.host_id,
+                              func.coalesce(player_count.c.player_count, 0))
+                     .outerjoin(player_count, player_count.c.game_id == Game.id).all())
+        finally:
+            db.close()
+
+        self.clear()
+        for game_id, name, player_amount, game_status, host_id, count in games:
+            self._insert(LobbyGameSchema(id=game_id, name=name, player_count=count, player_amount=player_amount,
+                                         status=game_status or GameStatus.waiting, host_id=host_id))
+        self.loaded = True
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    def _insert(self, row: LobbyGameSchema):
+        self.rows[row.id] = row
+        insort(self.ids, row.id)
+        insort(self.ids_by_status[row.status], row.id)
+        insort(self.names, (row.name.lower(), row.id))
+
+    def _remove(self, game_id: int):
+        row = self.rows.pop(game_id, None)
+        if not row:
+            return
+        for ids, key in ((self.ids, game_id), (self.ids_by_status[row.status], game_id),
+                         (self.names, (row.name.lower(), game_id))):
+            del ids[bisect_left(ids, key)]
+
+    def upsert(self, row: LobbyGameSchema):
+        self._remove(row.id)
+        self._insert(row)
+
+    def remove(self, game_id: int):
+        self._remove(game_id)
+
+    def apply_event(self, event: GameEvent):
+        # Until the index is loaded the database already has every change
+        if not self.loaded:
+            return
+        if event.type == GAME_DELETED:
+            self.remove(event.game_id)
+        else:
+            self.upsert(game_to_lobby_row(event.game))
+
+    def page(self, status: Optional[GameStatus] = None, name_prefix: Optional[str] = None,
+             cursor: Optional[int] = None, limit: int = LOBBY_PAGE_SIZE) -> LobbyPageSchema:
+        self.ensure_loaded()
+        if name_prefix:
+            prefix = name_prefix.lower()
+            candidates = []
+            for name, game_id in self.names[bisect_left(self.names, (prefix,)):]:
+                if not name.startswith(prefix):
+                    break
+                candidates.append(game_id)
+            candidates.sort()
+        elif status:
+            candidates = self.ids_by_status[status]
+        else:
+            candidates = self.ids
+
+        end = bisect_left(candidates, cursor) if cursor is not None else len(candidates)
+        games = []
+        for i in range(end - 1, -1, -1):
+            row = self.rows[candidates[i]]
+            if status is None or row.status == status:
+                games.append(row)
+                if len(games) > limit:
+                    break
+
+        next_cursor = games[limit - 1].id if len(games) > limit else None
+        return LobbyPageSchema(games=games[:limit], next_cursor=next_cursor)
+
+
+lobby_index = LobbyIndex()
+
+
+async def update_lobby_index(event: GameEvent):
+    lobby_index.apply_event(event)
+
+
+for event_type in GAME_EVENTS:
+    event_bus.subscribe(event_type, update_lobby_index)
+
+
+def games_by_status() -> dict:
+    """Games of the lobby by status, nothing until the index is loaded (a scrape doesn't read the database)"""
+    if not lobby_index.loaded:
+        return {}
+    return {(game_status.value,): len(ids) for game_status, ids in lobby_index.ids_by_status.items()}
+
+
+metrics_registry.gauge("games", "Games in the lobby, by status", ("status",), collect=games_by_status)
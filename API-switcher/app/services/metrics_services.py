@@ -0,0 +1,230 @@
+from app.db.db import count_statements
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Tuple
+import time
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+# Content type of the Prometheus text format
+METRICS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class LatencyMetric:
+    """Count, sum, max and cumulative buckets of the observed durations, in seconds"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+
+    def stats(self) -> dict:
+        return {"count": self.count, "sum": self.total, "max": self.max,
+                "avg": self.total / self.count if self.count else 0.0,
+                "buckets": dict(zip(self.buckets, self.bucket_counts))}
+
+
+class CounterValue:
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+
+class Metric(ABC):
+    """
+    A metric family: one child per combination of label values, created on first use.
+    Children are plain objects updated in place, there is no lock (the app runs on one event loop).
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        self.children: Dict[Tuple[str, ...], object] = {}
+
+    @abstractmethod
+    def new_child(self):
+        """Child of one combination of label values"""
+
+    def labels(self, *values) -> object:
+        key = tuple(str(value) for value in values)
+        child = self.children.get(key)
+        if child is None:
+            child = self.children[key] = self.new_child()
+        return child
+
+    @abstractmethod
+    def samples(self) -> Iterable[Tuple[str, Tuple[str, ...], Tuple[str, ...], float]]:
+        """(suffix, label names, label values, value) of every child"""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, names, values, value in self.samples():
+            labels = ",".join(f'{name}="{escape_label(label)}"' for name, label in zip(names, values))
+            lines.append(f"{self.name}{suffix}{{{labels}}} {format_value(value)}" if labels
+                         else f"{self.name}{suffix} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def new_child(self):
+        return CounterValue()
+
+    def samples(self):
+        for values, child in list(self.children.items()):
+            yield "_total", self.label_names, values, child.value
+
+
+class Gauge(Metric):
+    """A gauge read when the metrics are collected, `collect` returns {label values: value}"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                 collect: Callable[[], Dict[Tuple, float]] | None = None):
+        super().__init__(name, help, labels)
+        self.collect = collect
+
+    def new_child(self):
+        return CounterValue()
+
+    def samples(self):
+        if self.collect:
+            values = self.collect().items()
+        else:
+            values = ((key, child.value) for key, child in list(self.children.items()))
+        for key, value in values:
+            yield "", self.label_names, tuple(str(label) for label in key), value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+
+    def new_child(self):
+        return LatencyMetric(self.buckets)
+
+    def samples(self):
+        for values, child in list(self.children.items()):
+            for bound, count in zip(child.buckets, child.bucket_counts):
+                yield "_bucket", self.label_names + ("le",), values + (format_value(bound),), count
+            yield "_bucket", self.label_names + ("le",), values + ("+Inf",), child.count
+            yield "_sum", self.label_names, values, child.total
+            yield "_count", self.label_names, values, child.count
+
+
+def escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Tuple[str, ...] = (), collect=None) -> Gauge:
+        return self.register(Gauge(name, help, labels, collect))
+
+    def histogram(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics_registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = metrics_registry.histogram(
+    "http_request_duration_seconds", "Latency of the HTTP requests, by route", ("method", "route"))
+HTTP_REQUESTS = metrics_registry.counter(
+    "http_requests", "HTTP requests, by route and status code", ("method", "route", "status"))
+DB_STATEMENTS_PER_REQUEST = metrics_registry.histogram(
+    "db_statements_per_request", "SQL statements sent by each HTTP request", ("method", "route"), STATEMENT_BUCKETS)
+DB_SECONDS_PER_REQUEST = metrics_registry.histogram(
+    "db_duration_per_request_seconds", "Time spent in SQL statements by each HTTP request", ("method", "route"))
+FIGURE_SCAN_SECONDS = metrics_registry.histogram(
+    "figure_scan_duration_seconds", "Figure detection, incremental, full or in the scan pool (waiting included)",
+    ("kind",))
+BROADCAST_SECONDS = metrics_registry.histogram(
+    "broadcast_duration_seconds", "Fan-out of one message to the send queues of a channel", ("channel",))
+SEND_QUEUE_DEPTH = metrics_registry.gauge(
+    "websocket_send_queue_depth", "Frames waiting in the send queues of the sockets, by channel", ("channel",))
+DROPPED_MESSAGES = metrics_registry.counter(
+    "websocket_dropped_messages", "Frames never sent: replaced by a newer snapshot or discarded with their socket",
+    ("channel", "reason"))
+OVERFLOW_DISCONNECTS = metrics_registry.counter(
+    "websocket_overflow_disconnects", "Sockets dropped because their send queue was full", ("channel",))
+GAME_MANAGERS_EVICTED = metrics_registry.counter(
+    "game_managers_evicted", "Game channels forgotten, because the game finished or nobody used them", ("reason",))
+BOARD_FLUSH_ERRORS = metrics_registry.counter(
+    "board_flush_errors", "Failed writes of a cached board, retried or given up after the last retry", ("result",))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware that measures every HTTP request: latency, status and the SQL statements it sent.
+    Requests are labeled with the route template (e.g. /games/{id_game}/start), unmatched ones with "unmatched".
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_status = []
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                response_status.append(message["status"])
+            await send(message)
+
+        start = time.perf_counter()
+        with count_statements() as statements:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = scope.get("route")
+                labels = (scope["method"], getattr(route, "path", "unmatched"))
+                HTTP_REQUEST_SECONDS.labels(*labels).observe(time.perf_counter() - start)
+                HTTP_REQUESTS.labels(*labels, response_status[0] if response_status else 500).inc()
+                DB_STATEMENTS_PER_REQUEST.labels(*labels).observe(statements.count)
+                DB_SECONDS_PER_REQUEST.labels(*labels).observe(statements.duration)
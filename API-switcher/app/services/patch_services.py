@@ -0,0 +1,57 @@
+from typing import Any, List
+import copy
+
+# JSON-patch style operations (RFC 6902) between two JSON documents.
+# Lists that keep their length are diffed item by item (e.g. swapped board cells),
+# lists that grow or shrink are replaced whole, so every operation can be applied as is.
+
+
+def escape_key(key) -> str:
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def unescape_key(key: str) -> str:
+    return key.replace("~1", "/").replace("~0", "~")
+
+
+def make_patch(old: Any, new: Any, path: str = "") -> List[dict]:
+    """Return the operations that turn `old` into `new`"""
+    if isinstance(old, dict) and isinstance(new, dict):
+        patch = []
+        for key in old:
+            if key not in new:
+                patch.append({"op": "remove", "path": f"{path}/{escape_key(key)}"})
+        for key, value in new.items():
+            if key not in old:
+                patch.append({"op": "add", "path": f"{path}/{escape_key(key)}", "value": value})
+            else:
+                patch.extend(make_patch(old[key], value, f"{path}/{escape_key(key)}"))
+        return patch
+    if isinstance(old, list) and isinstance(new, list) and len(old) == len(new):
+        patch = []
+        for i, (old_item, new_item) in enumerate(zip(old, new)):
+            patch.extend(make_patch(old_item, new_item, f"{path}/{i}"))
+        return patch
+    if old == new and type(old) is type(new):
+        return []
+    return [{"op": "replace", "path": path, "value": new}]
+
+
+def apply_patch(document: Any, patch: List[dict]) -> Any:
+    """Return a copy of the document with the operations applied"""
+    document = copy.deepcopy(document)
+    for operation in patch:
+        if not operation["path"]:
+            document = copy.deepcopy(operation.get("value"))
+            continue
+        *parents, last = [unescape_key(key) for key in operation["path"].split("/")[1:]]
+        target = document
+        for key in parents:
+            target = target[int(key)] if isinstance(target, list) else target[key]
+        if isinstance(target, list):
+            last = int(last)
+        if operation["op"] == "remove":
+            del target[last]
+        else:
+            target[last] = copy.deepcopy(operation["value"])
+    return document
@@ -0,0 +1,76 @@
+from app.db.db import count_statements, StatementCount
+from collections import Counter
+from typing import Dict, List, Tuple
+import logging
+import os
+
+# Opt-in: every request records its SQL statements and answers with a Server-Timing header
+SQL_PROFILER = os.getenv("SQL_PROFILER", "0") == "1"
+# Requests with more statements than this log their most repeated ones
+SQL_PROFILER_THRESHOLD = int(os.getenv("SQL_PROFILER_THRESHOLD", "20"))
+SQL_PROFILER_TOP = int(os.getenv("SQL_PROFILER_TOP", "5"))
+
+
+def repeated_statements(profile: StatementCount) -> List[Tuple[str, int, float]]:
+    """(statement, times, seconds) of the statements sent more than once, the most repeated first"""
+    times = Counter(statement for statement, _ in profile.statements)
+    seconds: Dict[str, float] = {}
+    for statement, duration in profile.statements:
+        seconds[statement] = seconds.get(statement, 0.0) + duration
+    return [(statement, count, seconds[statement]) for statement, count in times.most_common() if count > 1]
+
+
+def duplicate_count(profile: StatementCount) -> int:
+    """Statements that repeat the text of an earlier one in the same request (the N of an N+1)"""
+    return len(profile.statements) - len({statement for statement, _ in profile.statements})
+
+
+def server_timing(profile: StatementCount) -> str:
+    return (f'db;dur={profile.duration * 1000:.3f};desc="SQL", '
+            f'db-statements;desc="{profile.count}", db-duplicates;desc="{duplicate_count(profile)}"')
+
+
+def parse_server_timing(header: str) -> Dict[str, Dict[str, str]]:
+    """{metric: {param: value}} of a Server-Timing header, e.g. {"db": {"dur": "1.2", "desc": "SQL"}}"""
+    metrics = {}
+    for entry in header.split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        metrics[name] = {key: value.strip('"') for key, _, value in (param.partition("=") for param in params)}
+    return metrics
+
+
+def log_repeated_statements(method: str, path: str, profile: StatementCount):
+    top = repeated_statements(profile)[:SQL_PROFILER_TOP]
+    logging.warning("%s %s envio %s sentencias SQL (%.1f ms), las mas repetidas:%s", method, path, profile.count,
+                    profile.duration * 1000,
+                    "".join(f"\n  {count}x {seconds * 1000:.1f} ms  {' '.join(statement.split())[:200]}"
+                            for statement, count, seconds in top))
+
+
+class SQLProfilerMiddleware:
+    """
+    ASGI middleware that records every SQL statement of a request, when SQL_PROFILER is on.
+    The response gets a Server-Timing header with the time spent in the database, the amount of statements
+    and how many of them repeat an earlier one.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not SQL_PROFILER:
+            await self.app(scope, receive, send)
+            return
+
+        with count_statements(record=True) as profile:
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(profile).encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_timing)
+
+        if profile.count > SQL_PROFILER_THRESHOLD:
+            log_repeated_statements(scope["method"], scope["path"], profile)
@@ -0,0 +1,22 @@
+from typing import Dict
+import os
+import random
+
+# Seed of the card dealing, each game gets its own generator derived from it.
+# Unset, every game starts from a random seed.
+GAME_RNG_SEED = os.getenv("GAME_RNG_SEED")
+
+# Random generator of each game, the game engine deals every card of the game with it
+game_rngs: Dict[int, random.Random] = {}
+
+
+def get_game_rng(game_id: int) -> random.Random:
+    rng = game_rngs.get(game_id)
+    if rng is None:
+        rng = random.Random(f"{GAME_RNG_SEED}:{game_id}" if GAME_RNG_SEED is not None else None)
+        game_rngs[game_id] = rng
+    return rng
+
+
+def forget_game_rng(game_id: int):
+    game_rngs.pop(game_id, None)
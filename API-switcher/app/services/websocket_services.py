@@ -1,18 +1,98 @@
 from fastapi import WebSocket, WebSocketException, status
 from fastapi.encoders import jsonable_encoder
-from app.services.figure_services import get_all_figures_in_board
+from app.services.figure_services import request_figures_in_board, forget_figure_detector
 from app.services.game_services import convert_game_to_schema
 from app.models.game_models import Game
+from app.schemas.game_schemas import GameSchemaOut, LobbyGameSchema
 from app.dependencies.dependencies import get_game_list
 from app.services.game_services import convert_board_to_schema, calculate_partial_board, get_move_tiles
+from app.services.game_state_services import game_state_cache
+from app.services.turn_services import forget_game_rng
 from app.models.board_models import Board
 import logging
 from app.models.player_models import Player
+from app.services.patch_services import make_patch
+from app.services.broadcast_services import (BroadcastBackend, Broadcast, LOBBY_CHANNEL, TARGET_ALL, TARGET_FULL,
+                                             TARGET_DELTA, game_channel)
+from app.services.lobby_services import lobby_index
+from app.services.metrics_services import (BROADCAST_SECONDS, SEND_QUEUE_DEPTH, DROPPED_MESSAGES, OVERFLOW_DISCONNECTS,
+                                           GAME_MANAGERS_EVICTED)
+from collections import deque
+import asyncio
+import json
+import os
+import time
+
+# Seconds a client has to take a broadcast before it's dropped
+SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5"))
+# Seconds a state update waits for other changes of the same game before being sent
+STATE_UPDATE_WINDOW = float(os.getenv("STATE_UPDATE_WINDOW", "0.01"))
+# Frames each socket may have waiting to be sent
+SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+
+# What a full send queue does with a new frame
+DROP_OLDEST = "drop_oldest"  # a snapshot replaces the oldest queued frame of the same snapshot, else disconnect
+DISCONNECT = "disconnect"  # the connection is dropped, the client reconnects and gets the whole state
+OVERFLOW_POLICIES = (DROP_OLDEST, DISCONNECT)
+OVERFLOW_POLICY = os.getenv("WS_OVERFLOW_POLICY", DROP_OLDEST)
+# Seconds the manager of a game without connections is kept before it's evicted
+GAME_MANAGER_IDLE_TIMEOUT = float(os.getenv("GAME_MANAGER_IDLE_TIMEOUT", "600"))
+
+# Parts of a state update
+STATE_BOARD = "board"
+STATE_FIGURES = "figures"
+STATE_GAME = "game"
+STATE_PARTIAL_MOVES = "partial_moves"
+FULL_STATE = (STATE_BOARD, STATE_FIGURES, STATE_GAME, STATE_PARTIAL_MOVES)
+
+# Part of the state each event carries whole, by type (broadcast_game sends the game without a type)
+EVENT_STATE_PARTS = {
+    None: STATE_GAME, "player connected": STATE_GAME, "player disconnected": STATE_GAME,
+    "game started": STATE_GAME, "finish turn": STATE_GAME,
+    "board": STATE_BOARD, "figures": STATE_FIGURES, "partial_moves": STATE_PARTIAL_MOVES,
+}
+
+
+def encode_message(message: dict) -> str:
+    """Serialize an event the same way send_json does, so it can be sent as is to every socket"""
+    return json.dumps(jsonable_encoder(message), separators=(",", ":"), ensure_ascii=False)
+
+
+class SendQueue:
+    """Bounded queue of the frames waiting to be sent to one socket, drained by its own writer task"""
+
+    def __init__(self, size: int):
+        self.size = size
+        # (frame, snapshot it carries or None)
+        self.frames: deque[tuple[str, str | None]] = deque()
+        self.writer: asyncio.Task | None = None
+
+    @property
+    def full(self) -> bool:
+        return len(self.frames) >= self.size
+
+    def replace_oldest(self, snapshot: str) -> bool:
+        """Drop the oldest queued frame of the same snapshot, a newer one is about to take its place"""
+        for i, (_, queued) in enumerate(self.frames):
+            if queued == snapshot:
+                del self.frames[i]
+                return True
+        return False
 
 
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, send_timeout: float = SEND_TIMEOUT, channel: str = "game",
+                 queue_size: int = SEND_QUEUE_SIZE, overflow_policy: str = OVERFLOW_POLICY):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {overflow_policy}")
         self.active_connections = set()
+        self.send_timeout = send_timeout
+        # Label of the fan-out metrics
+        self.channel = channel
+        self.queue_size = queue_size
+        self.overflow_policy = overflow_policy
+        self.send_queues: dict[WebSocket, SendQueue] = {}
+        self.closing_tasks = set()
 
     async def connect(self, websocket: WebSocket):
         await websocket.accept()
@@ -20,19 +100,110 @@ class ConnectionManager:
         
 
     def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+        # The socket may have been dropped already by a broadcast
+        self.active_connections.discard(websocket)
+        self._discard_queue(websocket, "disconnected")
+
+    @property
+    def queued_frames(self) -> int:
+        return sum(len(queue.frames) for queue in self.send_queues.values())
 
     async def send_personal_message(self, message: dict, websocket: WebSocket):
         await websocket.send_json(jsonable_encoder(message))
 
-    async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            await connection.send_json(jsonable_encoder(message))
+    async def broadcast(self, message: dict, snapshot: str | None = None):
+        """
+        Serialize the message once and put the same frame in the send queue of every connection, without
+        waiting for any socket. `snapshot` names the part of the state the message carries whole: with the
+        drop-oldest policy a full queue gives up its oldest frame of that snapshot instead of the connection.
+        """
+        if not self.active_connections:
+            return
+        self.send_frame(encode_message(message), snapshot)
+
+    def send_frame(self, data: str, snapshot: str | None = None):
+        """Put an already serialized message in the send queue of every connection"""
+        if not self.active_connections:
+            return
+        start = time.perf_counter()
+        for connection in list(self.active_connections):
+            self._enqueue(connection, data, snapshot)
+        BROADCAST_SECONDS.labels(self.channel).observe(time.perf_counter() - start)
+
+    async def drain(self):
+        """Wait until every queued frame has been sent (or its connection dropped)"""
+        while writers := [queue.writer for queue in self.send_queues.values() if queue.writer]:
+            await asyncio.gather(*writers)
+
+    def _enqueue(self, websocket: WebSocket, data: str, snapshot: str | None):
+        queue = self.send_queues.get(websocket)
+        if queue is None:
+            queue = self.send_queues[websocket] = SendQueue(self.queue_size)
+        if queue.full:
+            if self.overflow_policy == DROP_OLDEST and snapshot and queue.replace_oldest(snapshot):
+                SEND_QUEUE_DEPTH.labels(self.channel).inc(-1)
+                DROPPED_MESSAGES.labels(self.channel, "replaced").inc()
+            else:
+                logging.warning("Se descarta una conexión que no vacía su cola de envío")
+                OVERFLOW_DISCONNECTS.labels(self.channel).inc()
+                self._drop(websocket)
+                return
+        queue.frames.append((data, snapshot))
+        SEND_QUEUE_DEPTH.labels(self.channel).inc()
+        if queue.writer is None:
+            queue.writer = asyncio.create_task(self._write(websocket, queue))
+
+    async def _write(self, websocket: WebSocket, queue: SendQueue):
+        """Send the frames of the queue in order, the task ends when the queue is empty"""
+        try:
+            while queue.frames:
+                data, _ = queue.frames.popleft()
+                SEND_QUEUE_DEPTH.labels(self.channel).inc(-1)
+                if not await self._send(websocket, data):
+                    self._drop(websocket)
+                    return
+        finally:
+            queue.writer = None
+
+    async def _send(self, websocket: WebSocket, data: str) -> bool:
+        try:
+            await asyncio.wait_for(websocket.send_text(data), self.send_timeout)
+            return True
+        except Exception:
+            logging.warning("Se descarta una conexión que no recibió el mensaje")
+            return False
+
+    def _drop(self, websocket: WebSocket):
+        """Remove a connection that failed or fell behind and close it"""
+        self.active_connections.discard(websocket)
+        self._discard_queue(websocket, "dropped")
+        task = asyncio.create_task(self._close(websocket))
+        self.closing_tasks.add(task)
+        task.add_done_callback(self.closing_tasks.discard)
+
+    def _discard_queue(self, websocket: WebSocket, reason: str):
+        queue = self.send_queues.pop(websocket, None)
+        if queue is None:
+            return
+        if queue.frames:
+            SEND_QUEUE_DEPTH.labels(self.channel).inc(-len(queue.frames))
+            DROPPED_MESSAGES.labels(self.channel, reason).inc(len(queue.frames))
+            queue.frames.clear()
+        if queue.writer is not None and queue.writer is not asyncio.current_task():
+            queue.writer.cancel()
+
+    async def _close(self, websocket: WebSocket):
+        try:
+            await asyncio.wait_for(websocket.close(code=status.WS_1011_INTERNAL_ERROR), self.send_timeout)
+        except Exception:
+            pass
 
 
 class GameListManager:
-    def __init__(self):
-        self.connection_manager = ConnectionManager()
+    def __init__(self, backend: BroadcastBackend | None = None):
+        self.connection_manager = ConnectionManager(channel="lobby")
+        # Without a backend the broadcasts only reach the sockets of this process
+        self.backend = backend
 
     async def connect(self, websocket: WebSocket):
         await self.connection_manager.connect(websocket)
@@ -48,36 +219,153 @@ class GameListManager:
                 code=status.WS_1011_INTERNAL_ERROR, reason="Internal error")
 
         event = {"type": "initial game list", "message": "",
-                 "payload": jsonable_encoder(games)}
+                 "payload": jsonable_encoder(games.games), "next_cursor": games.next_cursor}
         try:
             await self.connection_manager.send_personal_message(event, websocket)
         except Exception:
             raise WebSocketException(
                 code=status.WS_1011_INTERNAL_ERROR, reason="Internal error")
 
-    async def broadcast_game(self, m_type: str, game: Game, message: str = ""):
+    async def broadcast_game(self, m_type: str, game: Game | GameSchemaOut | LobbyGameSchema, message: str = ""):
         """
         Broadcast a game to all active connections.
         """
         try:
-            game_schema = convert_game_to_schema(game)
+            game_schema = convert_game_to_schema(game) if isinstance(game, Game) else game
             event = {"type": m_type, "message": message,
                      "payload": game_schema}
-            await self.connection_manager.broadcast(event)
+            if self.backend is None:
+                await self.connection_manager.broadcast(event)
+            else:
+                await self.backend.publish(LOBBY_CHANNEL, TARGET_ALL, encode_message(event))
         except Exception:
             raise WebSocketException(
                 code=status.WS_1011_INTERNAL_ERROR, reason="Internal error")
 
 
+    def deliver(self, broadcast: Broadcast, remote: bool):
+        """A lobby frame published by any worker. The ones of other workers also update the lobby index here."""
+        if remote:
+            self._follow(json.loads(broadcast.frame))
+        self.connection_manager.send_frame(broadcast.frame, broadcast.snapshot)
+
+    def _follow(self, event: dict):
+        # Until the index is loaded the database already has every change
+        if not lobby_index.loaded:
+            return
+        if event.get("type") == "game deleted":
+            lobby_index.remove(event["payload"]["id"])
+        else:
+            lobby_index.upsert(LobbyGameSchema(**event["payload"]))
+
+
 class GameManager:
-    def __init__(self):
+    def __init__(self, update_window: float = STATE_UPDATE_WINDOW, game_id: int | None = None,
+                 backend: BroadcastBackend | None = None):
         self.connection_manager = ConnectionManager()
+        self.game_id = game_id
+        # Without a backend the broadcasts only reach the sockets of this process
+        self.backend = backend
+        self.update_window = update_window
+        self.version = 0
+        self.pending_state: dict = {}
+        self.pending_messages: list[str] = []
+        self.update_task: asyncio.Task | None = None
+        # Clients of the delta protocol get a snapshot on connect and then only patches
+        self.delta_connection_manager = ConnectionManager(channel="game_delta")
+        self.state: dict = {}
+        # time.monotonic() of the last connection, disconnection or message, for the idle eviction
+        self.last_activity = time.monotonic()
+
+    @property
+    def queue_depth(self) -> int:
+        """Parts and messages waiting for the next state update"""
+        return len(self.pending_state) + len(self.pending_messages)
+
+    @property
+    def connections(self) -> int:
+        return len(self.connection_manager.active_connections) + len(self.delta_connection_manager.active_connections)
+
+    @property
+    def queued_frames(self) -> int:
+        return self.connection_manager.queued_frames + self.delta_connection_manager.queued_frames
+
+    def is_idle(self, now: float, timeout: float) -> bool:
+        """Nobody connected and nothing left to send for `timeout` seconds"""
+        return (not self.connections and self.update_task is None and not self.queued_frames
+                and now - self.last_activity >= timeout)
 
     async def connect(self, websocket: WebSocket):
+        self.last_activity = time.monotonic()
         await self.connection_manager.connect(websocket)
 
+    async def connect_delta(self, websocket: WebSocket, game: Game):
+        """Connect a client of the delta protocol and send it, and only it, a snapshot of the game"""
+        self.last_activity = time.monotonic()
+        await websocket.accept()
+        # Bring the state up to date first, the other clients only get a patch if the game changed meanwhile
+        self.queue_state_update(game)
+        await self.flush_state_update(only_changes=True)
+        self.delta_connection_manager.active_connections.add(websocket)
+        await self.send_snapshot(websocket)
+
     def disconnect(self, websocket: WebSocket):
+        self.last_activity = time.monotonic()
         self.connection_manager.disconnect(websocket)
+        self.delta_connection_manager.disconnect(websocket)
+
+    async def broadcast(self, message: dict, snapshot: str | None = None):
+        """Send an event to the clients of both protocols"""
+        self.last_activity = time.monotonic()
+        await self.publish(TARGET_ALL, message, snapshot)
+
+    def _connection_managers(self, target: str) -> tuple:
+        if target == TARGET_FULL:
+            return (self.connection_manager,)
+        if target == TARGET_DELTA:
+            return (self.delta_connection_manager,)
+        return self.connection_manager, self.delta_connection_manager
+
+    async def publish(self, target: str, message: dict, snapshot: str | None = None):
+        """Send a message to the clients of the game in every worker, or only in this one without a backend"""
+        if self.backend is not None:
+            await self.backend.publish(game_channel(self.game_id), target, encode_message(message), snapshot)
+        elif any(manager.active_connections for manager in self._connection_managers(target)):
+            self.deliver(Broadcast(game_channel(self.game_id), target, encode_message(message), snapshot, ""))
+
+    def deliver(self, broadcast: Broadcast, remote: bool = False):
+        """
+        A frame published on the channel of the game, by any worker, goes to the sockets of this one.
+        The state updates and snapshots of other workers also bring the state of this manager up to date,
+        the base of the snapshots it sends to the delta clients.
+        """
+        if remote and broadcast.target != TARGET_DELTA:
+            self._follow(json.loads(broadcast.frame))
+        for manager in self._connection_managers(broadcast.target):
+            manager.send_frame(broadcast.frame, broadcast.snapshot)
+
+    def _follow(self, message: dict):
+        if message.get("type") == "state update":
+            self.state = {**self.state, **message["payload"]}
+            self.version = message["version"]
+        elif message.get("type") in EVENT_STATE_PARTS and "payload" in message:
+            self.state[EVENT_STATE_PARTS[message.get("type")]] = message["payload"]
+
+    async def drain(self):
+        await asyncio.gather(self.connection_manager.drain(), self.delta_connection_manager.drain())
+
+    def remember_state(self, part: str, payload):
+        """Events that carry a whole part of the state also update the base of the next patch"""
+        self.state[part] = jsonable_encoder(payload)
+
+    async def send_snapshot(self, websocket: WebSocket):
+        event_message = {
+            "type": "state snapshot",
+            "version": self.version,
+            "message": "",
+            "payload": self.state
+        }
+        await self.delta_connection_manager.send_personal_message(event_message, websocket)
 
 
     async def broadcast_disconnection(self, game: Game, player_id: int, player_name: str):
@@ -87,7 +375,8 @@ class GameManager:
             "message": player_name + " abandonó la partida",
             "payload": game_schema
         }
-        await self.connection_manager.broadcast(event_message)
+        self.remember_state(STATE_GAME, game_schema)
+        await self.broadcast(event_message)
 
 
     async def broadcast_connection(self, game: Game, player_id: int, player_name: str):
@@ -97,7 +386,8 @@ class GameManager:
             "message": player_name + " se ha unido a la partida",
             "payload": game_schema
         }
-        await self.connection_manager.broadcast(event_message)
+        self.remember_state(STATE_GAME, game_schema)
+        await self.broadcast(event_message)
 
 
     async def broadcast_game(self, game: Game):
@@ -105,7 +395,8 @@ class GameManager:
         event_message = {
             "payload": game_schema
         }
-        await self.connection_manager.broadcast(event_message)
+        self.remember_state(STATE_GAME, game_schema)
+        await self.broadcast(event_message, snapshot=STATE_GAME)
 
 
     async def broadcast_game_start(self, game: Game, player_name: str):
@@ -115,7 +406,8 @@ class GameManager:
             "message": "Turno de " + player_name,
             "payload": game_schema
         }
-        await self.connection_manager.broadcast(event_message)
+        self.remember_state(STATE_GAME, game_schema)
+        await self.broadcast(event_message)
 
 
     async def broadcast_finish_turn(self, game: Game, player_name: str):
@@ -125,17 +417,19 @@ class GameManager:
             "message": "Turno de " + player_name,
             "payload": game_schema
         }
-
-        await self.connection_manager.broadcast(event_message)
+        self.remember_state(STATE_GAME, game_schema)
+        await self.broadcast(event_message)
 
 
     async def broadcast_game_won(self, game: Game, player: Player):
+        # The last state of the game goes before the winner
+        await self.flush_state_update()
         event_message = {
             "type": "game won",
             "message": player.name + " ha ganado la partida",
             "payload": {"player_id": player.id}
         }
-        await self.connection_manager.broadcast(event_message)
+        await self.broadcast(event_message)
 
 
     async def broadcast_board(self, game: Game):
@@ -145,7 +439,8 @@ class GameManager:
             "message": "",
             "payload": board_schema
         }
-        await self.connection_manager.broadcast(event_message)
+        self.remember_state(STATE_BOARD, board_schema)
+        await self.broadcast(event_message, snapshot=STATE_BOARD)
 
 
     async def broadcast_partial_board(self, game: Game):
@@ -155,17 +450,21 @@ class GameManager:
             "message": "",
             "payload": color_distribution
         }
-        await self.connection_manager.broadcast(event_message)
+        self.remember_state(STATE_BOARD, color_distribution)
+        await self.broadcast(event_message, snapshot=STATE_BOARD)
 
 
     async def broadcast_figures_in_board(self, game:Game):
-        figures = get_all_figures_in_board(game)
+        figures = request_figures_in_board(game)
+        if isinstance(figures, asyncio.Task):
+            figures = await figures
         event_message = {
             "type": "figures",
             "message": "",
             "payload": figures
         }
-        await self.connection_manager.broadcast(event_message)     
+        self.remember_state(STATE_FIGURES, figures)
+        await self.broadcast(event_message, snapshot=STATE_FIGURES)
 
     async def  broadcast_partial_moves_in_board(self, game:Game):
         tiles_coord = get_move_tiles(game)
@@ -174,4 +473,178 @@ class GameManager:
             "message": "",
             "payload": tiles_coord
         }
-        await self.connection_manager.broadcast(event_message)   
\ No newline at end of file
+        self.remember_state(STATE_PARTIAL_MOVES, tiles_coord)
+        await self.broadcast(event_message, snapshot=STATE_PARTIAL_MOVES)
+
+
+    def _state_payload(self, part: str, game: Game):
+        if part == STATE_BOARD:
+            return calculate_partial_board(game)
+        if part == STATE_FIGURES:
+            # A full scan runs in the figure scan pool, the flush waits for its task
+            return request_figures_in_board(game)
+        if part == STATE_GAME:
+            return convert_game_to_schema(game)
+        if part == STATE_PARTIAL_MOVES:
+            return get_move_tiles(game)
+        raise ValueError(f"Unknown state part {part}")
+
+    def queue_state_update(self, game: Game, parts=FULL_STATE, message: str = ""):
+        """
+        Add the given parts of the game state to the next "state update" message.
+        Payloads are computed right away, while the request still has the game loaded, and
+        changes queued within the update window are merged into a single versioned frame.
+        """
+        self.last_activity = time.monotonic()
+        for part in parts:
+            self.pending_state[part] = self._state_payload(part, game)
+        if message:
+            self.pending_messages.append(message)
+        if self.update_task is None:
+            self.update_task = asyncio.create_task(self._send_state_update_later())
+
+    async def _send_state_update_later(self):
+        await asyncio.sleep(self.update_window)
+        await self.flush_state_update()
+
+    async def flush_state_update(self, only_changes: bool = False):
+        """Send the queued state update now, if there is one. With `only_changes`, if it changes the state."""
+        self.update_task = None
+        await self._resolve_pending_scans()
+        if not self.pending_state and not self.pending_messages:
+            return
+        changes, messages = jsonable_encoder(self.pending_state), self.pending_messages
+        self.pending_state, self.pending_messages = {}, []
+        new_state = {**self.state, **changes}
+        patch = make_patch(self.state, new_state)
+        if only_changes and not patch and not messages:
+            return
+        self.state = new_state
+        self.version += 1
+        event_message = {
+            "type": "state update",
+            "version": self.version,
+            "message": "",
+            "messages": messages,
+            "payload": changes
+        }
+        patch_message = {
+            "type": "state patch",
+            "version": self.version,
+            "base_version": self.version - 1,
+            "message": "",
+            "messages": messages,
+            "patch": patch
+        }
+        await self.publish(TARGET_FULL, event_message)
+        await self.publish(TARGET_DELTA, patch_message)
+
+    async def _resolve_pending_scans(self):
+        # A newer update of the same part may replace the task while it's awaited
+        while True:
+            part, task = next(((part, payload) for part, payload in self.pending_state.items()
+                               if isinstance(payload, asyncio.Task)), (None, None))
+            if task is None:
+                return
+            try:
+                result = await task
+            except Exception:
+                # The clients keep the figures they have
+                logging.exception("Error buscando las figuras del tablero")
+                if self.pending_state.get(part) is task:
+                    del self.pending_state[part]
+                continue
+            if self.pending_state.get(part) is task:
+                self.pending_state[part] = result
+
+
+class GameManagerRegistry:
+    """
+    GameManager of each game, keyed by game id. A manager is created on first use, so the endpoints can
+    broadcast to a game nobody is connected to yet, and evicted when its game finishes or after
+    `idle_timeout` seconds without connections. Idle managers are looked for each time a new one is created,
+    the cached board and figure detector of an idle game go with its manager.
+    """
+
+    def __init__(self, idle_timeout: float = GAME_MANAGER_IDLE_TIMEOUT, backend: BroadcastBackend | None = None):
+        self.idle_timeout = idle_timeout
+        self.backend = backend
+        self.managers: dict[int, GameManager] = {}
+        # Evicted managers of finished games that still have sockets, they get the last frames of their channel
+        self.finished: dict[int, GameManager] = {}
+
+    def __getitem__(self, game_id: int) -> GameManager:
+        manager = self.managers.get(game_id)
+        if manager is None:
+            self.evict_idle()
+            manager = self.managers[game_id] = GameManager(game_id=game_id, backend=self.backend)
+        return manager
+
+    def __contains__(self, game_id: int) -> bool:
+        return game_id in self.managers
+
+    def __len__(self) -> int:
+        return len(self.managers)
+
+    def get(self, game_id: int) -> GameManager | None:
+        """The manager of a game, without creating it"""
+        return self.managers.get(game_id)
+
+    def items(self):
+        return tuple(self.managers.items())
+
+    def values(self):
+        return tuple(self.managers.values())
+
+    def evict(self, game_id: int, reason: str = "finished"):
+        """
+        Forget the manager of a game. Broadcasts already scheduled keep their reference and still go out,
+        the sockets still connected stay open until their clients leave.
+        """
+        manager = self.managers.pop(game_id, None)
+        if manager is None:
+            return
+        GAME_MANAGERS_EVICTED.labels(reason).inc()
+        if not manager.is_idle(time.monotonic(), 0):
+            self.finished[game_id] = manager
+
+    def evict_idle(self, now: float | None = None) -> int:
+        now = time.monotonic() if now is None else now
+        for game_id, manager in tuple(self.finished.items()):
+            if manager.is_idle(now, 0):
+                del self.finished[game_id]
+        idle = [game_id for game_id, manager in self.managers.items() if manager.is_idle(now, self.idle_timeout)]
+        for game_id in idle:
+            self.evict(game_id, "idle")
+            # Nobody is playing it here, its board and figures are loaded again if the game comes back
+            # and its cards are dealt by a new generator
+            game_state_cache.release(game_id)
+            forget_figure_detector(game_id)
+            forget_game_rng(game_id)
+        return len(idle)
+
+    def deliver(self, game_id: int, broadcast: Broadcast, remote: bool):
+        """A frame of the channel of a game goes to its managers here, none is created for it"""
+        if remote:
+            # Another worker changed the game, its board, movements and figures are read again from the database
+            game_state_cache.evict(game_id)
+            forget_figure_detector(game_id)
+        for manager in (self.managers.get(game_id), self.finished.get(game_id)):
+            if manager is not None:
+                manager.deliver(broadcast, remote)
+
+    def clear(self):
+        self.managers.clear()
+        self.finished.clear()
+
+    def stats(self) -> dict:
+        """Managers kept in memory, sockets of each game and the memory their state takes"""
+        managers = self.items()
+        return {
+            "managers": len(managers),
+            "finished": len(self.finished),
+            "connections": {game_id: manager.connections for game_id, manager in managers},
+            "queued_frames": sum(manager.queued_frames for _, manager in managers),
+            "pending_updates": sum(manager.queue_depth for _, manager in managers),
+            "state_bytes": sum(len(encode_message(manager.state)) for _, manager in managers),
+        }
@@ -0,0 +1,205 @@
+"""
+Benchmarks of the hot paths, on fixed seeded boards. Not collected by the test suite, run them with
+
+    python -m pytest benchmarks/bench_hot_paths.py                                # check against the baselines
+    BENCHMARK_SAVE_BASELINE=1 python -m pytest benchmarks/bench_hot_paths.py     # store new baselines
+    BENCHMARK_TOLERANCE=25 python -m pytest benchmarks/bench_hot_paths.py        # fail beyond 25% slower
+    BENCHMARK_MIN_ROUNDS=200 python -m pytest benchmarks/bench_hot_paths.py      # more rounds per benchmark
+"""
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from unittest.mock import AsyncMock, patch
+from app.main import app
+from app.db.constants import VALID_PATHS
+from app.db.db import Base, get_db, get_async_db, async_database_url
+from app.db.enums import Colors, FigTypeAndDifficulty, GameStatus, MovementType
+from app.endpoints.game_endpoints import async_auth_scheme
+from app.engine.switcher_engine import SwitcherEngine
+from app.models.board_models import Board
+from app.models.figure_card_model import FigureCard
+from app.models.game_models import Game
+from app.models.movement_card_model import MovementCard
+from app.models.player_models import Player
+from app.schemas.board_schemas import BoardSchemaOut
+from app.schemas.movement_schema import Coordinate
+from app.services.figure_services import get_path_valid, is_figure_isolated, get_all_figures_in_board, forget_figure_detector
+from app.services.game_services import calculate_partial_board, convert_game_to_schema
+from app.services.game_state_services import game_state_cache
+from app.services.websocket_services import ConnectionManager, GameManagerRegistry
+import asyncio
+import logging
+import pytest
+
+SEED = 2024
+
+
+@pytest.fixture(scope="module", autouse=True)
+def quiet_logs():
+    logging.disable(logging.INFO)
+    yield
+    logging.disable(logging.NOTSET)
+
+
+@pytest.fixture
+def board() -> BoardSchemaOut:
+    state = SwitcherEngine(SEED).new_game([(1, "Juan"), (2, "Maria")])
+    return BoardSchemaOut.model_construct(color_distribution=[list(row) for row in state.board])
+
+
+@pytest.fixture
+def game() -> Game:
+    """Game of four players with their cards and the seeded board, not bound to a session"""
+    engine_state = SwitcherEngine(SEED).new_game([(i, f"Jugador {i}") for i in range(1, 5)])
+    players = []
+    for seat in engine_state.players:
+        player = Player(id=seat.id, name=seat.name, blocked=False)
+        player.movement_cards = [MovementCard(movement_type=movement_type, associated_player=seat.id, in_hand=True)
+                                 for movement_type in seat.movement_cards]
+        player.figure_cards = [FigureCard(type_and_difficulty=fig, associated_player=seat.id, in_hand=in_hand,
+                                          blocked=False)
+                               for cards, in_hand in ((seat.figure_cards, True), (seat.figure_deck, False))
+                               for fig in cards]
+        players.append(player)
+
+    board = Board(game_id=1)
+    board.color_distribution = [[color.value for color in row] for row in engine_state.board]
+    game = Game(id=1, name="Partida", player_amount=4, status=GameStatus.in_game, host_id=1,
+                player_turn=engine_state.turn, forbidden_color=Colors.none, board=board)
+    game.players.extend(players)
+    yield game
+    game_state_cache.evict(game.id)
+    forget_figure_detector(game.id)
+
+
+def test_get_path_valid(hot_path, board):
+    paths = [path for paths in VALID_PATHS.values() for path in paths]
+    starts = [Coordinate(x=x, y=y) for x in range(6) for y in range(6)]
+
+    def scan():
+        for path in paths:
+            for start in starts:
+                get_path_valid(path=path, board=board, start=start, f_color=Colors.none)
+
+    hot_path(scan)
+
+
+def test_is_figure_isolated(hot_path, board):
+    tiles = [[Coordinate(x=x, y=y), Coordinate(x=x, y=y + 1), Coordinate(x=x + 1, y=y), Coordinate(x=x + 1, y=y + 1)]
+             for x in range(5) for y in range(5)]
+
+    def check():
+        for figure in tiles:
+            is_figure_isolated(figure, board)
+
+    hot_path(check)
+
+
+def test_get_all_figures_in_board(hot_path, game):
+    """Full scan of the board, the detector of the game is forgotten before each round"""
+    hot_path.pedantic(get_all_figures_in_board, args=(game,), setup=lambda: forget_figure_detector(game.id),
+                      rounds=500, warmup_rounds=10)
+
+
+def test_calculate_partial_board(hot_path, game):
+    calculate_partial_board(game)
+    hot_path(calculate_partial_board, game)
+
+
+def test_convert_game_to_schema(hot_path, game):
+    hot_path(convert_game_to_schema, game)
+
+
+@pytest.mark.parametrize("sockets", [4, 64])
+def test_broadcast(benchmark, game, sockets):
+    """Reported but not checked against a baseline, its time follows the writer tasks of the event loop"""
+    manager = ConnectionManager()
+    manager.active_connections = {AsyncMock() for _ in range(sockets)}
+    message = {"type": "game update", "message": "", "payload": convert_game_to_schema(game)}
+    loop = asyncio.new_event_loop()
+
+    async def broadcast():
+        # Until every send queue is empty, not only the fan-out to the queues
+        await manager.broadcast(message)
+        await manager.drain()
+
+    try:
+        benchmark(lambda: loop.run_until_complete(broadcast()))
+    finally:
+        loop.close()
+    assert len(manager.active_connections) == sockets
+
+
+@pytest.fixture
+def client_in_turn(tmp_path):
+    """
+    Client of a started game in a SQLite file, Juan is in turn with a MOV_03 in hand.
+    The turn endpoints use the async session: each request of the TestClient runs in a new event loop,
+    its connections are not pooled.
+    """
+    url = f"sqlite:///{tmp_path / 'switcher.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_session_factory = async_sessionmaker(create_async_engine(async_database_url(url), poolclass=NullPool),
+                                               autoflush=False, expire_on_commit=False)
+
+    db = session_factory()
+    players = [Player(name="Juan"), Player(name="Maria")]
+    db.add_all(players)
+    db.commit()
+    game = Game(name="Partida", player_amount=2, host_id=players[0].id, status=GameStatus.in_game,
+                forbidden_color=Colors.none, player_turn=0)
+    game.players.extend(players)
+    db.add(game)
+    db.commit()
+    db.add(Board(game.id))
+    db.add(MovementCard(movement_type=MovementType.MOV_03, associated_player=players[0].id, in_hand=True))
+    db.add(FigureCard(type_and_difficulty=FigTypeAndDifficulty.FIG_01, associated_player=players[0].id, in_hand=True))
+    db.commit()
+    game_id, juan = game.id, db.get(Player, players[0].id)
+    db.expunge_all()
+    db.close()
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[async_auth_scheme] = lambda: juan
+    with patch("app.endpoints.game_endpoints.game_connection_managers", GameManagerRegistry()):
+        yield TestClient(app), game_id
+    app.dependency_overrides = {}
+    game_state_cache.evict(game_id)
+    forget_figure_detector(game_id)
+    engine.dispose()
+
+
+def test_add_movement_round_trip(hot_path, client_in_turn):
+    """PUT /games/{id}/movement/add through the whole app, the movement is undone before each round"""
+    client, game_id = client_in_turn
+    movement = {"movement_card": {"movement_type": MovementType.MOV_03.value, "associated_player": 1, "in_hand": True},
+                "piece_1_coordinates": {"x": 0, "y": 0}, "piece_2_coordinates": {"x": 0, "y": 1}}
+    played = []
+
+    def undo():
+        if played:
+            assert client.put(f"/games/{game_id}/movement/back").status_code == 204
+            played.clear()
+
+    def add_movement():
+        response = client.put(f"/games/{game_id}/movement/add", json=movement)
+        assert response.status_code == 200, response.text
+        played.append(response)
+
+    hot_path.pedantic(add_movement, setup=undo, rounds=100, warmup_rounds=5)
@@ -0,0 +1,81 @@
+from pathlib import Path
+import json
+import os
+import pytest
+import statistics
+import timeit
+
+# Median of each hot path benchmark divided by the time of the reference workload, on the machine that stored them
+BASELINE_FILE = Path(__file__).parent / "baselines" / "hot_paths.json"
+# A benchmark fails when its ratio is more than this percentage above the baseline. On a shared machine the ratio
+# of a run moves by up to 90% between runs, below that a gate fails on noise: set it lower on a quiet machine
+BENCHMARK_TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", "100"))
+# Rounds each benchmark runs at least, the median of a handful of rounds moves with any noise of the machine
+BENCHMARK_MIN_ROUNDS = int(os.getenv("BENCHMARK_MIN_ROUNDS", "50"))
+# Set to 1 to store the ratios of the run as the new baselines instead of checking them
+BENCHMARK_SAVE_BASELINE = os.getenv("BENCHMARK_SAVE_BASELINE", "0") == "1"
+
+
+def pytest_collection_modifyitems(items):
+    for item in items:
+        if item.get_closest_marker("benchmark") is None:
+            item.add_marker(pytest.mark.benchmark(min_rounds=BENCHMARK_MIN_ROUNDS))
+
+
+def reference_workload():
+    """Plain Python of the kind of the hot paths: loops, comparisons and dict updates"""
+    counts = {}
+    for value in sorted(range(2000, 0, -1)):
+        counts[value % 7] = counts.get(value % 7, 0) + value
+    return counts
+
+
+def calibrate() -> list[float]:
+    """Seconds the reference workload takes on this machine right now, one per run"""
+    return [seconds / 10 for seconds in timeit.repeat(reference_workload, number=10, repeat=15)]
+
+
+@pytest.fixture(scope="session")
+def baselines():
+    stored = json.loads(BASELINE_FILE.read_text()) if BASELINE_FILE.exists() else {}
+    measured = {}
+    yield stored, measured
+    if BENCHMARK_SAVE_BASELINE and measured:
+        BASELINE_FILE.parent.mkdir(exist_ok=True)
+        BASELINE_FILE.write_text(json.dumps({**stored, **measured}, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.fixture
+def hot_path(benchmark, baselines):
+    """
+    The benchmark fixture of the hot paths checked against their stored baseline (see pytest_runtest_call).
+    The benchmarks whose time depends on the scheduling of the event loop use the plain benchmark fixture.
+    """
+    return benchmark
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """
+    The median of a hot_path benchmark is compared as a multiple of the reference workload, timed right before and
+    after the benchmark, so the baselines hold on a faster or slower machine and while the speed of this one drifts.
+    The check runs as part of the test: a regression fails it.
+    """
+    if "hot_path" not in item.fixturenames:
+        return (yield)
+
+    before = calibrate()
+    result = yield
+    benchmark = item.funcargs["hot_path"]
+    if not benchmark.enabled or benchmark.stats is None:
+        return result
+
+    stored, measured = item.funcargs["baselines"]
+    name = item.name
+    median = benchmark.stats.stats.median
+    ratio = median / statistics.median(before + calibrate())
+    measured[name] = ratio
+    if not BENCHMARK_SAVE_BASELINE and name in stored and ratio > stored[name] * (1 + BENCHMARK_TOLERANCE / 100):
+        pytest.fail(f"{name} took {median * 1e6:.1f} us, {ratio:.2f} times the reference workload, "
+                    f"the baseline is {stored[name]:.2f} times ({BENCHMARK_TOLERANCE:.0f}% slower allowed)")
+    return result
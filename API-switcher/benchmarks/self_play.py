@@ -0,0 +1,154 @@
+"""
+Headless self-play: bots play whole games on the game engine, every movement goes through validate_movement
+(the swaps of VALID_MOVES) and every board through get_figure_in_board, as the endpoints do.
+Reference benchmark of the rules, e.g.
+
+    python -m benchmarks.self_play --games 200 --players 2-4 --bot greedy --seed 1
+    python -m benchmarks.self_play --games 20 --json      # one JSON line, for CI
+"""
+from app.db.enums import FigTypeAndDifficulty, GameStatus
+from app.engine.state import SwitcherState, PlayMovement, FinishTurn, DiscardFigure
+from app.engine.switcher_engine import SwitcherEngine
+from app.schemas.board_schemas import BoardSchemaOut
+from app.schemas.movement_cards_schema import MovementCardSchema
+from app.schemas.movement_schema import MovementSchema, Coordinate
+from app.services.figure_services import get_figure_in_board
+from app.services.movement_services import validate_movement
+from typing import List, Tuple
+import argparse
+import json
+import logging
+import random
+import statistics
+import time
+
+BOTS = ("random", "greedy")
+
+
+class SelfPlay:
+    """Plays games between bots and keeps the counters of the run"""
+
+    def __init__(self, bot: str, seed: int, max_turns: int):
+        self.bot = bot
+        self.rng = random.Random(seed)
+        self.max_turns = max_turns
+        self.moves = 0
+        self.turns = 0
+        self.finished = 0
+        self.figure_scans: List[float] = []
+        self.figures_per_board: List[int] = []
+
+    def detect_figures(self, state: SwitcherState) -> List[Tuple[FigTypeAndDifficulty, tuple]]:
+        """Every figure formed in the board, one get_figure_in_board per figure type"""
+        board = BoardSchemaOut.model_construct(color_distribution=[list(row) for row in state.partial_board])
+        start = time.perf_counter()
+        figures = [(figure.fig, (figure.tiles[0].x, figure.tiles[0].y))
+                   for fig in FigTypeAndDifficulty
+                   for figure in get_figure_in_board(fig.value, board, state.forbidden_color)]
+        self.figure_scans.append(time.perf_counter() - start)
+        self.figures_per_board.append(len(figures))
+        return figures
+
+    def choose_movement(self, engine: SwitcherEngine, state: SwitcherState) -> PlayMovement | None:
+        movements = engine.legal_movements(state)
+        if not movements:
+            return None
+        if self.bot == "greedy":
+            # A movement that forms a figure of the hand, looked for with the engine's bitboards
+            hand = set(state.player_in_turn.figure_cards)
+            for movement in self.rng.sample(movements, len(movements)):
+                moved, _ = engine.apply(state, movement)
+                if any(fig in hand for fig, _ in engine.formed_figures(moved)):
+                    return movement
+        return self.rng.choice(movements)
+
+    def validate(self, movement: PlayMovement):
+        validate_movement(MovementSchema.model_construct(
+            movement_card=MovementCardSchema.model_construct(movement_type=movement.movement_type,
+                                                             associated_player=movement.player_id, in_hand=True),
+            piece_1_coordinates=Coordinate.model_construct(x=movement.x1, y=movement.y1),
+            piece_2_coordinates=Coordinate.model_construct(x=movement.x2, y=movement.y2)), None)
+
+    def play_game(self, player_amount: int):
+        engine = SwitcherEngine(self.rng.getrandbits(32))
+        state = engine.new_game([(i, f"bot {i}") for i in range(player_amount)])
+        turns = 0
+        while state.status is GameStatus.in_game and turns < self.max_turns:
+            seat = state.player_in_turn
+            claimable = [(fig, tile) for fig, tile in self.detect_figures(state) if fig in seat.figure_cards]
+            if claimable:
+                fig, tile = claimable[0]
+                state, _ = engine.apply(state, DiscardFigure(seat.id, fig, *tile))
+                continue
+
+            movement = self.choose_movement(engine, state) if seat.movement_cards else None
+            if movement:
+                self.validate(movement)
+                state, _ = engine.apply(state, movement)
+                self.moves += 1
+            else:
+                state, _ = engine.apply(state, FinishTurn(seat.id))
+                turns += 1
+
+        self.turns += turns
+        if state.status is GameStatus.finished:
+            self.finished += 1
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def run(games: int, players: Tuple[int, int] = (2, 4), bot: str = "greedy", seed: int = 0,
+        max_turns: int = 200) -> dict:
+    self_play = SelfPlay(bot, seed, max_turns)
+    start = time.perf_counter()
+    for _ in range(games):
+        self_play.play_game(self_play.rng.randint(*players))
+    elapsed = time.perf_counter() - start
+
+    scans = sorted(self_play.figure_scans)
+    return {
+        "games": games,
+        "bot": bot,
+        "games_per_sec": games / elapsed,
+        "moves_per_sec": self_play.moves / elapsed,
+        "finished_games": self_play.finished,
+        "avg_turns": self_play.turns / games,
+        "figure_scan_mean_us": statistics.mean(scans) * 1e6,
+        "figure_scan_p50_us": percentile(scans, 0.50) * 1e6,
+        "figure_scan_p95_us": percentile(scans, 0.95) * 1e6,
+        "figure_scan_p99_us": percentile(scans, 0.99) * 1e6,
+        "avg_figures_per_board": statistics.mean(self_play.figures_per_board),
+    }
+
+
+def player_range(value: str) -> Tuple[int, int]:
+    low, _, high = value.partition("-")
+    players = (int(low), int(high or low))
+    if not 2 <= players[0] <= players[1] <= 4:
+        raise argparse.ArgumentTypeError("entre 2 y 4 jugadores, e.g. 3 o 2-4")
+    return players
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=20)
+    parser.add_argument("--players", type=player_range, default=(2, 4), help="amount or range, e.g. 3 or 2-4")
+    parser.add_argument("--bot", choices=BOTS, default="greedy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--max-turns", type=int, default=200, help="games still going are cut after these turns")
+    parser.add_argument("--json", action="store_true", help="print the result as one JSON line")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    result = run(args.games, args.players, args.bot, args.seed, args.max_turns)
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print(", ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                        for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
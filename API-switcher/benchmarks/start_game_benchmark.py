@@ -0,0 +1,95 @@
+"""
+Latency of starting a game: PUT /games/{id}/start through the whole app, on an in-memory SQLite database.
+
+    python -m benchmarks.start_game_benchmark --games 200 --players 4
+"""
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from unittest.mock import patch
+from app.main import app
+from app.db.db import Base, get_db
+from app.db.enums import Colors
+from app.endpoints.game_endpoints import auth_scheme
+from app.models.game_models import Game
+from app.models.player_models import Player
+from app.services.websocket_services import GameManagerRegistry
+import argparse
+import logging
+import statistics
+import time
+
+
+def create_game(session_factory, player_amount: int) -> tuple[int, Player]:
+    db = session_factory()
+    players = [Player(name=f"Jugador {i}") for i in range(player_amount)]
+    db.add_all(players)
+    db.commit()
+    game = Game(name="Partida", player_amount=player_amount, host_id=players[0].id, forbidden_color=Colors.none)
+    game.players.extend(players)
+    db.add(game)
+    db.commit()
+    game_id, host = game.id, db.get(Player, players[0].id)
+    db.expunge_all()
+    db.close()
+    return game_id, host
+
+
+def run(games: int, player_amount: int) -> dict:
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    client = TestClient(app)
+    latencies, statement_counts = [], []
+    try:
+        with patch("app.endpoints.game_endpoints.game_connection_managers", GameManagerRegistry()):
+            for _ in range(games):
+                game_id, host = create_game(session_factory, player_amount)
+                app.dependency_overrides[auth_scheme] = lambda: host
+                statements.clear()
+                start = time.perf_counter()
+                response = client.put(f"/games/{game_id}/start")
+                latencies.append(time.perf_counter() - start)
+                statement_counts.append(len(statements))
+                assert response.status_code == 200, response.text
+    finally:
+        app.dependency_overrides = {}
+        engine.dispose()
+
+    latencies.sort()
+    return {
+        "games": games,
+        "players": player_amount,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "median_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "statements": statistics.mean(statement_counts),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=200)
+    parser.add_argument("--players", type=int, default=4)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    result = run(args.games, args.players)
+    print(", ".join(f"{key}={value:.2f}" if isinstance(value, float) else f"{key}={value}"
+                    for key, value in result.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+from sqlalchemy import event, text
+from sqlalchemy.orm import sessionmaker
+from app.db.db import Base, async_database_url, make_async_engine, make_engine
+from app.db.enums import Colors, GameStatus, MovementType
+from app.dependencies.dependencies import load_async_game
+from app.engine.state import PlayMovement
+from app.models.board_models import Board
+from app.models.game_models import Game
+from app.models.movement_card_model import MovementCard
+from app.models.player_models import Player
+from app.services.action_services import apply_action, save_game_state_async
+from app.services.game_services import convert_game_to_schema
+from sqlalchemy.ext.asyncio import async_sessionmaker
+import asyncio
+import pytest
+import pytest_asyncio
+import time
+
+
+@pytest_asyncio.fixture
+async def databases(tmp_path):
+    url = f"sqlite:///{tmp_path / 'switcher.db'}"
+    engine = make_engine(url, {})
+    Base.metadata.create_all(bind=engine)
+    async_engine = make_async_engine(url, {})
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine), async_engine
+    # The aiosqlite threads would keep the process alive
+    await async_engine.dispose()
+    engine.dispose()
+
+
+def create_game(session_factory) -> int:
+    db = session_factory()
+    players = [Player(name="Juan"), Player(name="Maria")]
+    db.add_all(players)
+    db.commit()
+    game = Game(name="Partida", player_amount=2, host_id=players[0].id, status=GameStatus.in_game,
+                forbidden_color=Colors.none, player_turn=0)
+    game.players.extend(players)
+    db.add(game)
+    db.add(MovementCard(movement_type=MovementType.MOV_01, associated_player=players[0].id, in_hand=True))
+    db.commit()
+    db.add(Board(game.id))
+    db.commit()
+    game_id = game.id
+    db.close()
+    return game_id
+
+
+def slow_function(sync_engine, seconds: float):
+    @event.listens_for(sync_engine, "connect")
+    def register(dbapi_connection, connection_record):
+        dbapi_connection.create_function("slow", 0, lambda: time.sleep(seconds) or 1)
+
+
+def test_async_database_url():
+    assert async_database_url("sqlite:///./switcher.db") == "sqlite+aiosqlite:///./switcher.db"
+    assert async_database_url("postgresql://user:secret@db/switcher") == "postgresql+asyncpg://user:secret@db/switcher"
+
+
+@pytest.mark.asyncio
+async def test_load_async_game(databases):
+    session_factory, async_engine = databases
+    game_id = create_game(session_factory)
+
+    async with async_sessionmaker(async_engine, expire_on_commit=False)() as db:
+        game = await load_async_game(game_id, db)
+        # Everything the schema reads is already loaded, no lazy load outside the greenlet
+        game_out = convert_game_to_schema(game)
+
+    assert [player.name for player in game_out.players] == ["Juan", "Maria"]
+    assert game_out.players[0].movement_cards[0].movement_type == MovementType.MOV_01
+
+
+@pytest.mark.asyncio
+async def test_async_services(databases):
+    session_factory, async_engine = databases
+    game_id = create_game(session_factory)
+
+    async with async_sessionmaker(async_engine, expire_on_commit=False)() as db:
+        game = await load_async_game(game_id, db)
+        player = game.players[0]
+        state, events = apply_action(game, PlayMovement(player.id, MovementType.MOV_01, 0, 0, 2, 2))
+        await save_game_state_async(game, state, events, db)
+
+    db = session_factory()
+    player = db.get(Player, player.id)
+    assert [card.in_hand for card in player.movement_cards] == [False]
+    assert [(mov.x1, mov.y1, mov.x2, mov.y2, mov.final_movement) for mov in player.movements] == [(0, 0, 2, 2, False)]
+    db.close()
+
+
+async def count_ticks(work) -> int:
+    ticks = 0
+    running = True
+
+    async def heartbeat():
+        nonlocal ticks
+        while running:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    task = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    await work()
+    running = False
+    await task
+    return ticks
+
+
+@pytest.mark.asyncio
+async def test_slow_query_does_not_stall_the_loop(databases):
+    session_factory, async_engine = databases
+    slow_function(session_factory.kw["bind"], 0.2)
+    # The connection already in the pool doesn't have the function
+    session_factory.kw["bind"].dispose()
+    slow_function(async_engine.sync_engine, 0.2)
+
+    async def sync_query():
+        db = session_factory()
+        db.execute(text("SELECT slow()"))
+        db.close()
+
+    async def async_query():
+        async with async_sessionmaker(async_engine)() as db:
+            await db.execute(text("SELECT slow()"))
+
+    # The sync session blocks every other task (e.g. the broadcasts) until the query ends
+    assert await count_ticks(sync_query) <= 2
+    assert await count_ticks(async_query) >= 10
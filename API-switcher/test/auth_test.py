@@ -0,0 +1,58 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.main import app
+from app.db.db import Base, get_db
+from app.models.player_models import Player
+import pytest
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def database():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    sessions = []
+
+    def override_get_db():
+        db = session_factory()
+        sessions.append(db)
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield session_factory, statements, sessions
+    app.dependency_overrides = {}
+
+
+def test_token_lookup(database):
+    session_factory, statements, sessions = database
+    db = session_factory()
+    db.add(Player(name="Juan", token="token-juan"))
+    db.commit()
+    db.close()
+    headers = {"Authorization": "Bearer token-juan"}
+
+    statements.clear()
+    assert client.get("/games", headers=headers).status_code == 200
+    assert sum("player.token = ?" in statement for statement in statements) == 1
+
+    # One session per request, shared by the authentication and the endpoint
+    assert len(sessions) == 1
+    assert client.get("/games", headers={"Authorization": "Bearer otro"}).status_code == 401
+
+
+def test_token_column_is_indexed(database):
+    session_factory, statements, sessions = database
+    db = session_factory()
+    plan = db.execute(text("EXPLAIN QUERY PLAN SELECT * FROM player WHERE token = 'token-juan'")).all()
+    db.close()
+
+    assert any("USING INDEX" in row[-1] for row in plan)
@@ -0,0 +1,139 @@
+from app.services.bitboard_services import (board_to_masks, neighbours_mask, tile_bit, tiles_to_mask,
+                                            connected_groups, find_figure, find_figures, FIGURE_MASKS,
+                                            IncrementalFigureDetector)
+from app.services.figure_services import get_path_valid, is_figure_isolated
+from app.schemas.board_schemas import BoardSchemaOut
+from app.schemas.movement_schema import Coordinate
+from app.db.constants import VALID_PATHS
+from app.db.enums import FigTypeAndDifficulty, Colors
+import random
+
+
+def random_board(rng: random.Random):
+    colors = [Colors.red] * 9 + [Colors.blue] * 9 + [Colors.yellow] * 9 + [Colors.green] * 9
+    rng.shuffle(colors)
+    return [colors[i:i + 6] for i in range(0, 36, 6)]
+
+
+def interpreter_figures(board: BoardSchemaOut, f_color: Colors):
+    """The original path interpreter, used as reference"""
+    figures = []
+    for fig in FigTypeAndDifficulty:
+        for path in VALID_PATHS[fig.value[0]]:
+            for x in range(6):
+                for y in range(6):
+                    tiles = get_path_valid(path=path, board=board, start=Coordinate(x=x, y=y), f_color=f_color)
+                    if tiles and is_figure_isolated(tiles, board):
+                        figures.append((fig, [(tile.x, tile.y) for tile in tiles]))
+    return figures
+
+
+def test_board_to_masks():
+    board = [[Colors.red] * 6 for _ in range(6)]
+    board[0][1] = Colors.blue
+    board[5][5] = Colors.blue
+
+    masks = board_to_masks(board)
+
+    assert masks[Colors.blue] == tile_bit(0, 1) | tile_bit(5, 5)
+    assert masks[Colors.red] | masks[Colors.blue] == (1 << 36) - 1
+    assert masks[Colors.red] & masks[Colors.blue] == 0
+
+
+def test_neighbours_mask_does_not_wrap():
+    """Tiles in the border of the board don't have neighbours in the opposite border"""
+    assert neighbours_mask(tile_bit(0, 5)) == tile_bit(0, 4) | tile_bit(1, 5)
+    assert neighbours_mask(tile_bit(3, 0)) == tile_bit(2, 0) | tile_bit(4, 0) | tile_bit(3, 1)
+    assert neighbours_mask(tiles_to_mask([(5, 5), (5, 4)])) == tiles_to_mask([(4, 5), (4, 4), (5, 3)])
+
+
+def test_connected_groups():
+    mask = tiles_to_mask([(0, 0), (0, 1), (1, 1), (3, 3), (5, 0)])
+
+    groups = sorted(connected_groups(mask))
+
+    assert groups == sorted([tiles_to_mask([(0, 0), (0, 1), (1, 1)]),
+                             tile_bit(3, 3), tile_bit(5, 0)])
+
+
+def test_every_placement_is_compiled():
+    """Every path from every start tile that stays inside the board has its own mask"""
+    assert len(FIGURE_MASKS) == 1405
+    assert all(mask.bit_count() in (4, 5) for mask in FIGURE_MASKS)
+
+
+def test_find_figures_matches_interpreter():
+    rng = random.Random(2024)
+
+    for _ in range(50):
+        board = BoardSchemaOut(color_distribution=random_board(rng))
+        f_color = rng.choice(list(Colors))
+
+        assert find_figures(board.color_distribution, f_color) == interpreter_figures(board, f_color)
+
+
+def test_find_figure_matches_interpreter():
+    rng = random.Random(7)
+
+    for _ in range(20):
+        board = BoardSchemaOut(color_distribution=random_board(rng))
+        f_color = rng.choice(list(Colors))
+        expected = interpreter_figures(board, f_color)
+
+        for fig in FigTypeAndDifficulty:
+            assert find_figure(fig, board.color_distribution, f_color) == [tiles for f, tiles in expected if f == fig]
+
+
+def test_incremental_swaps_match_full_scan():
+    """Random swaps on a tracked board, checked against a full scan in debug mode"""
+    rng = random.Random(11)
+    board = random_board(rng)
+    detector = IncrementalFigureDetector(debug=True)
+    detector.rescan(board, Colors.none)
+
+    for _ in range(300):
+        x1, y1, x2, y2 = (rng.randrange(6) for _ in range(4))
+        board[x1][y1], board[x2][y2] = board[x2][y2], board[x1][y1]
+
+        if rng.random() < 0.5:
+            figures = detector.swap((x1, y1), (x2, y2))
+        else:
+            figures = detector.update(board, Colors.none)
+
+        assert figures == find_figures(board, Colors.none)
+
+    assert detector.mismatches == 0
+    assert detector.full_scans == 1
+
+
+def test_incremental_update_falls_back_to_full_scan():
+    rng = random.Random(3)
+    board = random_board(rng)
+    detector = IncrementalFigureDetector()
+
+    detector.update(board, Colors.none)
+    assert detector.full_scans == 1
+
+    # The forbidden color changes which figures count in the whole board
+    assert detector.update(board, Colors.red) == find_figures(board, Colors.red)
+    assert detector.full_scans == 2
+
+    # Too many tiles changed
+    other_board = random_board(rng)
+    assert detector.update(other_board, Colors.red) == find_figures(other_board, Colors.red)
+    assert detector.full_scans == 3
+    assert detector.incremental_scans == 0
+
+
+def test_incremental_debug_mode_detects_mismatch():
+    rng = random.Random(4)
+    board = random_board(rng)
+    detector = IncrementalFigureDetector(debug=True)
+    detector.rescan(board, Colors.none)
+
+    # Corrupt the tracked figures, the next check repairs them
+    detector.formed = {}
+    detector.update(board, Colors.none)
+
+    assert detector.mismatches == 1
+    assert detector.figures() == find_figures(board, Colors.none)
@@ -2,6 +2,12 @@ from app.models.board_models import Board
 from app.db.enums import Colors
 from typing import Counter
 from unittest.mock import MagicMock, patch
+from app.db.board_encoding import encode_board, decode_board, migrate_board_encoding
+from app.db.db import Base
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+import json
 
 @patch('app.models.board_models.random.shuffle')
 def test_init_board(mocked_random_distribution):
@@ -34,3 +40,49 @@ def test_init_board(mocked_random_distribution):
 
     
 
+
+
+def test_encode_decode_board():
+    rows = [["red", "blue", "yellow", "green", "red", "blue"] for _ in range(6)]
+
+    encoded = encode_board(rows)
+    assert encoded == "rbygrb" * 6
+    assert decode_board(encoded) == rows
+    assert encode_board([[Colors(color) for color in row] for row in rows]) == encoded
+
+
+def test_compact_board_column():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    board = Board(game_id=1)
+    db.add(board)
+    db.commit()
+
+    stored = db.execute(text("SELECT color_distribution FROM board WHERE game_id = 1")).scalar()
+    assert len(stored) == 36
+    db.expire_all()
+    assert db.query(Board).first().color_distribution == board.color_distribution
+    db.close()
+
+
+def test_migrate_legacy_boards():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    rows = [["green", "blue", "yellow", "red", "red", "blue"] for _ in range(6)]
+    with engine.begin() as connection:
+        connection.execute(text("INSERT INTO board (game_id, color_distribution) VALUES (1, :board)"),
+                           {"board": json.dumps(rows)})
+        connection.execute(text("INSERT INTO board (game_id, color_distribution) VALUES (2, :board)"),
+                           {"board": "gbyrrb" * 6})
+
+    db = sessionmaker(bind=engine)()
+    # Legacy rows can still be read before migrating them
+    assert db.query(Board).filter(Board.game_id == 1).first().color_distribution == rows
+    db.close()
+
+    assert migrate_board_encoding(engine) == 1
+    assert migrate_board_encoding(engine) == 0
+    with engine.connect() as connection:
+        stored = connection.execute(text("SELECT color_distribution FROM board ORDER BY game_id")).scalars().all()
+    assert stored == ["gbyrrb" * 6, "gbyrrb" * 6]
@@ -0,0 +1,288 @@
+from fastapi import WebSocket
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from app.db.enums import GameStatus
+from app.engine.state import PlayMovement, DiscardFigure
+from app.engine.switcher_engine import SwitcherEngine
+from app.models.game_models import Game
+from app.schemas.game_schemas import LobbyGameSchema
+from app.services.broadcast_services import (Broadcast, BroadcastBackend, InMemoryBroadcastBackend,
+                                             SQLiteBroadcastBackend, create_broadcast_backend, game_channel,
+                                             channel_game_id, LOBBY_CHANNEL, TARGET_ALL, TARGET_FULL, TARGET_DELTA)
+from app.services.figure_services import figure_detectors, get_figure_detector
+from app.services.game_state_services import GameStateCache
+from app.services.lobby_services import lobby_index
+from app.services.websocket_services import GameManager, GameManagerRegistry, GameListManager, encode_message
+import httpx
+import json
+import os
+import pytest
+import random
+import socket
+import subprocess
+import sys
+import time
+
+API_DIR = Path(__file__).resolve().parent.parent
+# Seed of the games of the workers, the test deals the same cards to know the moves of the player in turn
+GAME_RNG_SEED = "1"
+
+
+@pytest.fixture
+def mock_websocket():
+    return MagicMock(spec=WebSocket)
+
+
+def test_channels():
+    assert channel_game_id(game_channel(7)) == 7
+    assert channel_game_id(LOBBY_CHANNEL) is None
+    assert isinstance(create_broadcast_backend("memory"), InMemoryBroadcastBackend)
+    with pytest.raises(ValueError):
+        create_broadcast_backend("redis")
+    # A backend that can't publish is never created
+    with pytest.raises(TypeError):
+        type("NoPublish", (BroadcastBackend,), {})()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_orders_frames_of_every_worker(tmp_path):
+    path = str(tmp_path / "broadcast.db")
+    old = SQLiteBroadcastBackend(path)
+    await old.publish(LOBBY_CHANNEL, TARGET_ALL, "before the workers")
+    workers = [SQLiteBroadcastBackend(path, poll_interval=3600), SQLiteBroadcastBackend(path, poll_interval=3600)]
+    received = [[], []]
+    for worker, frames in zip(workers, received):
+        worker.subscribe(frames.append)
+        await worker.start()
+
+    for i in range(3):
+        await workers[0].publish(game_channel(1), TARGET_FULL, f"a{i}", snapshot="board")
+        await workers[1].publish(game_channel(1), TARGET_DELTA, f"b{i}")
+    for worker in workers:
+        assert await worker.poll() == 6
+        assert await worker.poll() == 0
+        await worker.stop()
+    await old.stop()
+
+    # Every worker delivers the same frames in the same order, the ones published before it started are skipped
+    assert received[0] == received[1]
+    assert [broadcast.frame for broadcast in received[0]] == ["a0", "b0", "a1", "b1", "a2", "b2"]
+    assert received[0][0] == Broadcast(game_channel(1), TARGET_FULL, "a0", "board", workers[0].origin)
+    assert [workers[0].is_remote(broadcast) for broadcast in received[0][:2]] == [False, True]
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_prunes_old_frames(tmp_path):
+    backend = SQLiteBroadcastBackend(str(tmp_path / "broadcast.db"), retention=0)
+    await backend.publish(LOBBY_CHANNEL, TARGET_ALL, "old")
+    await backend.publish(LOBBY_CHANNEL, TARGET_ALL, "new")
+
+    frames = await backend._run(backend._fetch, 0)
+    await backend.stop()
+    assert [frame for _, _, _, frame, _, _ in frames] == ["new"]
+
+
+@pytest.mark.asyncio
+async def test_remote_frames_move_the_state_of_the_game(mock_websocket):
+    backend = InMemoryBroadcastBackend()
+    registry = GameManagerRegistry(backend=backend)
+    backend.subscribe(lambda broadcast: registry.deliver(channel_game_id(broadcast.channel), broadcast,
+                                                         backend.is_remote(broadcast)))
+    manager = registry[1]
+    await manager.connect(mock_websocket)
+
+    update = {"type": "state update", "version": 4, "message": "", "messages": [], "payload": {"board": "board"}}
+    game = {"type": "finish turn", "message": "Turno de Juan", "payload": {"id": 1}}
+    registry.deliver(1, Broadcast(game_channel(1), TARGET_FULL, encode_message(update), None, "other"), remote=True)
+    registry.deliver(1, Broadcast(game_channel(1), TARGET_ALL, encode_message(game), None, "other"), remote=True)
+    # Nobody here is connected to game 2, no manager is created for it
+    registry.deliver(2, Broadcast(game_channel(2), TARGET_ALL, encode_message(game), None, "other"), remote=True)
+    await manager.drain()
+
+    assert manager.version == 4
+    assert manager.state == {"board": "board", "game": {"id": 1}}
+    assert mock_websocket.send_text.call_count == 2
+    assert registry.get(2) is None
+
+    # The frames of this process go through the backend too, without touching the state again
+    await manager.broadcast({"type": "board", "message": "", "payload": "new board"}, snapshot="board")
+    await manager.drain()
+    assert manager.state["board"] == "board"
+    assert json.loads(mock_websocket.send_text.call_args[0][0])["payload"] == "new board"
+
+
+def test_remote_frames_forget_the_cached_game():
+    registry = GameManagerRegistry(backend=InMemoryBroadcastBackend())
+    frame = encode_message({"type": "board", "message": "", "payload": "board"})
+    game = MagicMock(spec=Game, id=1)
+    game.board.color_distribution = [["red", "blue"], ["blue", "red"]]
+    cache = GameStateCache(shared=False)
+
+    with patch("app.services.websocket_services.game_state_cache", cache):
+        cache.get_board(game)
+        get_figure_detector(game.id)
+
+        # Frames of this worker leave the game as it is
+        registry.deliver(game.id, Broadcast(game_channel(game.id), TARGET_ALL, frame, None, ""), remote=False)
+        assert game.id in cache.states and game.id in figure_detectors
+
+        # Another worker changed it, it's read again from the database
+        registry.deliver(game.id, Broadcast(game_channel(game.id), TARGET_ALL, frame, None, "other"), remote=True)
+        assert game.id not in cache.states and game.id not in figure_detectors
+
+
+@pytest.mark.asyncio
+async def test_finished_games_get_their_last_frames(mock_websocket):
+    backend = InMemoryBroadcastBackend()
+    registry = GameManagerRegistry(backend=backend)
+    backend.subscribe(lambda broadcast: registry.deliver(channel_game_id(broadcast.channel), broadcast, False))
+    manager = registry[1]
+    await manager.connect(mock_websocket)
+
+    registry.evict(1)
+    await manager.broadcast({"type": "game won", "message": "", "payload": {"player_id": 1}})
+    await manager.drain()
+
+    mock_websocket.send_text.assert_called_once()
+    manager.disconnect(mock_websocket)
+    registry.evict_idle()
+    assert registry.get(1) is None and not registry.finished
+
+
+@pytest.mark.asyncio
+async def test_remote_lobby_frames_update_the_index(mock_websocket):
+    lobby = GameListManager()
+    await lobby.connect(mock_websocket)
+    row = LobbyGameSchema(id=3, name="Partida", player_count=1, player_amount=4, status=GameStatus.waiting, host_id=1)
+
+    added = encode_message({"type": "game added", "message": "", "payload": row})
+    lobby.deliver(Broadcast(LOBBY_CHANNEL, TARGET_ALL, added, None, "other"), remote=True)
+    assert lobby_index.rows[3] == row
+
+    deleted = encode_message({"type": "game deleted", "message": "", "payload": row})
+    lobby.deliver(Broadcast(LOBBY_CHANNEL, TARGET_ALL, deleted, None, "other"), remote=True)
+    await lobby.connection_manager.drain()
+
+    assert 3 not in lobby_index.rows
+    assert [json.loads(call[0][0])["type"] for call in mock_websocket.send_text.call_args_list] == [
+        "game added", "game deleted"]
+
+
+# === Multi-worker ===
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_worker(env: dict, port: int) -> subprocess.Popen:
+    worker = subprocess.Popen([sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+                              cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/metrics").status_code == 200:
+                return worker
+        except httpx.TransportError:
+            time.sleep(0.1)
+    worker.kill()
+    pytest.fail(f"The worker on port {port} didn't start")
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two uvicorn processes on the same database and the same SQLite broadcast log"""
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{tmp_path / 'switcher.db'}", "BROADCAST_BACKEND": "sqlite",
+           "BROADCAST_SQLITE_PATH": str(tmp_path / "broadcast.db"), "PYTHONPATH": str(API_DIR),
+           "GAME_RNG_SEED": GAME_RNG_SEED}
+    started = []
+    try:
+        for _ in range(2):
+            port = free_port()
+            started.append(start_worker(env, port))
+            started[-1].port = port
+        yield [f"127.0.0.1:{worker.port}" for worker in started]
+    finally:
+        for worker in started:
+            worker.terminate()
+            worker.wait(10)
+
+
+def test_broadcasts_reach_every_worker(workers):
+    from websockets.sync.client import connect
+
+    worker_a, worker_b = workers
+
+    def create_player(name: str) -> dict:
+        return httpx.post(f"http://{worker_a}/players", json={"name": name}).json()
+
+    def as_player(player: dict) -> dict:
+        return {"Authorization": f"Bearer {player['token']}"}
+
+    def receive_types(websocket, amount: int) -> list:
+        return [json.loads(websocket.recv(timeout=5)).get("type") for _ in range(amount)]
+
+    juan, maria = create_player("Juan"), create_player("Maria")
+    with connect(f"ws://{worker_b}/ws/games") as lobby:
+        assert json.loads(lobby.recv(timeout=5))["type"] == "initial game list"
+
+        # Created in A, announced in the lobby of B
+        response = httpx.post(f"http://{worker_a}/games/", json={"name": "Partida", "player_amount": 2},
+                              headers=as_player(juan))
+        game_id = response.json()["id"]
+        added = json.loads(lobby.recv(timeout=5))
+        assert (added["type"], added["payload"]["id"]) == ("game added", game_id)
+
+        with connect(f"ws://{worker_b}/ws/games/{game_id}") as game:
+            assert json.loads(game.recv(timeout=5))["payload"]["id"] == game_id
+
+            for action in ("join", "quit", "join"):
+                assert httpx.put(f"http://{worker_a}/games/{game_id}/{action}",
+                                 headers=as_player(maria)).status_code == 200
+
+            # In the order the requests were served by A
+            assert receive_types(game, 3) == ["player connected", "player disconnected", "player connected"]
+            assert receive_types(lobby, 3) == ["game updated"] * 3
+
+    # The lobby index of B followed the games created in A
+    games = httpx.get(f"http://{worker_b}/games/lobby", headers=as_player(juan)).json()["games"]
+    assert [(game["id"], game["player_count"]) for game in games] == [(game_id, 2)]
+
+    # A game played on both workers, each action sees what the other worker did right before
+    started = httpx.put(f"http://{worker_a}/games/{game_id}/start", headers=as_player(juan)).json()["game"]
+    players = {player["id"]: player for player in (juan, maria)}
+    # The same seed deals the same game here
+    engine = SwitcherEngine(rng=random.Random(f"{GAME_RNG_SEED}:{game_id}"))
+    state = engine.new_game([(player["id"], player["name"]) for player in started["players"]])
+    assert state.turn == started["player_turn"]
+    player = players[state.player_in_turn.id]
+
+    # A movement that forms a figure of the hand, and another one to undo before
+    claim = next((movement, figure) for movement in engine.legal_movements(state)
+                 for figure in engine.formed_figures(engine.apply(state, movement)[0])
+                 if figure[0] in state.player_in_turn.figure_cards)
+    other = next(movement for movement in engine.legal_movements(state) if movement != claim[0])
+
+    def play(worker: str, movement: PlayMovement) -> int:
+        return httpx.put(f"http://{worker}/games/{game_id}/movement/add", headers=as_player(player), json={
+            "movement_card": {"movement_type": movement.movement_type.value, "associated_player": player["id"],
+                              "in_hand": True},
+            "piece_1_coordinates": {"x": movement.x1, "y": movement.y1},
+            "piece_2_coordinates": {"x": movement.x2, "y": movement.y2}}).status_code
+
+    figure, tiles = claim[1]
+    assert play(worker_b, other) == 200
+    assert httpx.put(f"http://{worker_a}/games/{game_id}/movement/back", headers=as_player(player)).status_code == 204
+    assert play(worker_a, claim[0]) == 200
+    response = httpx.put(f"http://{worker_b}/games/{game_id}/figure/discard", headers=as_player(player), json={
+        "figure_card": figure.value[0], "associated_player": player["id"], "figure_board": figure.value[0],
+        "clicked_x": tiles[0][0], "clicked_y": tiles[0][1]})
+    assert response.status_code == 200, response.text
+
+    finished = httpx.put(f"http://{worker_a}/games/{game_id}/finish-turn", headers=as_player(player)).json()["game"]
+    claimed, _ = engine.apply(engine.apply(state, claim[0])[0], DiscardFigure(player["id"], figure, *tiles[0]))
+    assert finished["player_turn"] == (state.turn + 1) % 2
+    assert finished["forbidden_color"] == claimed.forbidden_color.value
+    in_hand = next(seat for seat in finished["players"] if seat["id"] == player["id"])["figure_cards"]
+    assert len(in_hand) == 3
@@ -0,0 +1,87 @@
+from app.services.game_state_services import game_state_cache
+from app.services.figure_services import figure_detectors
+from app.services.lobby_services import lobby_index
+from app.services.turn_services import game_rngs
+from app.endpoints.websocket_endpoints import game_list_manager, game_connection_managers
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from app.main import app
+from app.db.db import Base, get_db, get_async_db, async_database_url
+from app.services.sql_profiler_services import parse_server_timing
+from unittest.mock import patch
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_game_state():
+    """
+    The state of each game is kept in memory by game id, and most tests use the same ids.
+    The lobby index starts empty instead of loading the database, and the sockets a test connects to the lobby
+    don't get the broadcasts of the next ones.
+    """
+    game_state_cache.clear()
+    figure_detectors.clear()
+    game_rngs.clear()
+    lobby_index.clear()
+    lobby_index.loaded = True
+    yield
+    game_state_cache.clear()
+    figure_detectors.clear()
+    game_rngs.clear()
+    lobby_index.clear()
+    game_list_manager.connection_manager.active_connections.clear()
+    game_list_manager.connection_manager.send_queues.clear()
+    game_connection_managers.clear()
+
+
+@pytest.fixture
+def database(tmp_path):
+    """
+    Database behind get_db and get_async_db, yields its session factory and the commits it receives.
+    The TestClient runs each request in a new event loop, the async connections are not pooled.
+    """
+    url = f"sqlite:///{tmp_path / 'switcher.db'}"
+    engine = create_engine(url, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    async_engine = create_async_engine(async_database_url(url), poolclass=NullPool)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    commits = []
+    for sync_engine in (engine, async_engine.sync_engine):
+        event.listen(sync_engine, "commit", lambda conn: commits.append(conn))
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield session_factory, commits
+    app.dependency_overrides = {}
+    engine.dispose()
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Turns the SQL profiler on and returns a check of the Server-Timing header of a response:
+    query_budget(response, statements=3) fails when the request sent more statements (or duplicates) than allowed.
+    """
+    def check(response, statements: int, duplicates: int = 0):
+        timing = parse_server_timing(response.headers["server-timing"])
+        sent, repeated = int(timing["db-statements"]["desc"]), int(timing["db-duplicates"]["desc"])
+        assert sent <= statements, f"{sent} sentencias SQL, el presupuesto es {statements}"
+        assert repeated <= duplicates, f"{repeated} sentencias SQL repetidas, el presupuesto es {duplicates}"
+        return sent, repeated
+
+    with patch("app.services.sql_profiler_services.SQL_PROFILER", True):
+        yield check
@@ -0,0 +1,110 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from unittest.mock import patch
+from app.main import app
+from app.db.enums import Colors, GameStatus
+from app.dependencies.dependencies import load_game, FULL_SNAPSHOT, TURN_ACTION
+from app.endpoints.game_endpoints import auth_scheme, async_auth_scheme
+from app.models.game_models import Game
+from app.models.player_models import Player
+from app.services.game_services import convert_game_to_schema, calculate_partial_board
+from app.services.game_state_services import game_state_cache
+from app.services.websocket_services import GameManagerRegistry
+import pytest
+
+client = TestClient(app)
+
+# Maximum number of SQL statements per endpoint, for a game of 4 players
+STATEMENT_BUDGETS = {
+    "start": 114,
+    "finish-turn": 8,
+    "movement/back": 7,
+}
+
+
+@pytest.fixture
+def database(database):
+    """The database of conftest with the statements it receives, from the sync and the async sessions"""
+    session_factory, _ = database
+    statements = []
+
+    def record(*args):
+        statements.append(args[2])
+
+    event.listen(Engine, "before_cursor_execute", record)
+    yield session_factory, statements
+    event.remove(Engine, "before_cursor_execute", record)
+
+
+def create_game(session_factory, player_amount: int = 4) -> int:
+    db = session_factory()
+    players = [Player(name=f"Jugador {i}") for i in range(player_amount)]
+    db.add_all(players)
+    db.commit()
+    game = Game(name="Partida", player_amount=player_amount, host_id=players[0].id, forbidden_color=Colors.none)
+    game.players.extend(players)
+    db.add(game)
+    db.commit()
+    game_id = game.id
+    db.close()
+    return game_id
+
+
+def player_in_turn(session_factory, game_id: int) -> Player:
+    db = session_factory()
+    game = db.get(Game, game_id)
+    player = game.players[game.player_turn]
+    db.expunge_all()
+    db.close()
+    return player
+
+
+def test_profiles_load_the_game_in_fixed_statements(database):
+    session_factory, statements = database
+    game_id = create_game(session_factory)
+    with patch("app.endpoints.game_endpoints.game_connection_managers", GameManagerRegistry()):
+        app.dependency_overrides[auth_scheme] = lambda: player_in_turn(session_factory, game_id)
+        assert client.put(f"/games/{game_id}/start").status_code == 200
+
+    counts = {}
+    for profile in (None, FULL_SNAPSHOT, TURN_ACTION):
+        game_state_cache.clear()
+        db = session_factory()
+        statements.clear()
+        game = load_game(game_id, db, profile)
+        convert_game_to_schema(game)
+        calculate_partial_board(game)
+        counts[profile] = len(statements)
+        db.close()
+
+    # game, players, movement cards, figure cards and movements, the board comes in the game query
+    assert counts[TURN_ACTION] == 5
+    assert counts[FULL_SNAPSHOT] == 6
+    # Without a profile every player loads its own cards
+    assert counts[None] == 12
+
+
+def test_endpoint_statement_budgets(database):
+    session_factory, statements = database
+    game_id = create_game(session_factory)
+
+    with patch("app.endpoints.game_endpoints.game_connection_managers", GameManagerRegistry()):
+        app.dependency_overrides[auth_scheme] = lambda: player_in_turn(session_factory, game_id)
+        app.dependency_overrides[async_auth_scheme] = app.dependency_overrides[auth_scheme]
+
+        statements.clear()
+        assert client.put(f"/games/{game_id}/start").status_code == 200
+        assert len(statements) <= STATEMENT_BUDGETS["start"]
+
+        statements.clear()
+        assert client.put(f"/games/{game_id}/finish-turn").status_code == 200
+        assert len(statements) <= STATEMENT_BUDGETS["finish-turn"]
+
+        statements.clear()
+        assert client.put(f"/games/{game_id}/movement/back").status_code == 400
+        assert len(statements) <= STATEMENT_BUDGETS["movement/back"]
+
+    db = session_factory()
+    assert db.get(Game, game_id).status == GameStatus.in_game
+    db.close()
@@ -0,0 +1,258 @@
+from app.engine.state import (PlayMovement, UndoMovement, FinishTurn, DiscardFigure, BlockFigure, QuitGame,
+                              MovementPlayed, GameWon, IllegalAction, FORBIDDEN, PRECONDITION_FAILED)
+from app.engine.switcher_engine import SwitcherEngine, check_swap
+from app.db.enums import Colors, FigTypeAndDifficulty, GameStatus, MovementType
+from app.db.figure_table import FIGURE_TABLE
+from collections import Counter
+import pytest
+import random
+import subprocess
+import sys
+
+PLAYERS = [(1, "Juan"), (2, "Maria"), (3, "Pedro")]
+
+
+def board_with_figure(fig: FigTypeAndDifficulty, color: Colors = Colors.red):
+    """Blue board with the first placement of the figure painted, the figure and its tiles"""
+    placement = FIGURE_TABLE[fig][0]
+    rows = [[Colors.blue] * 6 for _ in range(6)]
+    for x, y in placement.tiles:
+        rows[x][y] = color
+    board = tuple(tuple(row) for row in rows)
+    return board, placement.tiles
+
+
+def play_random_game(seed: int, max_actions: int = 300):
+    """Random bot: plays a legal movement, claims a figure if it can, or finishes the turn"""
+    engine = SwitcherEngine(seed)
+    bot = random.Random(seed)
+    state = engine.new_game(PLAYERS)
+    history = [state]
+    for _ in range(max_actions):
+        if state.status is not GameStatus.in_game:
+            break
+        seat = state.player_in_turn
+        claimable = [(fig, tiles) for fig, tiles in engine.formed_figures(state) if fig in seat.figure_cards]
+        if claimable:
+            fig, tiles = claimable[0]
+            action = DiscardFigure(seat.id, fig, *tiles[0])
+        elif seat.movement_cards and bot.random() < 0.7:
+            action = bot.choice(engine.legal_movements(state))
+        else:
+            action = FinishTurn(seat.id)
+        try:
+            state, _ = engine.apply(state, action)
+        except IllegalAction:
+            state, _ = engine.apply(state, FinishTurn(seat.id))
+        history.append(state)
+    return history
+
+
+def test_new_game():
+    state = SwitcherEngine(7).new_game(PLAYERS)
+
+    assert state.status is GameStatus.in_game
+    assert state.board == state.partial_board
+    assert Counter(color for row in state.board for color in row) == {color: 9 for color in
+                                                                      (Colors.red, Colors.blue, Colors.yellow, Colors.green)}
+    for seat in state.players:
+        assert len(seat.movement_cards) == 3
+        assert len(seat.figure_cards) == 3
+        assert len(seat.figure_cards) + len(seat.figure_deck) == 50 // len(PLAYERS)
+
+    all_figures = Counter(fig for seat in state.players for fig in seat.figure_cards + seat.figure_deck)
+    assert max(all_figures.values()) <= 2
+
+
+def test_same_seed_same_game():
+    assert play_random_game(11) == play_random_game(11)
+    assert play_random_game(11) != play_random_game(12)
+
+
+def test_play_and_undo_movement():
+    engine = SwitcherEngine(3)
+    state = engine.new_game(PLAYERS)
+    seat = state.player_in_turn
+    movement_type = seat.movement_cards[0]
+    action = next(move for move in engine.legal_movements(state) if move.movement_type == movement_type)
+
+    moved, events = engine.apply(state, action)
+
+    assert events == [MovementPlayed(seat.id, moved.partial_moves[0])]
+    assert moved.board == state.board
+    assert moved.partial_board[action.x1][action.y1] == state.board[action.x2][action.y2]
+    assert len(moved.player_in_turn.movement_cards) == 2
+
+    undone, _ = engine.apply(moved, UndoMovement(seat.id))
+
+    assert undone.partial_board == state.board
+    assert undone.partial_moves == ()
+    assert sorted(undone.player_in_turn.movement_cards, key=str) == sorted(seat.movement_cards, key=str)
+
+
+def test_movement_errors():
+    engine = SwitcherEngine(3)
+    state = engine.new_game(PLAYERS)
+    seat = state.player_in_turn
+    other = state.players[(state.turn + 1) % len(PLAYERS)]
+    move = engine.legal_movements(state)[0]
+
+    with pytest.raises(IllegalAction) as error:
+        engine.apply(state, move._replace(player_id=other.id))
+    assert error.value.reason == FORBIDDEN
+
+    with pytest.raises(IllegalAction, match="Movimiento invalido"):
+        engine.apply(state, PlayMovement(seat.id, MovementType.MOV_03, 0, 0, 5, 5))
+
+    with pytest.raises(IllegalAction, match="No hay movimientos parciales"):
+        engine.apply(state, UndoMovement(seat.id))
+
+
+def test_check_swap():
+    check_swap(MovementType.MOV_03, 0, 0, 0, 1)
+
+    with pytest.raises(IllegalAction, match="Movimiento invalido"):
+        check_swap(MovementType.MOV_03, 0, 0, 0, 2)
+
+
+def test_finish_turn_returns_partial_cards():
+    engine = SwitcherEngine(5)
+    state = engine.new_game(PLAYERS)
+    seat = state.player_in_turn
+    state, _ = engine.apply(state, engine.legal_movements(state)[0])
+
+    state, _ = engine.apply(state, FinishTurn(seat.id))
+
+    assert state.partial_board == state.board
+    assert sorted(state.players[state.seat_of(seat.id)].movement_cards, key=str) == sorted(seat.movement_cards, key=str)
+    assert state.player_in_turn.id != seat.id
+
+
+def test_discard_figure():
+    engine = SwitcherEngine(1)
+    state = engine.new_game(PLAYERS)
+    seat = state.player_in_turn
+    fig = seat.figure_cards[0]
+    board, tiles = board_with_figure(fig)
+    state = state._replace(board=board, partial_board=board)
+
+    state, events = engine.apply(state, DiscardFigure(seat.id, fig, *tiles[0]))
+
+    assert state.forbidden_color == Colors.red
+    assert len(state.player_in_turn.figure_cards) == 2
+    assert not any(isinstance(event, GameWon) for event in events)
+
+    # The figure is now of the forbidden color
+    with pytest.raises(IllegalAction, match="color prohibido"):
+        engine.apply(state, DiscardFigure(seat.id, state.player_in_turn.figure_cards[0], *tiles[0]))
+
+
+def test_discard_figure_not_formed():
+    engine = SwitcherEngine(1)
+    state = engine.new_game(PLAYERS)
+    seat = state.player_in_turn
+    board, tiles = board_with_figure(seat.figure_cards[0])
+    state = state._replace(board=board, partial_board=board)
+    outside = next((x, y) for x in range(6) for y in range(6) if (x, y) not in tiles)
+
+    with pytest.raises(IllegalAction, match="no esta formada"):
+        engine.apply(state, DiscardFigure(seat.id, seat.figure_cards[0], *outside))
+
+
+def test_last_figure_wins():
+    engine = SwitcherEngine(1)
+    state = engine.new_game(PLAYERS)
+    seat = state.player_in_turn
+    fig = seat.figure_cards[0]
+    board, tiles = board_with_figure(fig)
+    state = engine._replace_seat(state, state.turn, seat._replace(figure_cards=(fig,), figure_deck=()))
+    state = state._replace(board=board, partial_board=board)
+
+    state, events = engine.apply(state, DiscardFigure(seat.id, fig, *tiles[0]))
+
+    assert state.status is GameStatus.finished
+    assert state.winner == seat.id
+    assert events[-1] == GameWon(seat.id)
+
+    with pytest.raises(IllegalAction, match="comenzado"):
+        engine.apply(state, FinishTurn(seat.id))
+
+
+def test_block_figure():
+    engine = SwitcherEngine(2)
+    state = engine.new_game(PLAYERS)
+    seat = state.player_in_turn
+    target = state.players[(state.turn + 1) % len(PLAYERS)]
+    fig = target.figure_cards[0]
+    board, tiles = board_with_figure(fig)
+    state = state._replace(board=board, partial_board=board)
+
+    state, _ = engine.apply(state, BlockFigure(seat.id, target.id, fig, *tiles[0]))
+
+    blocked = state.players[state.seat_of(target.id)]
+    assert blocked.blocked
+    assert blocked.blocked_card == fig
+
+    with pytest.raises(IllegalAction, match="ya esta bloqueado"):
+        engine.apply(state, BlockFigure(seat.id, target.id, fig, *tiles[0]))
+
+
+def test_quit_game():
+    engine = SwitcherEngine(4)
+    state = engine.new_game(PLAYERS[:2])
+    seat = state.player_in_turn
+
+    state, events = engine.apply(state, QuitGame(seat.id))
+
+    assert state.status is GameStatus.finished
+    assert state.winner != seat.id
+    assert events[-1] == GameWon(state.winner)
+
+
+def test_quit_game_keeps_the_turn_index():
+    engine = SwitcherEngine(4)
+    players = PLAYERS + [(4, "Ana")]
+    state = engine.new_game(players)._replace(turn=1)
+    seat = state.player_in_turn
+    action = next(move for move in engine.legal_movements(state) if move.movement_type == seat.movement_cards[0])
+    state, _ = engine.apply(state, action)
+
+    # The turn passes to the player after the one in turn, who gets back the card of the move
+    state, _ = engine.apply(state, QuitGame(players[0][0]))
+
+    assert state.turn == 1
+    assert state.player_in_turn.id == players[2][0]
+    assert state.partial_moves == () and state.partial_board == state.board
+    assert Counter(state.players[0].movement_cards) == Counter(seat.movement_cards)
+
+    # The last seat leaves while in turn, the first one plays
+    state = state._replace(turn=2)
+    state, _ = engine.apply(state, QuitGame(players[3][0]))
+    assert state.turn == 0
+    assert state.status is GameStatus.in_game
+
+
+def test_discard_blocked_card():
+    engine = SwitcherEngine(1)
+    state = engine.new_game(PLAYERS)
+    seat = state.player_in_turn
+    fig = seat.figure_cards[0]
+    board, tiles = board_with_figure(fig)
+    state = state._replace(board=board, partial_board=board)
+
+    blocked = engine._replace_seat(state, state.turn, seat._replace(blocked=True, blocked_card=fig))
+    with pytest.raises(IllegalAction, match="carta bloqueada") as error:
+        engine.apply(blocked, DiscardFigure(seat.id, fig, *tiles[0]))
+    assert error.value.reason == FORBIDDEN
+
+    # Only a blocked player has a blocked card
+    unblocked = engine._replace_seat(state, state.turn, seat._replace(blocked_card=fig))
+    with pytest.raises(IllegalAction) as error:
+        engine.apply(unblocked, DiscardFigure(seat.id, fig, *tiles[0]))
+    assert error.value.reason == PRECONDITION_FAILED
+
+
+def test_engine_does_not_import_web_or_orm():
+    code = ("import sys, app.engine.switcher_engine; "
+            "assert not {'fastapi', 'sqlalchemy'} & set(sys.modules), sorted(sys.modules)")
+    subprocess.run([sys.executable, "-c", code], check=True)
@@ -0,0 +1,106 @@
+from unittest.mock import MagicMock, patch
+from app.db.board_encoding import encode_board
+from app.db.enums import Colors
+from app.models.game_models import Game
+from app.schemas.board_schemas import BoardSchemaOut
+from app.services.bitboard_services import board_to_masks, find_figures, placements_to_figures
+from app.services.figure_scan_services import FigureScanPool, scan_board
+from app.services.figure_services import get_all_figures_in_board, get_figure_detector, request_figures_in_board
+import asyncio
+import pytest
+import random
+import time
+
+
+def random_board(rng: random.Random):
+    colors = [Colors.red] * 9 + [Colors.blue] * 9 + [Colors.yellow] * 9 + [Colors.green] * 9
+    rng.shuffle(colors)
+    return [colors[i:i + 6] for i in range(0, 36, 6)]
+
+
+@pytest.fixture
+def mock_game():
+    game = MagicMock(spec=Game)
+    game.id = 1
+    game.forbidden_color = Colors.none
+    return game
+
+
+def test_scan_board_matches_full_scan():
+    rng = random.Random(7)
+    for _ in range(20):
+        board = random_board(rng)
+        for f_color in (Colors.none, Colors.red):
+            formed = scan_board(encode_board(board), f_color.value)
+            assert placements_to_figures(formed.values()) == find_figures(board, f_color)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["inline", "thread", "process"])
+async def test_pool_scan(kind):
+    board = random_board(random.Random(3))
+    pool = FigureScanPool(kind=kind, workers=1)
+
+    formed = await pool.scan(encode_board(board), Colors.none.value)
+    pool.shutdown()
+
+    assert placements_to_figures(formed.values()) == find_figures(board, Colors.none)
+    assert pool.stats()["latency"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_full_scans_go_to_the_pool(mock_game):
+    board = random_board(random.Random(5))
+    with patch("app.services.figure_services.calculate_partial_board", return_value=BoardSchemaOut(color_distribution=board)):
+        # New game: the full scan runs in the pool
+        task = request_figures_in_board(mock_game)
+        assert isinstance(task, asyncio.Task)
+        figures = await task
+
+        # Same board: the detector is up to date and answers right away
+        assert request_figures_in_board(mock_game) == figures
+
+    detector = get_figure_detector(mock_game.id)
+    assert detector.masks == board_to_masks(board)
+    assert (detector.full_scans, detector.incremental_scans) == (1, 1)
+    # Without a running loop the scan stays inline
+    detector.masks = None
+    with patch("app.services.figure_services.calculate_partial_board", return_value=BoardSchemaOut(color_distribution=board)):
+        assert await asyncio.to_thread(get_all_figures_in_board, mock_game) == figures
+
+
+@pytest.mark.asyncio
+async def test_bounded_queue_keeps_the_loop_responsive():
+    pool = FigureScanPool(kind="thread", workers=2, queue_size=1)
+    running = []
+
+    def slow_scan(tiles, forbidden_color):
+        running.append(pool.in_flight)
+        time.sleep(0.05)
+        return {}
+
+    ticks = 0
+    done = False
+
+    async def heartbeat():
+        nonlocal ticks
+        while not done:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    with patch("app.services.figure_scan_services.scan_board", side_effect=slow_scan):
+        scans = [asyncio.create_task(pool.scan("", Colors.none.value)) for _ in range(6)]
+        await asyncio.sleep(0.01)
+        # 2 workers and 1 place in the queue, the other 3 scans wait to be submitted
+        assert (pool.in_flight, pool.waiting) == (3, 3)
+        await asyncio.gather(*scans)
+    done = True
+    await heartbeat_task
+    pool.shutdown()
+
+    assert max(running) <= 3
+    latency = pool.stats()["latency"]
+    assert latency["count"] == 6
+    assert latency["max"] >= 0.1      # the last scans waited for a free slot
+    assert ticks >= 15
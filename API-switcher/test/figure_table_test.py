@@ -0,0 +1,65 @@
+from app.db.figure_table import FIGURE_TABLE, PLACEMENTS, export_figure_table
+from app.services.figure_services import get_path_valid
+from app.schemas.board_schemas import BoardSchemaOut
+from app.schemas.movement_schema import Coordinate
+from app.db.constants import VALID_PATHS
+from app.db.enums import FigTypeAndDifficulty, Colors
+import json
+import pytest
+
+
+def interpreter_placements():
+    """
+    Run the path interpreter on a board of a single color: every path that stays inside
+    the board is valid, so we get every placement the interpreter can ever produce.
+    """
+    board = BoardSchemaOut(color_distribution=[[Colors.red] * 6 for _ in range(6)])
+    placements = {}
+    for fig in FigTypeAndDifficulty:
+        placements[fig.value[0]] = []
+        for rotation, path in enumerate(VALID_PATHS[fig.value[0]]):
+            for x in range(6):
+                for y in range(6):
+                    tiles = get_path_valid(path=path, board=board, start=Coordinate(x=x, y=y), f_color=Colors.none)
+                    if tiles:
+                        placements[fig.value[0]].append({"rotation": rotation, "start": [x, y],
+                                                         "tiles": [[tile.x, tile.y] for tile in tiles]})
+    return placements
+
+
+def test_table_matches_interpreter():
+    exported = export_figure_table()
+
+    without_neighbours = {fig: [{key: value for key, value in placement.items() if key != "neighbours"}
+                                for placement in placements]
+                          for fig, placements in exported.items()}
+
+    assert without_neighbours == interpreter_placements()
+
+
+def test_table_neighbours():
+    """The neighbours are the in-bounds tiles next to the figure that don't belong to it"""
+    for placement in PLACEMENTS:
+        for x, y in placement.neighbours:
+            assert 0 <= x < 6 and 0 <= y < 6
+            assert (x, y) not in placement.tile_set
+            assert any(abs(x - tx) + abs(y - ty) == 1 for tx, ty in placement.tile_set)
+
+    fig05 = FIGURE_TABLE[FigTypeAndDifficulty.FIG_05][0]
+    assert fig05.start == (0, 0)
+    assert fig05.neighbours == frozenset({(1, 0), (1, 1), (1, 2), (1, 3), (1, 4), (0, 5)})
+
+
+def test_table_is_immutable():
+    with pytest.raises(TypeError):
+        FIGURE_TABLE[FigTypeAndDifficulty.FIG_01] = ()
+
+    assert isinstance(FIGURE_TABLE[FigTypeAndDifficulty.FIG_01], tuple)
+    assert isinstance(PLACEMENTS[0].tile_set, frozenset)
+
+
+def test_export_is_json():
+    exported = export_figure_table()
+
+    assert json.loads(json.dumps(exported)) == exported
+    assert sum(len(placements) for placements in exported.values()) == len(PLACEMENTS)
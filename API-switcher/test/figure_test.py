@@ -2,7 +2,8 @@ from unittest.mock import MagicMock, patch
 from app.models.game_models import Game
 from app.models.player_models import Player
 from app.models.figure_card_model import FigureCard
-from app.services.figure_services import get_all_figures_in_board
+from app.services.figure_services import get_all_figures_in_board, get_figure_detector, forget_figure_detector
+from app.schemas.board_schemas import BoardSchemaOut
 from app.db.enums import FigTypeAndDifficulty, Colors
 from app.models.board_models import Board
 from app.schemas.movement_schema import Coordinate
@@ -305,4 +306,37 @@ def test_get_figures_in_board_fc(mock_game_3):
         response = convert_tiles_to_set(response)
         expected_response = convert_tiles_to_set(expected_response)
 
-        assert response == expected_response
\ No newline at end of file
+        assert response == expected_response
+
+def test_get_figures_in_board_incremental(mock_game_1):
+    """
+    The detector of the game is reused: after swapping two tiles only the region around them is re-evaluated.
+    """
+    forget_figure_detector(mock_game_1.id)
+    color_distribution = [[Colors.red, Colors.red, Colors.red, Colors.red, Colors.red, Colors.yellow],
+                  [Colors.yellow, Colors.blue, Colors.blue, Colors.blue, Colors.yellow, Colors.red],
+                  [Colors.yellow, Colors.yellow, Colors.green, Colors.blue, Colors.yellow, Colors.green],
+                  [Colors.green, Colors.yellow, Colors.yellow, Colors.blue, Colors.yellow, Colors.red],
+                  [Colors.green, Colors.green, Colors.green, Colors.green, Colors.yellow, Colors.yellow],
+                  [Colors.blue, Colors.blue, Colors.blue, Colors.blue, Colors.blue, Colors.blue]]
+
+    with patch('app.services.figure_services.calculate_partial_board') as mock_calculate_partial_board:
+        mock_calculate_partial_board.return_value = BoardSchemaOut(color_distribution=color_distribution)
+        first_response = get_all_figures_in_board(mock_game_1)
+
+        # Swap (0, 4) and (0, 5): the red line of fig05 is broken
+        swapped = [row[:] for row in color_distribution]
+        swapped[0][4], swapped[0][5] = swapped[0][5], swapped[0][4]
+        mock_calculate_partial_board.return_value = BoardSchemaOut(color_distribution=swapped)
+        second_response = get_all_figures_in_board(mock_game_1)
+
+    detector = get_figure_detector(mock_game_1.id)
+    assert detector.full_scans == 1
+    assert detector.incremental_scans == 1
+
+    assert FigTypeAndDifficulty.FIG_05 in [figure.fig for figure in first_response]
+    assert FigTypeAndDifficulty.FIG_05 not in [figure.fig for figure in second_response]
+    # The yellow tile now touches fig08 and the four red tiles left form fige06
+    assert [figure.fig for figure in second_response] == [FigTypeAndDifficulty.FIG_04, FigTypeAndDifficulty.FIG_06,
+                                                          FigTypeAndDifficulty.FIG_07, FigTypeAndDifficulty.FIGE_06]
+    forget_figure_detector(mock_game_1.id)
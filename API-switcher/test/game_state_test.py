@@ -0,0 +1,217 @@
+from unittest.mock import MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.db.db import Base
+from app.db.enums import Colors, GameStatus
+from app.models.board_models import Board
+from app.models.game_models import Game
+from app.models.player_models import Player
+from app.services.game_state_services import GameStateCache, encode_tiles, decode_tiles
+import asyncio
+import pytest
+
+
+ROW = ["red", "blue", "yellow", "green", "red", "blue"]
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+@pytest.fixture
+def mock_game():
+    mock_player = MagicMock()
+    mock_player.movements = [
+        MagicMock(id=2, x1=0, y1=1, x2=0, y2=2, final_movement=False),
+        MagicMock(id=1, x1=0, y1=0, x2=0, y2=1, final_movement=False),
+        MagicMock(id=3, x1=5, y1=5, x2=4, y2=4, final_movement=True),
+    ]
+    game = MagicMock(spec=Game)
+    game.id = 1
+    game.player_turn = 0
+    game.players = [mock_player]
+    game.board = MagicMock(spec=Board)
+    game.board.color_distribution = [ROW[:] for _ in range(6)]
+    return game
+
+
+def test_encode_decode_tiles():
+    tiles, width = encode_tiles([ROW[:] for _ in range(6)])
+
+    assert len(tiles) == 36 and width == 6
+    assert decode_tiles(tiles, width) == [[Colors(color) for color in ROW] for _ in range(6)]
+
+
+def test_partial_board_replays_movements_once(mock_game):
+    cache = GameStateCache()
+
+    board = cache.get_partial_board(mock_game)
+
+    # (0,0)<->(0,1) and then (0,1)<->(0,2), the final movement is not applied
+    assert board.color_distribution[0][:3] == [Colors.blue, Colors.yellow, Colors.red]
+    assert board.color_distribution[5][5] == Colors.blue
+    assert cache.get_partial_moves(mock_game) == [(0, 0, 0, 1), (0, 1, 0, 2)]
+
+    # Next reads don't look at the orm objects anymore
+    mock_game.players = []
+    mock_game.board.color_distribution = None
+    assert cache.get_partial_board(mock_game) == board
+    assert cache.get_board(mock_game).color_distribution[0][:3] == [Colors.red, Colors.blue, Colors.yellow]
+
+
+def test_add_and_undo_move_in_place(mock_game):
+    cache = GameStateCache()
+    cache.get_partial_board(mock_game)
+
+    cache.add_move(mock_game.id, 1, 0, 2, 3)
+    board = cache.get_partial_board(mock_game)
+    assert board.color_distribution[1][0] == Colors.green
+    assert board.color_distribution[2][3] == Colors.red
+    assert cache.get_partial_moves(mock_game)[-1] == (1, 0, 2, 3)
+
+    cache.undo_move(mock_game.id)
+    cache.undo_move(mock_game.id)
+    cache.undo_move(mock_game.id)
+    assert cache.get_partial_board(mock_game) == cache.get_board(mock_game)
+
+    cache.undo_move(mock_game.id)
+    assert cache.get_partial_moves(mock_game) == []
+
+
+def test_updates_on_games_not_cached_are_ignored(mock_game):
+    cache = GameStateCache()
+
+    cache.add_move(mock_game.id, 0, 0, 1, 1)
+    cache.undo_move(mock_game.id)
+    cache.clear_moves(mock_game.id)
+
+    assert cache.states == {}
+    assert cache.get_partial_moves(mock_game) == [(0, 0, 0, 1), (0, 1, 0, 2)]
+
+
+def test_shared_cache_keeps_nothing(mock_game):
+    cache = GameStateCache(shared=True)
+
+    assert cache.get_partial_moves(mock_game) == [(0, 0, 0, 1), (0, 1, 0, 2)]
+    cache.commit_board(mock_game.id, [ROW[::-1] for _ in range(6)])
+    assert cache.states == {} and not cache.pending_flushes
+
+    # Another worker claimed a figure: the next read sees the game as it's now in the database
+    mock_game.players = [MagicMock(movements=[])]
+    mock_game.board.color_distribution = [ROW[::-1] for _ in range(6)]
+    assert cache.get_partial_moves(mock_game) == []
+    assert cache.get_partial_board(mock_game).color_distribution[0] == [Colors(color) for color in ROW[::-1]]
+
+
+def test_commit_board_is_flushed(session_factory):
+    db = session_factory()
+    game = Game(name="game", player_amount=2, status=GameStatus.in_game, forbidden_color=Colors.none)
+    db.add(game)
+    db.commit()
+    board = Board(game.id)
+    db.add(board)
+    db.commit()
+
+    cache = GameStateCache(session_factory=session_factory)
+    new_board = [ROW[:] for _ in range(6)]
+
+    # Without a running loop the board is written right away
+    cache.commit_board(game.id, new_board)
+
+    assert not cache.states[game.id].dirty
+    db.expire_all()
+    assert db.query(Board).filter(Board.game_id == game.id).first().color_distribution == new_board
+    assert cache.get_partial_board(game) == cache.get_board(game)
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_commit_board_write_behind(session_factory):
+    db = session_factory()
+    game = Game(name="game", player_amount=2, status=GameStatus.in_game, forbidden_color=Colors.none)
+    db.add(game)
+    db.commit()
+    db.add(Board(game.id))
+    db.commit()
+
+    cache = GameStateCache(session_factory=session_factory)
+    first_board = [ROW[:] for _ in range(6)]
+    second_board = [ROW[::-1] for _ in range(6)]
+
+    cache.commit_board(game.id, first_board)
+    cache.commit_board(game.id, second_board)
+    assert cache.states[game.id].dirty
+
+    # Back-to-back commits share the pending flush, which writes the last board
+    while cache.pending_flushes:
+        await list(cache.pending_flushes.values())[0]
+
+    assert not cache.states[game.id].dirty
+    db.expire_all()
+    assert db.query(Board).filter(Board.game_id == game.id).first().color_distribution == second_board
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_backs_off_and_gives_up(session_factory, caplog):
+    db = session_factory()
+    game = Game(name="game", player_amount=2, status=GameStatus.in_game, forbidden_color=Colors.none)
+    db.add(game)
+    db.commit()
+    db.add(Board(game.id))
+    db.commit()
+    game_id = game.id
+    db.close()
+
+    def locked_session():
+        session = MagicMock()
+        session.commit.side_effect = Exception("database is locked")
+        return session
+
+    attempts = MagicMock(side_effect=locked_session)
+    cache = GameStateCache(session_factory=attempts, flush_retries=3, flush_backoff=0.01)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+
+    cache.commit_board(game_id, [ROW[:] for _ in range(6)])
+    await cache.pending_flushes[game_id]
+
+    # The first write and three retries, waiting 0.01 + 0.02 + 0.04 seconds, then the board is left dirty
+    assert attempts.call_count == 4
+    assert loop.time() - start >= 0.07
+    assert cache.states[game_id].dirty and not cache.pending_flushes
+    assert "no se pudo guardar" in caplog.text
+
+    # The next change of the board tries again
+    cache.session_factory = session_factory
+    cache.commit_board(game_id, [ROW[::-1] for _ in range(6)])
+    await cache.pending_flushes[game_id]
+    assert not cache.states[game_id].dirty
+
+
+@pytest.mark.asyncio
+async def test_release_waits_for_the_board_to_be_saved(session_factory, mock_game):
+    db = session_factory()
+    game = Game(name="game", player_amount=2, status=GameStatus.in_game, forbidden_color=Colors.none)
+    db.add(game)
+    db.commit()
+    db.add(Board(game.id))
+    db.commit()
+    game_id = game.id
+    db.close()
+
+    cache = GameStateCache(session_factory=session_factory)
+    cache.get_board(mock_game)
+    cache.release(mock_game.id)
+    assert mock_game.id not in cache.states
+
+    cache.commit_board(game_id, [ROW[:] for _ in range(6)])
+    cache.release(game_id)
+    # Dirty, it stays until the write ends
+    assert game_id in cache.states
+    await cache.pending_flushes[game_id]
+    assert game_id not in cache.states and not cache.releasing
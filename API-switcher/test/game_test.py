@@ -2,7 +2,7 @@ from unittest.mock import MagicMock, patch, AsyncMock
 from fastapi.testclient import TestClient
 import pytest
 from app.main import app
-from app.db.db import get_db
+from app.db.db import get_db, get_async_db
 from app.db.enums import GameStatus, MovementType, FigTypeAndDifficulty, Colors
 from app.models.board_models import Board
 from app.schemas.figure_schema import FigureInBoardSchema, FigTypeAndDifficulty, Coordinate, FigureToDiscardSchema
@@ -13,11 +13,16 @@ from app.schemas.figure_schema import FigureInBoardSchema
 from app.models.player_models import Player
 from app.models.movement_card_model import MovementCard
 from app.models.movement_model import Movement
-from app.dependencies.dependencies import get_game
-from app.endpoints.game_endpoints import auth_scheme
-from app.services.game_services import initialize_figure_decks, erase_figure_card, has_figure_card
+from app.dependencies.dependencies import get_game, get_async_game
+from app.endpoints.game_endpoints import auth_scheme, async_auth_scheme
+from app.services.game_services import initialize_figure_decks
 from app.endpoints.game_endpoints import discard_figure_card
-from app.services.movement_services import delete_movement_cards_not_in_hand
+from app.services.bitboard_services import find_figures
+from app.engine.switcher_engine import random_board, build_figure_decks
+from app.services.game_state_services import game_state_cache
+from helpers import as_async_session
+import itertools
+import random
 
 
 client = TestClient(app)
@@ -523,127 +528,120 @@ def test_get_games_invalid_status():
 
 
 # ------------------------------------------------- TESTS DE START GAME ---------------------------------------------------------
-def test_start_game_movement():
+@pytest.fixture
+def waiting_game(database):
+    """Game of three players waiting to start, in the in-memory database. Returns its host."""
+    session_factory, _ = database
+    db = session_factory()
+    players = [Player(name="Juan", blocked=False), Player(name="Pedro", blocked=False),
+               Player(name="Maria", blocked=False)]
+    db.add_all(players)
+    db.commit()
+    game = Game(name="Game 1", player_amount=3, status=GameStatus.waiting, host_id=players[0].id,
+                player_turn=0, forbidden_color=Colors.none)
+    game.players.extend(players)
+    db.add(game)
+    db.commit()
+    host = db.get(Player, players[0].id)
+    db.expunge_all()
+    db.close()
+    app.dependency_overrides[auth_scheme] = lambda: host
     with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager:
-        mock_db = MagicMock()
+        mock_manager[1].broadcast_game_start = AsyncMock(return_value=None)
+        mock_manager[1].broadcast_figures_in_board = AsyncMock(return_value=None)
+        mock_manager[1].broadcast_board = AsyncMock(return_value=None)
+        yield host
+
+
+def test_start_game_movement(database, waiting_game):
+    session_factory, _ = database
+
+    # Cartas de movimiento predefinidas para cada jugador
+    mock_movement_choices = [
+        MovementType.MOV_01,
+        MovementType.MOV_02,
+        MovementType.MOV_03,
+        MovementType.MOV_04,
+        MovementType.MOV_05,
+        MovementType.MOV_06,
+        MovementType.MOV_07,
+        MovementType.MOV_01,
+        MovementType.MOV_02,
+    ]
 
-        # Crear lista de jugadores
-        mock_list_players = [
-            Player(id=1, name="Juan", game_id=1,
-                   movement_cards=[], blocked=False),
-            Player(id=2, name="Pedro", game_id=1,
-                   movement_cards=[], blocked=False),
-            Player(id=3, name="Maria", game_id=1,
-                   movement_cards=[], blocked=False)
-        ]
+    # El generador de la partida reparte las cartas predefinidas y el primer turno es de Maria
+    mock_rng = MagicMock(randrange=MagicMock(return_value=2),
+                         choice=MagicMock(side_effect=lambda x: mock_movement_choices.pop(0)))
+    with patch('app.services.action_services.get_game_rng', return_value=mock_rng), \
+            patch('app.services.action_services.initialize_figure_decks', return_value=None):
+        # Llamar a la API para iniciar el juego
+        response = client.put("/games/1/start")
+    assert response.status_code == 200
 
-        # Cartas de movimiento predefinidas para cada jugador
-        mock_movement_choices = [
-            MovementType.MOV_01,
-            MovementType.MOV_02,
-            MovementType.MOV_03,
-            MovementType.MOV_04,
-            MovementType.MOV_05,
-            MovementType.MOV_06,
-            MovementType.MOV_07,
-            MovementType.MOV_01,
-            MovementType.MOV_02,
-        ]
+    # Verificar que cada jugador tiene 3 cartas movimiento, insertadas en una sola sentencia
+    db = session_factory()
+    for player in db.query(Player).all():
+        assert len(player.movement_cards) == 3
+    db.close()
 
-        with patch('random.randint', return_value=2):
-            mock_game = Game(id=1, players=mock_list_players, player_amount=3,
-                             name="Game 1", status=GameStatus.waiting, host_id=1, forbidden_color=Colors.none)
-
-            mock_manager[mock_game.id].broadcast_game_start = AsyncMock(
-                return_value=None)
-            mock_manager[mock_game.id].broadcast_figures_in_board = AsyncMock(
-                return_value=None)
-            mock_manager[mock_game.id].broadcast_board = AsyncMock(
-                return_value=None)
-
-            mock_player = Player(id=1, name="Juan", blocked=False)
-            # Mockear random.choice para que siempre devuelva las cartas predefinidas
-            with patch('random.choice', side_effect=lambda x: mock_movement_choices.pop(0)), \
-                    patch('app.endpoints.game_endpoints.initialize_figure_decks', return_value=None), \
-                    patch('app.endpoints.game_endpoints.deal_figure_cards_to_player', return_value=None):
-                mock_game = Game(id=1, players=mock_list_players, player_amount=3,
-                                 name="Game 1", status="waiting", host_id=1, player_turn=0, forbidden_color=Colors.none)
-
-                app.dependency_overrides[get_db] = lambda: mock_db
-                app.dependency_overrides[get_game] = lambda: mock_game
-                app.dependency_overrides[auth_scheme] = lambda: mock_player
-                # Llamar a la API para iniciar el juego
-                response = client.put(
-                    "/games/1/start", params={"id_player": 1})
-                assert response.status_code == 200
-
-                # Verificar que cada jugador tiene 3 cartas movimiento
-                for player in mock_game.players:
-                    assert len(player.movement_cards) == 3
-
-                # Verificar que no se le recargan cartas figura a los jugadores bloqueados (Juan)
-                if player.id == 1 and player.blocked:
-                    assert len(player.figure_cards) == 2
-
-            # Validar la estructura de la respuesta esperada
-            expected_response = {
-                "message": "La partida ha comenzado",
-                "game": {
-                    "id": 1,
-                    "name": "Game 1",
-                    "player_amount": 3,
-                    "status": "in game",
-                    "forbidden_color": "none",
-                    "host_id": 1,
-                    "player_turn": 2,
-                    "players": [{
-                        "id": 1,
-                        "name": "Juan",
-                        "movement_cards": [
-                            {"movement_type": "mov01",
-                             "associated_player": 1, "in_hand": True},
-                            {"movement_type": "mov02",
-                             "associated_player": 1, "in_hand": True},
-                            {"movement_type": "mov03",
-                             "associated_player": 1, "in_hand": True},
-                        ],
-                        "figure_cards": [],
-                        "blocked": False
-                    },
-                        {
-                        "id": 2,
-                            "name": "Pedro",
-                            "movement_cards": [
-                                {"movement_type": "mov04",
-                                 "associated_player": 2, "in_hand": True},
-                                {"movement_type": "mov05",
-                                 "associated_player": 2, "in_hand": True},
-                                {"movement_type": "mov06",
-                                 "associated_player": 2, "in_hand": True},
-                            ],
-                            "figure_cards": [],
-                            "blocked": False
-                    },
-                        {
-                        "id": 3,
-                            "name": "Maria",
-                            "movement_cards": [
-                                {"movement_type": "mov07",
-                                 "associated_player": 3, "in_hand": True},
-                                {"movement_type": "mov01",
-                                 "associated_player": 3, "in_hand": True},
-                                {"movement_type": "mov02",
-                                 "associated_player": 3, "in_hand": True},
-                            ],
-                            "figure_cards": [],
-                            "blocked": False
-                    },
+    # Validar la estructura de la respuesta esperada
+    expected_response = {
+        "message": "La partida ha comenzado",
+        "game": {
+            "id": 1,
+            "name": "Game 1",
+            "player_amount": 3,
+            "status": "in game",
+            "forbidden_color": "none",
+            "host_id": 1,
+            "player_turn": 2,
+            "players": [{
+                "id": 1,
+                "name": "Juan",
+                "movement_cards": [
+                    {"movement_type": "mov01",
+                     "associated_player": 1, "in_hand": True},
+                    {"movement_type": "mov02",
+                     "associated_player": 1, "in_hand": True},
+                    {"movement_type": "mov03",
+                     "associated_player": 1, "in_hand": True},
+                ],
+                "figure_cards": [],
+                "blocked": False
+            },
+                {
+                "id": 2,
+                    "name": "Pedro",
+                    "movement_cards": [
+                        {"movement_type": "mov04",
+                         "associated_player": 2, "in_hand": True},
+                        {"movement_type": "mov05",
+                         "associated_player": 2, "in_hand": True},
+                        {"movement_type": "mov06",
+                         "associated_player": 2, "in_hand": True},
                     ],
-                },
-            }
+                    "figure_cards": [],
+                    "blocked": False
+            },
+                {
+                "id": 3,
+                    "name": "Maria",
+                    "movement_cards": [
+                        {"movement_type": "mov07",
+                         "associated_player": 3, "in_hand": True},
+                        {"movement_type": "mov01",
+                         "associated_player": 3, "in_hand": True},
+                        {"movement_type": "mov02",
+                         "associated_player": 3, "in_hand": True},
+                    ],
+                    "figure_cards": [],
+                    "blocked": False
+            },
+            ],
+        },
+    }
 
-            assert response.json() == expected_response
-    app.dependency_overrides = {}
+    assert response.json() == expected_response
 
 
 def test_start_game_incorrect_player_amount():
@@ -675,114 +673,76 @@ def test_start_game_incorrect_player_amount():
 
 # ------------------------------------------------- TESTS DE CARTAS DE FIGURA ----------------------------------------------------
 
-def test_start_game_figure_deal():
-    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager:
-        mock_db = MagicMock()
-
-        # Crear lista de jugadores
-        mock_list_players = [
-            Player(id=1, name="Juan", game_id=1,
-                   movement_cards=[], blocked=False),
-            Player(id=2, name="Pedro", game_id=1,
-                   movement_cards=[], blocked=False),
-            Player(id=3, name="Maria", game_id=1,
-                   movement_cards=[], blocked=False)
-        ]
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3,
-                         name="Game 1", status=GameStatus.waiting, host_id=1, forbidden_color=Colors.none)
-
-        mock_player = Player(id=1, name="Juan", blocked=False)
-
-        def mock_deck_per_player(game: Game, db: MagicMock):
-            for player in mock_game.players:
-                player.figure_cards = [
-                    FigureCard(type_and_difficulty=FigTypeAndDifficulty.FIG_01,
-                               associated_player=player.id, in_hand=False, blocked=False),
-                    FigureCard(type_and_difficulty=FigTypeAndDifficulty.FIG_02,
-                               associated_player=player.id, in_hand=False, blocked=False),
-                    FigureCard(type_and_difficulty=FigTypeAndDifficulty.FIG_03,
-                               associated_player=player.id, in_hand=False, blocked=False),
-                    FigureCard(type_and_difficulty=FigTypeAndDifficulty.FIG_04,
-                               associated_player=player.id, in_hand=False, blocked=False),
-                ]
-
-        # We are not testing the dealing of movement cards in this test, nor the initialization of the deck itself.
-        with patch('app.endpoints.game_endpoints.deal_initial_movement_cards', return_value=None), \
-                patch('random.choice', side_effect=lambda x: x.pop(0)), \
-                patch('app.endpoints.game_endpoints.initialize_figure_decks', side_effect=mock_deck_per_player), \
-                patch('random.randint', return_value=2):
-
-            mock_manager[mock_game.id].broadcast_game_start = AsyncMock(
-                return_value=None)
-            mock_manager[mock_game.id].broadcast_figures_in_board = AsyncMock(
-                return_value=None)
-            mock_manager[mock_game.id].broadcast_board = AsyncMock(
-                return_value=None)
-
-            app.dependency_overrides[get_db] = lambda: mock_db
-            app.dependency_overrides[get_game] = lambda: mock_game
-            app.dependency_overrides[auth_scheme] = lambda: mock_player
-
-            response = client.put("games/1/start")
-            assert response.status_code == 200
+def test_start_game_figure_deal(waiting_game):
+    deck = [FigTypeAndDifficulty.FIG_01, FigTypeAndDifficulty.FIG_02,
+            FigTypeAndDifficulty.FIG_03, FigTypeAndDifficulty.FIG_04]
+
+    # We are not testing the dealing of movement cards in this test, nor the initialization of the deck itself.
+    # The hand is the top of the deck
+    with patch('app.services.action_services.deal_initial_movement_cards', return_value=None), \
+            patch('app.engine.switcher_engine.build_figure_decks', return_value=[deck[:], deck[:], deck[:]]), \
+            patch('app.services.action_services.get_game_rng',
+                  return_value=MagicMock(randrange=MagicMock(return_value=2))):
+        response = client.put("games/1/start")
+    assert response.status_code == 200
 
-            expected_response = {
-                "message": "La partida ha comenzado",
-                "game": {
+    expected_response = {
+        "message": "La partida ha comenzado",
+        "game": {
+            "id": 1,
+            "name": "Game 1",
+            "player_amount": 3,
+            "status": "in game",
+            "forbidden_color": "none",
+            "host_id": 1,
+            "player_turn": 2,
+            "players": [{
                     "id": 1,
-                    "name": "Game 1",
-                    "player_amount": 3,
-                    "status": "in game",
-                    "forbidden_color": "none",
-                    "host_id": 1,
-                    "player_turn": 2,
-                    "players": [{
-                            "id": 1,
-                            "name": "Juan",
-                            "movement_cards": [],
-                            "figure_cards": [
-                                    {"type": ['fig01', 'difficult'],
-                                        "associated_player": 1, "blocked": False},
-                                    {"type": ['fig02', 'difficult'],
-                                        "associated_player": 1, "blocked": False},
-                                    {"type": ['fig03', 'difficult'],
-                                        "associated_player": 1, "blocked": False},
-                            ],
-                        "blocked": False
-                    },
-                        {
-                        "id": 2,
-                        "name": "Pedro",
-                                "movement_cards": [],
-                                "figure_cards": [
-                                    {"type": ['fig01', 'difficult'],
-                                        "associated_player": 2, "blocked": False},
-                                    {"type": ['fig02', 'difficult'],
-                                        "associated_player": 2, "blocked": False},
-                                    {"type": ['fig03', 'difficult'],
-                                        "associated_player": 2, "blocked": False},
-                                ],
-                        "blocked": False
-                    },
-                        {
-                        "id": 3,
-                        "name": "Maria",
-                                "movement_cards": [],
-                                "figure_cards": [
-                                    {"type": ['fig01', 'difficult'],
-                                        "associated_player": 3, "blocked": False},
-                                    {"type": ['fig02', 'difficult'],
-                                        "associated_player": 3, "blocked": False},
-                                    {"type": ['fig03', 'difficult'],
-                                        "associated_player": 3, "blocked": False},
-                                ],
-                        "blocked": False
-                    },
+                    "name": "Juan",
+                    "movement_cards": [],
+                    "figure_cards": [
+                            {"type": ['fig01', 'difficult'],
+                                "associated_player": 1, "blocked": False},
+                            {"type": ['fig02', 'difficult'],
+                                "associated_player": 1, "blocked": False},
+                            {"type": ['fig03', 'difficult'],
+                                "associated_player": 1, "blocked": False},
                     ],
-                },
-            }
+                "blocked": False
+            },
+                {
+                "id": 2,
+                "name": "Pedro",
+                        "movement_cards": [],
+                        "figure_cards": [
+                            {"type": ['fig01', 'difficult'],
+                                "associated_player": 2, "blocked": False},
+                            {"type": ['fig02', 'difficult'],
+                                "associated_player": 2, "blocked": False},
+                            {"type": ['fig03', 'difficult'],
+                                "associated_player": 2, "blocked": False},
+                        ],
+                "blocked": False
+            },
+                {
+                "id": 3,
+                "name": "Maria",
+                        "movement_cards": [],
+                        "figure_cards": [
+                            {"type": ['fig01', 'difficult'],
+                                "associated_player": 3, "blocked": False},
+                            {"type": ['fig02', 'difficult'],
+                                "associated_player": 3, "blocked": False},
+                            {"type": ['fig03', 'difficult'],
+                                "associated_player": 3, "blocked": False},
+                        ],
+                "blocked": False
+            },
+            ],
+        },
+    }
 
-        assert response.json() == expected_response
+    assert response.json() == expected_response
     app.dependency_overrides = {}
 
 
@@ -790,7 +750,9 @@ def test_initialization_deck():
     deck_list = []
 
     mock_db = MagicMock()
-    mock_db.add.side_effect = lambda x: deck_list.append(x)
+    # Every card goes in the rows of a single INSERT
+    mock_db.execute.side_effect = lambda statement, rows: deck_list.extend(
+        FigureCard(**row) for row in rows)
 
     # Crear lista de jugadores
     mock_list_players = [
@@ -805,7 +767,7 @@ def test_initialization_deck():
     app.dependency_overrides[get_db] = lambda: mock_db
     app.dependency_overrides[get_game] = lambda: mock_game
 
-    initialize_figure_decks(mock_game, mock_db)
+    initialize_figure_decks(mock_game, mock_db, build_figure_decks(3))
 
     # with patch('random.choice', side_effect=lambda x: x.pop(0)):
     #    initialize_figure_decks(mock_game, mock_db)
@@ -824,6 +786,10 @@ def test_initialization_deck():
     repeated_cards = list(filter(lambda x: deck_list.count(x) > 2, deck_list))
     assert repeated_cards == []
 
+    # Every figure is at most twice in the game
+    card_types = [card.type_and_difficulty for card in deck_list]
+    assert max(card_types.count(card_type) for card_type in card_types) <= 2
+
     invalid_cards = list(filter(lambda x: x.type_and_difficulty.value not in [
                          type.value for type in FigTypeAndDifficulty], deck_list))
     assert invalid_cards == []
@@ -831,172 +797,54 @@ def test_initialization_deck():
     app.dependency_overrides = {}
 
 
-def unitest_test_delete_movement_cards_not_in_hand():
-    # Crear mock para la sesión de la base de datos
-    mock_db = MagicMock()
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
-
-    # Crear mock para las cartas de movimiento
-    movement_card_in_hand = MagicMock(spec=MovementCard)
-    movement_card_in_hand.in_hand = True
-    # Ajusta según el MovementType real
-    movement_card_in_hand.movement_type = MovementType.MOV_01
-
-    movement_card_not_in_hand = MagicMock(spec=MovementCard)
-    movement_card_not_in_hand.in_hand = False
-    # Ajusta según el MovementType real
-    movement_card_not_in_hand.movement_type = MovementType.MOV_01
-
-    # Crear mock para el jugador
-    player = MagicMock(spec=Player)
-    player.movement_cards = [movement_card_in_hand, movement_card_not_in_hand]
-
-    # Llamar a la función
-    delete_movement_cards_not_in_hand(player, mock_db)
-
-    # Verificar que se haya eliminado la carta de movimiento que no estaba en mano
-    mock_db.delete.assert_called_with(movement_card_not_in_hand)
-
-    # Verificar que el commit se haya llamado después de eliminar
-    mock_db.commit.assert_called_once()
-
-    # Verificar que se haya refrescado el jugador después de la eliminación
-    mock_db.refresh.assert_called_once_with(player)
-
-
-def unitest_test_erase_figure_card():
-    # Crear mock para la sesión de la base de datos
-    mock_db = MagicMock()
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
-
-    # Crear una carta de figura para el test
-    figure_card = MagicMock(spec=FigureCard)
-    # Ajusta el valor según el tipo de carta
-    figure_card.type_and_difficulty = FigTypeAndDifficulty.FIG_01
-
-    # Crear mock para el jugador
-    player = MagicMock(spec=Player)
-    player.figure_cards = [figure_card]
-
-    # Crear un esquema de carta de figura
-    figure_schema = MagicMock()
-    # Asegúrate de que coincida
-    figure_schema.type_and_difficulty = FigTypeAndDifficulty.FIG_01
-
-    # Llamar a la función
-    erase_figure_card(player, figure_schema, mock_db)
+def board_with_figure():
+    """
+    The board of the first seed that forms a figure, with that figure and one of its tiles.
+    The engine checks the figures in the board, so the cards of the tests are of this figure.
+    """
+    for seed in itertools.count():
+        board = random_board(random.Random(seed))
+        figures = find_figures(board, Colors.none)
+        if figures:
+            figure, tiles = figures[0]
+            return Board(1, [[color.value for color in row] for row in board]), figure, tiles[0]
 
-    # Verificar que la carta de figura fue eliminada de la lista de cartas del jugador
-    assert figure_card not in player.figure_cards
 
-    # Verificar que la carta de figura fue eliminada de la base de datos
-    mock_db.delete.assert_called_with(figure_card)
-
-    # Verificar que se haya hecho commit después de la eliminación
-    mock_db.commit.assert_called_once()
-
-
-def unitest_test_has_figure_card():
-    # Crear mock para la carta de figura
-    figure_card_1 = MagicMock(spec=FigureCard)
-    figure_card_1.type_and_difficulty = FigTypeAndDifficulty.FIG_01
-    figure_card_1.associated_player = 1
-
-    figure_card_2 = MagicMock(spec=FigureCard)
-    figure_card_2.type_and_difficulty = FigTypeAndDifficulty.FIG_02
-    figure_card_2.associated_player = 2
-
-    # Crear mock para el jugador con un conjunto de cartas de figura
-    player = MagicMock(spec=Player)
-    player.figure_cards = [figure_card_1, figure_card_2]
-
-    # Crear el esquema de carta de figura que queremos buscar
-    figure_card_schema = FigureCardSchema(
-        type=FigTypeAndDifficulty.FIG_01,  # Debe coincidir con 'figure_card_1'
-        associated_player=1  # Debe coincidir con 'figure_card_1'
-    )
-
-    # Llamar a la función
-    result = has_figure_card(player, figure_card_schema)
-
-    # Verificar que el resultado sea True, ya que el jugador tiene la carta
-    assert result is True
-
-    # Cambiar el esquema de la carta para que no coincida
-    figure_card_schema = FigureCardSchema(
-        type=FigTypeAndDifficulty.FIG_03,  # No coincide con ninguna carta del jugador
-        associated_player=3  # No coincide con ninguna carta del jugador
-    )
-
-    # Llamar a la función nuevamente
-    result = has_figure_card(player, figure_card_schema)
-
-    # Verificar que el resultado sea False, ya que el jugador no tiene la carta
-    assert result is False
+def other_figure(figure):
+    return next(fig for fig in FigTypeAndDifficulty if fig != figure)
 
 
 def test_discard_figure_card():
     mock_db = MagicMock()
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
+    board, figure, (x, y) = board_with_figure()
 
     mock_figure_card = [
-        FigureCard(id=1, type_and_difficulty=FigTypeAndDifficulty.FIG_01,
+        FigureCard(id=1, type_and_difficulty=figure,
                    associated_player=3, in_hand=True),
-        FigureCard(id=2, type_and_difficulty=FigTypeAndDifficulty.FIG_02,
+        FigureCard(id=2, type_and_difficulty=other_figure(figure),
                    associated_player=3, in_hand=True)
     ]
 
-    mock_board = MagicMock()
-    mock_board.color_distribution = [[Colors.red]]  # Use Colors.red directly
-
     mock_list_players = [
         Player(id=1, name="Juan"),
         Player(id=2, name="Pedro"),
         Player(id=3, name="Maria", figure_cards=mock_figure_card)
     ]
 
-    mock_game = Game(id=1, players=mock_list_players, player_amount=3,
+    mock_game = Game(id=1, board=board, players=mock_list_players, player_amount=3,
                      name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2, forbidden_color=Colors.none)
 
-    mock_game.board = mock_board
+    ugly_figure_data = FigureToDiscardSchema(
+        figure_card=figure.value[0], associated_player=3, figure_board=figure.value[0], clicked_x=x, clicked_y=y)
 
-    mock_db.merge.return_value = mock_list_players[2]
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
-    ugly_figure_data = FigureToDiscardSchema(
-        figure_card=FigTypeAndDifficulty.FIG_01.value[0], associated_player=3, figure_board=FigTypeAndDifficulty.FIG_01.value[0], clicked_x=0, clicked_y=0)
-    real_figure_in_board = FigureInBoardSchema(
-        fig=FigTypeAndDifficulty.FIG_01, tiles=[])
-    real_figure_card = FigureCardSchema(
-        type=FigTypeAndDifficulty.FIG_01, associated_player=3, blocked=False)
+    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
+            patch("app.endpoints.game_endpoints.publish_game_event") as mock_publish:
 
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
-
-    with patch('app.endpoints.game_endpoints.get_figure_in_board') as mock_get_figure_in_board, \
-            patch('app.endpoints.game_endpoints.calculate_partial_board') as mock_calculate_partial_board, \
-            patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
-            patch("app.endpoints.game_endpoints.erase_figure_card") as mock_erase, \
-            patch("app.endpoints.game_endpoints.serialize_board") as mock_serialize_board:
-
-        mock_get_figure_in_board.return_value = [real_figure_in_board]
-        mock_calculate_partial_board.return_value = mock_board
-        mock_serialize_board.return_value = [
-            ["red"]]  # Mock the serialized board
-
-        mock_erase.return_value = None
-        mock_manager[mock_game].broadcast_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game_won = AsyncMock(
-            return_value=None)
-        mock_manager[mock_game.id].broadcast_figures_in_board = AsyncMock(
+        mock_manager[mock_game.id].broadcast_game_won = AsyncMock(
             return_value=None)
 
         response = client.put("/games/1/figure/discard",
@@ -1005,71 +853,79 @@ def test_discard_figure_card():
         assert response.status_code == 200
         assert response.json() == {
             "message": "Carta figura descartada con exito"}
-        mock_erase.assert_called_once_with(
-            player=mock_list_players[2], figure=real_figure_card, db=mock_db)
+        # La carta descartada se borra y el color de la figura pasa a ser el prohibido
+        assert [card.type_and_difficulty for card in mock_list_players[2].figure_cards] == [other_figure(figure)]
+        mock_db.delete.assert_called_once_with(mock_figure_card[0])
         mock_manager[mock_game.id].broadcast_game_won.assert_not_called()
-        assert mock_game.forbidden_color == Colors.red
-        mock_erase.assert_called_once_with(
-            player=mock_list_players[2], figure=real_figure_card, db=mock_db)
+        assert mock_game.forbidden_color == Colors(board.color_distribution[x][y])
+    app.dependency_overrides = {}
 
 
-def test_discard_figure_card_victory():
+def test_discard_figure_card_failed_commit_keeps_the_board():
     mock_db = MagicMock()
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
-
-    mock_figure_card = [FigureCard(
-        id=1, type_and_difficulty=FigTypeAndDifficulty.FIG_01, associated_player=3, in_hand=True)]
-
-    mock_board = MagicMock()
-    mock_board.color_distribution = [[Colors.red]]
+    mock_db.commit.side_effect = RuntimeError("database is locked")
+    board, figure, (x, y) = board_with_figure()
 
+    mock_figure_card = [
+        FigureCard(id=1, type_and_difficulty=figure,
+                   associated_player=3, in_hand=True),
+        FigureCard(id=2, type_and_difficulty=other_figure(figure),
+                   associated_player=3, in_hand=True)
+    ]
     mock_list_players = [
         Player(id=1, name="Juan"),
         Player(id=2, name="Pedro"),
         Player(id=3, name="Maria", figure_cards=mock_figure_card)
     ]
+    mock_game = Game(id=1, board=board, players=mock_list_players, player_amount=3,
+                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2, forbidden_color=Colors.none)
 
-    mock_game = Game(id=1, players=mock_list_players, player_amount=3,
-                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+    ugly_figure_data = FigureToDiscardSchema(
+        figure_card=figure.value[0], associated_player=3, figure_board=figure.value[0], clicked_x=x, clicked_y=y)
 
-    mock_game.board = mock_board
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
-    mock_db.merge.return_value = mock_list_players[2]
+    with patch("app.endpoints.game_endpoints.game_connection_managers"), \
+            patch.object(game_state_cache, "commit_board") as mock_commit_board:
 
-    ugly_figure_data = FigureToDiscardSchema(
-        figure_card=FigTypeAndDifficulty.FIG_01.value[0], associated_player=3, figure_board=FigTypeAndDifficulty.FIG_01.value[0], clicked_x=0, clicked_y=0)
-    real_figure_in_board = FigureInBoardSchema(
-        fig=FigTypeAndDifficulty.FIG_01, tiles=[])
-    real_figure_card = FigureCardSchema(
-        type=FigTypeAndDifficulty.FIG_01, associated_player=3, blocked=False)
+        with pytest.raises(RuntimeError):
+            client.put("/games/1/figure/discard", json=ugly_figure_data.model_dump())
 
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        # The movements are still partial in the database, the cache keeps the board it had
+        mock_commit_board.assert_not_called()
+    app.dependency_overrides = {}
 
-    with patch('app.endpoints.game_endpoints.get_figure_in_board') as mock_get_figure_in_board, \
-        patch('app.endpoints.game_endpoints.calculate_partial_board') as mock_calculate_partial_board, \
-            patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
-            patch("app.endpoints.game_endpoints.erase_figure_card") as mock_erase:
 
-        mock_get_figure_in_board.return_value = [real_figure_in_board]
-        mock_calculate_partial_board.return_value = mock_board
+def test_discard_figure_card_victory():
+    mock_db = MagicMock()
+    board, figure, (x, y) = board_with_figure()
 
-        def side_effect(player, figure, db):
-            player.figure_cards = [
-                card for card in player.figure_cards if card.type_and_difficulty != figure.type]
+    mock_figure_card = [FigureCard(
+        id=1, type_and_difficulty=figure, associated_player=3, in_hand=True)]
 
-        mock_erase.return_value = None
-        mock_erase.side_effect = side_effect
-        mock_manager[mock_game].broadcast_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
+    mock_list_players = [
+        Player(id=1, name="Juan"),
+        Player(id=2, name="Pedro"),
+        Player(id=3, name="Maria", figure_cards=mock_figure_card)
+    ]
 
-        mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game_won = AsyncMock(
-            return_value=None)
-        mock_manager[mock_game.id].broadcast_figures_in_board = AsyncMock(
+    mock_game = Game(id=1, board=board, players=mock_list_players, player_amount=3,
+                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2, forbidden_color=Colors.none)
+
+    ugly_figure_data = FigureToDiscardSchema(
+        figure_card=figure.value[0], associated_player=3, figure_board=figure.value[0], clicked_x=x, clicked_y=y)
+
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
+
+    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
+            patch("app.endpoints.game_endpoints.publish_game_event"), \
+            patch("app.services.action_services.publish_game_event") as mock_publish:
+
+        mock_manager[mock_game.id].broadcast_game_won = AsyncMock(
             return_value=None)
 
         response = client.put("/games/1/figure/discard",
@@ -1078,60 +934,41 @@ def test_discard_figure_card_victory():
         assert response.status_code == 200
         assert response.json() == {
             "message": "Carta figura descartada con exito"}
-        mock_erase.assert_called_once_with(
-            player=mock_list_players[2], figure=real_figure_card, db=mock_db)
-        mock_manager[mock_game.id].broadcast_game_won.assert_called_once()
+        # Sin cartas en la mano ni en el mazo, Maria gana
+        mock_manager[mock_game.id].broadcast_game_won.assert_called_once_with(mock_game, mock_list_players[2])
+        mock_db.delete.assert_any_call(mock_game)
+        assert mock_publish.call_args[0][0] == "game deleted"
+    app.dependency_overrides = {}
 
 
 def test_discard_figure_card_blocked():
     mock_db = MagicMock()
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
+    board, figure, (x, y) = board_with_figure()
 
     mock_figure_card = [
-        FigureCard(id=1, type_and_difficulty=FigTypeAndDifficulty.FIG_01,
+        FigureCard(id=1, type_and_difficulty=figure,
                    associated_player=3, in_hand=True, blocked=True),
-        FigureCard(id=2, type_and_difficulty=FigTypeAndDifficulty.FIG_02,
+        FigureCard(id=2, type_and_difficulty=other_figure(figure),
                    associated_player=3, in_hand=True, blocked=False),
     ]
 
-    mock_board = MagicMock()
-    mock_board.color_distribution = [[Colors.red]]
-
     mock_list_players = [
         Player(id=1, name="Juan"),
         Player(id=2, name="Pedro"),
         Player(id=3, name="Maria", figure_cards=mock_figure_card, blocked=True)
     ]
 
-    mock_game = Game(id=1, players=mock_list_players, player_amount=3,
-                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
-
-    mock_game.board = mock_board
-
-    mock_db.merge.return_value = mock_list_players[2]
+    mock_game = Game(id=1, board=board, players=mock_list_players, player_amount=3,
+                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2, forbidden_color=Colors.none)
 
     ugly_figure_data = FigureToDiscardSchema(
-        figure_card=FigTypeAndDifficulty.FIG_01.value[0], associated_player=3, figure_board=FigTypeAndDifficulty.FIG_01.value[0], clicked_x=0, clicked_y=0)
-    real_figure_in_board = FigureInBoardSchema(
-        fig=FigTypeAndDifficulty.FIG_01, tiles=[])
-
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
-
-    with patch('app.endpoints.game_endpoints.get_figure_in_board') as mock_get_figure_in_board, \
-        patch('app.endpoints.game_endpoints.calculate_partial_board') as mock_calculate_partial_board, \
-            patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
-            patch("app.endpoints.game_endpoints.erase_figure_card") as mock_erase:
+        figure_card=figure.value[0], associated_player=3, figure_board=figure.value[0], clicked_x=x, clicked_y=y)
 
-        mock_get_figure_in_board.return_value = [real_figure_in_board]
-        mock_calculate_partial_board.return_value = mock_board
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
-        mock_erase.return_value = None
-        mock_manager[mock_game].broadcast_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
+    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager:
 
         response = client.put("/games/1/figure/discard",
                               json=ugly_figure_data.model_dump())
@@ -1139,57 +976,39 @@ def test_discard_figure_card_blocked():
         assert response.status_code == 403
         assert response.json() == {
             "detail": "No puedes descartar una carta bloqueada."}
-        mock_erase.assert_not_called()
+        mock_db.delete.assert_not_called()
+    app.dependency_overrides = {}
 
 
 def test_unlock_and_discard_figure_card():
     mock_db = MagicMock()
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
+    board, figure, (x, y) = board_with_figure()
 
-    mock_figure_card = [FigureCard(
-        id=1, type_and_difficulty=FigTypeAndDifficulty.FIG_01, associated_player=1, in_hand=True, blocked=True)]
-
-    mock_board = MagicMock()
-    mock_board.color_distribution = [[Colors.red]]
+    # Juan esta bloqueado, al quedarle una sola carta se desbloquea y la puede descartar
+    mock_figure_card = [
+        FigureCard(id=1, type_and_difficulty=figure, associated_player=1, in_hand=True, blocked=True),
+        FigureCard(id=2, type_and_difficulty=figure, associated_player=1, in_hand=True, blocked=False),
+        FigureCard(id=3, type_and_difficulty=other_figure(figure), associated_player=1, in_hand=False,
+                   blocked=False),
+    ]
 
     mock_list_players = [
         Player(id=1, name="Juan", figure_cards=mock_figure_card, blocked=True),
+        Player(id=2, name="Pedro"),
     ]
 
-    mock_game = Game(id=1, players=mock_list_players, player_amount=1,
-                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=0)
-
-    mock_game.board = mock_board
-
-    mock_db.merge.return_value = mock_list_players[0]
+    mock_game = Game(id=1, board=board, players=mock_list_players, player_amount=2,
+                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=0, forbidden_color=Colors.none)
 
     ugly_figure_data = FigureToDiscardSchema(
-        figure_card=FigTypeAndDifficulty.FIG_01.value[0], associated_player=1, figure_board=FigTypeAndDifficulty.FIG_01.value[0], clicked_x=0, clicked_y=0)
-    real_figure_in_board = FigureInBoardSchema(
-        fig=FigTypeAndDifficulty.FIG_01, tiles=[])
-    real_figure_card = FigureCardSchema(
-        type=FigTypeAndDifficulty.FIG_01, associated_player=1, blocked=False)
-
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_list_players[0]
+        figure_card=figure.value[0], associated_player=1, figure_board=figure.value[0], clicked_x=x, clicked_y=y)
 
-    with patch('app.endpoints.game_endpoints.get_figure_in_board') as mock_get_figure_in_board, \
-        patch('app.endpoints.game_endpoints.calculate_partial_board') as mock_calculate_partial_board, \
-            patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
-            patch("app.endpoints.game_endpoints.erase_figure_card") as mock_erase:
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[0]
 
-        mock_get_figure_in_board.return_value = [real_figure_in_board]
-        mock_calculate_partial_board.return_value = mock_board
-
-        mock_erase.return_value = None
-        mock_manager[mock_game].broadcast_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_figures_in_board = AsyncMock(
-            return_value=None)
+    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
+            patch("app.endpoints.game_endpoints.publish_game_event") as mock_publish:
 
         response = client.put("/games/1/figure/discard",
                               json=ugly_figure_data.model_dump())
@@ -1197,64 +1016,52 @@ def test_unlock_and_discard_figure_card():
         assert response.status_code == 200
         assert response.json() == {
             "message": "Carta figura descartada con exito"}
-        mock_erase.assert_called_once_with(
-            player=mock_list_players[0], figure=real_figure_card, db=mock_db)
+        # The blocked card is kept and freed, the player stays blocked while it has cards in hand
+        mock_db.delete.assert_called_once_with(mock_figure_card[1])
+        assert not mock_figure_card[0].blocked
+        assert mock_list_players[0].blocked
+
+        # The forbidden color is the one of the figure, clear it to claim it again
+        mock_game.forbidden_color = Colors.none
+        response = client.put("/games/1/figure/discard",
+                              json=ugly_figure_data.model_dump())
+
+        assert response.status_code == 200
+        assert not mock_list_players[0].blocked
+        assert mock_list_players[0].figure_cards == [mock_figure_card[2]]
+    app.dependency_overrides = {}
 
 
 def test_discard_figure_card_when_other_equal_figure_is_in_hand():
     mock_db = MagicMock()
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
+    board, figure, (x, y) = board_with_figure()
 
     mock_figure_card = [
-        FigureCard(id=1, type_and_difficulty=FigTypeAndDifficulty.FIG_01,
+        FigureCard(id=1, type_and_difficulty=figure,
                    associated_player=1, in_hand=True, blocked=True),
-        FigureCard(id=2, type_and_difficulty=FigTypeAndDifficulty.FIG_01,
+        FigureCard(id=2, type_and_difficulty=figure,
                    associated_player=1, in_hand=True, blocked=False),
-        FigureCard(id=3, type_and_difficulty=FigTypeAndDifficulty.FIG_02,
+        FigureCard(id=3, type_and_difficulty=other_figure(figure),
                    associated_player=1, in_hand=True, blocked=False),
     ]
 
-    mock_board = MagicMock()
-    mock_board.color_distribution = [[Colors.red]]
-
     mock_list_players = [
         Player(id=1, name="Juan", figure_cards=mock_figure_card, blocked=True),
+        Player(id=2, name="Pedro"),
     ]
 
-    mock_game = Game(id=1, players=mock_list_players, player_amount=1,
-                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=0)
-
-    mock_game.board = mock_board
-
-    mock_db.merge.return_value = mock_list_players[0]
+    mock_game = Game(id=1, board=board, players=mock_list_players, player_amount=2,
+                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=0, forbidden_color=Colors.none)
 
     ugly_figure_data = FigureToDiscardSchema(
-        figure_card=FigTypeAndDifficulty.FIG_01.value[0], associated_player=1, figure_board=FigTypeAndDifficulty.FIG_01.value[0], clicked_x=0, clicked_y=0)
-    real_figure_in_board = FigureInBoardSchema(
-        fig=FigTypeAndDifficulty.FIG_01, tiles=[])
-    real_figure_card = FigureCardSchema(
-        type=FigTypeAndDifficulty.FIG_01, associated_player=1, blocked=False)
+        figure_card=figure.value[0], associated_player=1, figure_board=figure.value[0], clicked_x=x, clicked_y=y)
 
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_list_players[0]
-
-    with patch('app.endpoints.game_endpoints.get_figure_in_board') as mock_get_figure_in_board, \
-        patch('app.endpoints.game_endpoints.calculate_partial_board') as mock_calculate_partial_board, \
-            patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
-            patch("app.endpoints.game_endpoints.erase_figure_card") as mock_erase:
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[0]
 
-        mock_get_figure_in_board.return_value = [real_figure_in_board]
-        mock_calculate_partial_board.return_value = mock_board
-
-        mock_erase.return_value = None
-        mock_manager[mock_game].broadcast_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_figures_in_board = AsyncMock(
-            return_value=None)
+    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
+            patch("app.endpoints.game_endpoints.publish_game_event") as mock_publish:
 
         response = client.put("/games/1/figure/discard",
                               json=ugly_figure_data.model_dump())
@@ -1262,59 +1069,40 @@ def test_discard_figure_card_when_other_equal_figure_is_in_hand():
         assert response.status_code == 200
         assert response.json() == {
             "message": "Carta figura descartada con exito"}
-        mock_erase.assert_called_once_with(
-            player=mock_list_players[0], figure=real_figure_card, db=mock_db)
+        # Se descarta la carta que no esta bloqueada
+        mock_db.delete.assert_called_once_with(mock_figure_card[1])
+        assert mock_figure_card[0].blocked
+    app.dependency_overrides = {}
 
 
 def test_discard_non_blocked_user_and_blocked_card():
     mock_db = MagicMock()
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
+    board, figure, (x, y) = board_with_figure()
 
     mock_figure_card = [
-        FigureCard(id=1, type_and_difficulty=FigTypeAndDifficulty.FIG_01,
+        FigureCard(id=1, type_and_difficulty=figure,
                    associated_player=3, in_hand=True, blocked=True),
-        FigureCard(id=2, type_and_difficulty=FigTypeAndDifficulty.FIG_02,
+        FigureCard(id=2, type_and_difficulty=other_figure(figure),
                    associated_player=3, in_hand=True, blocked=False),
     ]
 
-    mock_board = MagicMock()
-    mock_board.color_distribution = [[Colors.red]]
-
     mock_list_players = [
         Player(id=1, name="Juan"),
         Player(id=2, name="Pedro"),
         Player(id=3, name="Maria", figure_cards=mock_figure_card, blocked=False)
     ]
 
-    mock_game = Game(id=1, players=mock_list_players, player_amount=3,
-                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
-
-    mock_game.board = mock_board
-
-    mock_db.merge.return_value = mock_list_players[2]
+    mock_game = Game(id=1, board=board, players=mock_list_players, player_amount=3,
+                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2, forbidden_color=Colors.none)
 
     ugly_figure_data = FigureToDiscardSchema(
-        figure_card=FigTypeAndDifficulty.FIG_01.value[0], associated_player=3, figure_board=FigTypeAndDifficulty.FIG_01.value[0], clicked_x=0, clicked_y=0)
-    real_figure_in_board = FigureInBoardSchema(
-        fig=FigTypeAndDifficulty.FIG_01, tiles=[])
+        figure_card=figure.value[0], associated_player=3, figure_board=figure.value[0], clicked_x=x, clicked_y=y)
 
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
-    with patch('app.endpoints.game_endpoints.get_figure_in_board') as mock_get_figure_in_board, \
-        patch('app.endpoints.game_endpoints.calculate_partial_board') as mock_calculate_partial_board, \
-            patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
-            patch("app.endpoints.game_endpoints.erase_figure_card") as mock_erase:
-
-        mock_get_figure_in_board.return_value = [real_figure_in_board]
-        mock_calculate_partial_board.return_value = mock_board
-
-        mock_erase.return_value = None
-        mock_manager[mock_game].broadcast_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
+    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager:
 
         response = client.put("/games/1/figure/discard",
                               json=ugly_figure_data.model_dump())
@@ -1322,7 +1110,39 @@ def test_discard_non_blocked_user_and_blocked_card():
         assert response.status_code == 412
         assert response.json() == {
             "detail": "Caso borde que no deberia pasar nunca."}
-        mock_erase.assert_not_called()
+        mock_db.delete.assert_not_called()
+    app.dependency_overrides = {}
+
+
+def test_discard_figure_not_formed_in_the_board():
+    mock_db = MagicMock()
+    board, figure, (x, y) = board_with_figure()
+
+    mock_list_players = [
+        Player(id=1, name="Juan"),
+        Player(id=2, name="Pedro", figure_cards=[
+            FigureCard(id=1, type_and_difficulty=other_figure(figure), associated_player=2, in_hand=True)]),
+    ]
+
+    mock_game = Game(id=1, board=board, players=mock_list_players, player_amount=2,
+                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=1, forbidden_color=Colors.none)
+
+    # The card is not the figure formed over the clicked tile
+    ugly_figure_data = FigureToDiscardSchema(
+        figure_card=other_figure(figure).value[0], associated_player=2, figure_board=figure.value[0],
+        clicked_x=x, clicked_y=y)
+
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[1]
+
+    with patch("app.endpoints.game_endpoints.game_connection_managers"):
+        response = client.put("/games/1/figure/discard",
+                              json=ugly_figure_data.model_dump())
+
+    assert response.status_code == 403
+    assert response.json() == {"detail": "La carta figura no esta formada en el tablero"}
+    app.dependency_overrides = {}
 
 
 # ------------------------------------------------- TESTS DE FINISH TURN ---------------------------------------------------------
@@ -1346,16 +1166,16 @@ def test_finish_turn_with_zero_mov_cards():
         ]
 
         # mocked game where it is Maria's turn (index 2)
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3,
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3,
                          name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2, forbidden_color=Colors.none)
 
         mock_manager[mock_game.id].broadcast_finish_turn = AsyncMock(
             return_value=None)
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         mock_movement_choices = [
             MovementType.MOV_01,
@@ -1363,7 +1183,7 @@ def test_finish_turn_with_zero_mov_cards():
             MovementType.MOV_03,
         ]
 
-        with patch('random.choice', side_effect=mock_movement_choices):
+        with patch('app.services.action_services.get_game_rng', return_value=MagicMock(choice=MagicMock(side_effect=mock_movement_choices))):
             response = client.put("games/1/finish-turn")
             
             # we expect it's Juan turn (index 0)
@@ -1444,7 +1264,7 @@ def test_finish_turn_with_two_mov_cards():
         ]
 
         # mocked game where it is Maria's turn (index 2)
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3,
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3,
                          name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2, forbidden_color=Colors.none)
 
         mock_manager[mock_game.id].broadcast_finish_turn = AsyncMock(
@@ -1452,11 +1272,11 @@ def test_finish_turn_with_two_mov_cards():
         
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
-        with patch('random.choice', side_effect=mock_movement_choices):
+        with patch('app.services.action_services.get_game_rng', return_value=MagicMock(choice=MagicMock(side_effect=mock_movement_choices))):
             response = client.put("games/1/finish-turn")
             mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
 
@@ -1537,7 +1357,7 @@ def test_finish_turn_with_one_fig_blocked():
                    figure_cards=mock_figure_cards, blocked=True)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3,
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3,
                          name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2, forbidden_color=Colors.none)
 
         mock_manager[mock_game.id].broadcast_finish_turn = AsyncMock(
@@ -1550,20 +1370,12 @@ def test_finish_turn_with_one_fig_blocked():
             MovementType.MOV_03,
         ]
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
-
-        random_choice_side_effect = [
-            mock_movement_choices[0],  # Para la primera llamada (movimiento)
-            mock_movement_choices[1],  # Para la segunda llamada (movimiento)
-            mock_movement_choices[2],  # Para la tercera llamada (movimiento)
-            mock_figure_cards[1],      # Para la primera llamada (figura)
-            mock_figure_cards[2],      # Para la segunda llamada (figura)
-        ]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
-        with patch('random.choice', side_effect=random_choice_side_effect), \
-                patch('random.randint', return_value=2):
+        # Las cartas de figura no se sacan al azar, se roban del mazo y Maria esta bloqueada
+        with patch('app.services.action_services.get_game_rng', return_value=MagicMock(choice=MagicMock(side_effect=mock_movement_choices))):
             response = client.put("games/1/finish-turn")
 
             # Verificar que las cartas de figura no se distribuyan a María
@@ -1630,15 +1442,15 @@ def test_finish_turn_player_not_his_turn():
     ]
 
     # Pedro's turn
-    mock_game = Game(id=1, players=mock_list_players, player_amount=2,
+    mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=2,
                      name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=1, forbidden_color=Colors.none)
 
     # I'm Juan
     mock_player = Player(id=1, name="Juan", blocked=False)
 
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_player
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_player
 
     response = client.put("games/1/finish-turn")
 
@@ -1664,9 +1476,9 @@ def test_finish_turn_status_full():
 
     mock_player = Player(id=1, name="Juan", blocked=False)
 
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_player
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_player
 
     response = client.put("games/1/finish-turn")
 
@@ -1694,9 +1506,9 @@ def test_finish_turn_status_waiting():
 
     mock_player = Player(id=1, name="Juan")
 
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_player
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_player
 
     response = client.put("games/1/finish-turn")
 
@@ -1712,21 +1524,15 @@ def test_finish_turn_status_waiting():
 
 def test_block_figure_card():
     mock_db = MagicMock()
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
+    board, figure, (x, y) = board_with_figure()
 
     mock_figure_card = [
-        FigureCard(id=1, type_and_difficulty=FigTypeAndDifficulty.FIG_01,
+        FigureCard(id=1, type_and_difficulty=figure,
                    associated_player=2, in_hand=True, blocked=False),
-        FigureCard(id=2, type_and_difficulty=FigTypeAndDifficulty.FIG_02,
+        FigureCard(id=2, type_and_difficulty=other_figure(figure),
                    associated_player=2, in_hand=True, blocked=False)
     ]
 
-    mock_board = MagicMock()
-    # Use Colors.red directly q se yo esto ???
-    mock_board.color_distribution = [[Colors.red]]
-
     mock_list_players = [
         Player(id=1, name="Juan", blocked=False),
         Player(id=2, name="Pedro", blocked=False,
@@ -1734,43 +1540,18 @@ def test_block_figure_card():
         Player(id=3, name="Maria", blocked=False)
     ]
 
-    mock_game = Game(id=1, players=mock_list_players, player_amount=3,
+    mock_game = Game(id=1, board=board, players=mock_list_players, player_amount=3,
                      name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2, forbidden_color=Colors.none)
 
-    mock_game.board = mock_board
-
-    mock_db.merge.return_value = mock_list_players[1]
-
     ugly_figure_data = FigureToDiscardSchema(
-        figure_card=FigTypeAndDifficulty.FIG_01.value[0], associated_player=2, figure_board=FigTypeAndDifficulty.FIG_01.value[0], clicked_x=0, clicked_y=0)
-    real_figure_in_board = FigureInBoardSchema(
-        fig=FigTypeAndDifficulty.FIG_01, tiles=[])
-    real_figure_card = FigureCardSchema(
-        type=FigTypeAndDifficulty.FIG_01, associated_player=2, blocked=False)
+        figure_card=figure.value[0], associated_player=2, figure_board=figure.value[0], clicked_x=x, clicked_y=y)
 
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
-
-    with patch('app.endpoints.game_endpoints.get_figure_in_board') as mock_get_figure_in_board, \
-            patch('app.endpoints.game_endpoints.calculate_partial_board') as mock_calculate_partial_board, \
-            patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
-            patch('app.endpoints.game_endpoints.next', return_value=mock_figure_card[0]), \
-            patch("app.endpoints.game_endpoints.serialize_board") as mock_serialize_board:
-
-        mock_get_figure_in_board.return_value = [real_figure_in_board]
-        mock_calculate_partial_board.return_value = mock_board
-        mock_serialize_board.return_value = [
-            ["red"]]  # Mock the serialized board
-
-        # mock_erase.return_value = None
-        mock_manager[mock_game].broadcast_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game_won = AsyncMock(
-            return_value=None)
-        mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
-        mock_manager[mock_game.id].broadcast_figures_in_board = AsyncMock(
-            return_value=None)
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
+
+    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
+            patch("app.endpoints.game_endpoints.publish_game_event"):
 
         response = client.put("/games/1/figure/block",
                               json=ugly_figure_data.model_dump())
@@ -1778,27 +1559,25 @@ def test_block_figure_card():
         assert response.status_code == 200
         assert response.json() == {"message": "Bloqueaste a Pedro!"}
 
-        mock_manager[mock_game.id].broadcast_game_won.assert_not_called()
-        assert mock_game.forbidden_color == Colors.red
+        # Pedro keeps the card, blocked, and the color of the figure is the forbidden one
+        assert mock_figure_card[0].blocked and not mock_figure_card[1].blocked
+        assert mock_list_players[1].blocked
+        mock_db.delete.assert_not_called()
+        assert mock_game.forbidden_color == Colors(board.color_distribution[x][y])
+    app.dependency_overrides = {}
 
 
 def test_block_figure_card_already_blocked():
     mock_db = MagicMock()
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
+    board, figure, (x, y) = board_with_figure()
 
     mock_figure_card = [
-        FigureCard(id=1, type_and_difficulty=FigTypeAndDifficulty.FIG_01,
+        FigureCard(id=1, type_and_difficulty=figure,
                    associated_player=2, in_hand=True, blocked=False),
-        FigureCard(id=2, type_and_difficulty=FigTypeAndDifficulty.FIG_02,
+        FigureCard(id=2, type_and_difficulty=other_figure(figure),
                    associated_player=2, in_hand=True, blocked=True)
     ]
 
-    mock_board = MagicMock()
-    # Use Colors.red directly q se yo esto ???
-    mock_board.color_distribution = [[Colors.red]]
-
     mock_list_players = [
         Player(id=1, name="Juan", blocked=False),
         Player(id=2, name="Pedro", blocked=True,
@@ -1806,66 +1585,36 @@ def test_block_figure_card_already_blocked():
         Player(id=3, name="Maria", blocked=False)
     ]
 
-    mock_game = Game(id=1, players=mock_list_players, player_amount=3,
+    mock_game = Game(id=1, board=board, players=mock_list_players, player_amount=3,
                      name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2, forbidden_color=Colors.none)
 
-    mock_game.board = mock_board
-
-    mock_db.merge.return_value = mock_list_players[1]
-
     ugly_figure_data = FigureToDiscardSchema(
-        figure_card=FigTypeAndDifficulty.FIG_01.value[0], associated_player=2, figure_board=FigTypeAndDifficulty.FIG_01.value[0], clicked_x=0, clicked_y=0)
-    real_figure_in_board = FigureInBoardSchema(
-        fig=FigTypeAndDifficulty.FIG_01, tiles=[])
-    real_figure_card = FigureCardSchema(
-        type=FigTypeAndDifficulty.FIG_01, associated_player=2, blocked=False)
+        figure_card=figure.value[0], associated_player=2, figure_board=figure.value[0], clicked_x=x, clicked_y=y)
 
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
-
-    with patch('app.endpoints.game_endpoints.get_figure_in_board') as mock_get_figure_in_board, \
-            patch('app.endpoints.game_endpoints.calculate_partial_board') as mock_calculate_partial_board, \
-            patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
-            patch('app.endpoints.game_endpoints.next', return_value=mock_figure_card[0]), \
-            patch("app.endpoints.game_endpoints.serialize_board") as mock_serialize_board:
-
-        mock_get_figure_in_board.return_value = [real_figure_in_board]
-        mock_calculate_partial_board.return_value = mock_board
-        mock_serialize_board.return_value = [
-            ["red"]]  # Mock the serialized board
-
-        # mock_erase.return_value = None
-        mock_manager[mock_game].broadcast_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
-        
-        mock_manager[mock_game].broadcast_game_won = AsyncMock(
-            return_value=None)
-        mock_manager[mock_game.id].broadcast_figures_in_board = AsyncMock(
-            return_value=None)
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
+
+    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
+            patch("app.endpoints.game_endpoints.publish_game_event"):
 
         response = client.put("/games/1/figure/block",
                               json=ugly_figure_data.model_dump())
 
         assert response.status_code == 403
         assert response.json() == {"detail": "El jugador ya esta bloqueado"}
+    app.dependency_overrides = {}
 
 
 def test_block_figure_card_one_card():
     mock_db = MagicMock()
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
+    board, figure, (x, y) = board_with_figure()
 
     mock_figure_card = [
-        FigureCard(id=1, type_and_difficulty=FigTypeAndDifficulty.FIG_01,
+        FigureCard(id=1, type_and_difficulty=figure,
                    associated_player=2, in_hand=True, blocked=False)
     ]
 
-    mock_board = MagicMock()
-    # Use Colors.red directly q se yo esto ???
-    mock_board.color_distribution = [[Colors.red]]
-
     mock_list_players = [
         Player(id=1, name="Juan", blocked=False),
         Player(id=2, name="Pedro", blocked=False,
@@ -1873,42 +1622,18 @@ def test_block_figure_card_one_card():
         Player(id=3, name="Maria", blocked=False)
     ]
 
-    mock_game = Game(id=1, players=mock_list_players, player_amount=3,
+    mock_game = Game(id=1, board=board, players=mock_list_players, player_amount=3,
                      name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2, forbidden_color=Colors.none)
 
-    mock_game.board = mock_board
-
-    mock_db.merge.return_value = mock_list_players[1]
-
     ugly_figure_data = FigureToDiscardSchema(
-        figure_card=FigTypeAndDifficulty.FIG_01.value[0], associated_player=2, figure_board=FigTypeAndDifficulty.FIG_01.value[0], clicked_x=0, clicked_y=0)
-    real_figure_in_board = FigureInBoardSchema(
-        fig=FigTypeAndDifficulty.FIG_01, tiles=[])
-    real_figure_card = FigureCardSchema(
-        type=FigTypeAndDifficulty.FIG_01, associated_player=2, blocked=False)
+        figure_card=figure.value[0], associated_player=2, figure_board=figure.value[0], clicked_x=x, clicked_y=y)
 
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
-
-    with patch('app.endpoints.game_endpoints.get_figure_in_board') as mock_get_figure_in_board, \
-            patch('app.endpoints.game_endpoints.calculate_partial_board') as mock_calculate_partial_board, \
-            patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
-            patch('app.endpoints.game_endpoints.next', return_value=mock_figure_card[0]), \
-            patch("app.endpoints.game_endpoints.serialize_board") as mock_serialize_board:
-
-        mock_get_figure_in_board.return_value = [real_figure_in_board]
-        mock_calculate_partial_board.return_value = mock_board
-        mock_serialize_board.return_value = [
-            ["red"]]  # Mock the serialized board
-
-        # mock_erase.return_value = None
-        mock_manager[mock_game].broadcast_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game_won = AsyncMock(
-            return_value=None)
-        mock_manager[mock_game.id].broadcast_figures_in_board = AsyncMock(
-            return_value=None)
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
+
+    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
+            patch("app.endpoints.game_endpoints.publish_game_event"):
 
         response = client.put("/games/1/figure/block",
                               json=ugly_figure_data.model_dump())
@@ -1916,25 +1641,20 @@ def test_block_figure_card_one_card():
         assert response.status_code == 403
         assert response.json() == {
             "detail": "El jugador solo tiene una carta figura, no puede ser bloqueado"}
+    app.dependency_overrides = {}
 
 
 def test_block_figure_card_forbidden_color():
     mock_db = MagicMock()
-    mock_db.add.return_value = None
-    mock_db.commit.return_value = None
-    mock_db.refresh.return_value = None
+    board, figure, (x, y) = board_with_figure()
 
     mock_figure_card = [
-        FigureCard(id=1, type_and_difficulty=FigTypeAndDifficulty.FIG_01,
+        FigureCard(id=1, type_and_difficulty=figure,
                    associated_player=2, in_hand=True, blocked=False),
-        FigureCard(id=2, type_and_difficulty=FigTypeAndDifficulty.FIG_02,
-                   associated_player=2, in_hand=True, blocked=True)
+        FigureCard(id=2, type_and_difficulty=other_figure(figure),
+                   associated_player=2, in_hand=True, blocked=False)
     ]
 
-    mock_board = MagicMock()
-    # Use Colors.red directly q se yo esto ???
-    mock_board.color_distribution = [[Colors.red]]
-
     mock_list_players = [
         Player(id=1, name="Juan", blocked=False),
         Player(id=2, name="Pedro", blocked=False,
@@ -1942,42 +1662,18 @@ def test_block_figure_card_forbidden_color():
         Player(id=3, name="Maria", blocked=False)
     ]
 
-    mock_game = Game(id=1, players=mock_list_players, player_amount=3,
-                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2, forbidden_color=Colors.red)
-
-    mock_game.board = mock_board
-
-    mock_db.merge.return_value = mock_list_players[1]
+    mock_game = Game(id=1, board=board, players=mock_list_players, player_amount=3,
+                     name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2, forbidden_color=Colors(board.color_distribution[x][y]))
 
     ugly_figure_data = FigureToDiscardSchema(
-        figure_card=FigTypeAndDifficulty.FIG_01.value[0], associated_player=2, figure_board=FigTypeAndDifficulty.FIG_01.value[0], clicked_x=0, clicked_y=0)
-    real_figure_in_board = FigureInBoardSchema(
-        fig=FigTypeAndDifficulty.FIG_01, tiles=[])
-    real_figure_card = FigureCardSchema(
-        type=FigTypeAndDifficulty.FIG_01, associated_player=2, blocked=False)
+        figure_card=figure.value[0], associated_player=2, figure_board=figure.value[0], clicked_x=x, clicked_y=y)
 
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
-
-    with patch('app.endpoints.game_endpoints.get_figure_in_board') as mock_get_figure_in_board, \
-            patch('app.endpoints.game_endpoints.calculate_partial_board') as mock_calculate_partial_board, \
-            patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
-            patch('app.endpoints.game_endpoints.next', return_value=mock_figure_card[0]), \
-            patch("app.endpoints.game_endpoints.serialize_board") as mock_serialize_board:
-
-        mock_get_figure_in_board.return_value = [real_figure_in_board]
-        mock_calculate_partial_board.return_value = mock_board
-        mock_serialize_board.return_value = [
-            ["red"]]  # Mock the serialized board
-
-        # mock_erase.return_value = None
-        mock_manager[mock_game].broadcast_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game_won = AsyncMock(
-            return_value=None)
-        mock_manager[mock_game.id].broadcast_figures_in_board = AsyncMock(
-            return_value=None)
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
+
+    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
+            patch("app.endpoints.game_endpoints.publish_game_event"):
 
         response = client.put("/games/1/figure/block",
                               json=ugly_figure_data.model_dump())
@@ -1985,3 +1681,4 @@ def test_block_figure_card_forbidden_color():
         assert response.status_code == 403
         assert response.json() == {
             "detail": "El color de la figura no puede ser el color prohibido"}
+    app.dependency_overrides = {}
@@ -0,0 +1,9 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+from unittest.mock import AsyncMock, MagicMock
+
+
+def as_async_session(db) -> AsyncSession:
+    """AsyncSession over a mocked Session, for the endpoints on get_async_db: run_sync calls the function with it"""
+    async_db = MagicMock(spec=AsyncSession)
+    async_db.run_sync = AsyncMock(side_effect=lambda fn, *args, **kwargs: fn(db, *args, **kwargs))
+    return async_db
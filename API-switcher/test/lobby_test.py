@@ -0,0 +1,111 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.main import app
+from app.db.db import Base
+from app.db.enums import Colors, GameStatus
+from app.endpoints.game_endpoints import auth_scheme
+from app.models.game_models import Game
+from app.models.player_models import Player
+from app.schemas.game_schemas import GameSchemaOut, LobbyGameSchema
+from app.services.event_services import GameEvent, GAME_CREATED, PLAYER_JOINED, GAME_DELETED
+from app.services.lobby_services import LobbyIndex, lobby_index
+import pytest
+
+client = TestClient(app)
+
+
+def lobby_row(game_id: int, name: str, status: GameStatus = GameStatus.waiting) -> LobbyGameSchema:
+    return LobbyGameSchema(id=game_id, name=name, player_count=1, player_amount=4, status=status, host_id=1)
+
+
+@pytest.fixture
+def index():
+    index = LobbyIndex()
+    index.loaded = True
+    names = ["Alfa", "beta", "Alfajor", "Gamma", "alto", "Delta", "Alfa dos"]
+    for game_id, name in enumerate(names, start=1):
+        index.upsert(lobby_row(game_id, name, GameStatus.in_game if game_id % 3 == 0 else GameStatus.waiting))
+    return index
+
+
+def test_load_from_database():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(bind=engine)
+    db = session_factory()
+    host = Player(name="Juan")
+    guest = Player(name="Pedro")
+    db.add_all([host, guest])
+    db.commit()
+    game = Game(name="Partida", player_amount=3, host_id=host.id, forbidden_color=Colors.none)
+    empty_game = Game(name="Vacia", player_amount=2, host_id=host.id, status=GameStatus.full, forbidden_color=Colors.none)
+    game.players.extend([host, guest])
+    db.add_all([game, empty_game])
+    db.commit()
+    db.close()
+
+    index = LobbyIndex(session_factory=session_factory)
+    page = index.page()
+
+    assert [(row.name, row.player_count, row.status) for row in page.games] == [
+        ("Vacia", 0, GameStatus.full), ("Partida", 2, GameStatus.waiting)]
+    assert index.page(status=GameStatus.full).games[0].player_amount == 2
+
+
+def test_cursor_pagination(index):
+    first = index.page(limit=3)
+    second = index.page(cursor=first.next_cursor, limit=3)
+    last = index.page(cursor=second.next_cursor, limit=3)
+
+    assert [row.id for row in first.games] == [7, 6, 5]
+    assert [row.id for row in second.games] == [4, 3, 2]
+    assert [row.id for row in last.games] == [1]
+    assert last.next_cursor is None
+    assert index.page(limit=7).next_cursor is None
+
+
+def test_status_and_name_filters(index):
+    waiting = index.page(status=GameStatus.waiting, limit=3)
+
+    assert [row.id for row in waiting.games] == [7, 5, 4]
+    assert [row.id for row in index.page(status=GameStatus.waiting, cursor=waiting.next_cursor).games] == [2, 1]
+    assert [row.name for row in index.page(name_prefix="alf").games] == ["Alfa dos", "Alfajor", "Alfa"]
+    assert [row.name for row in index.page(name_prefix="AL", status=GameStatus.waiting, limit=2).games] == ["Alfa dos", "alto"]
+    assert index.page(name_prefix="zeta").games == []
+
+
+def test_events_update_the_index(index):
+    game = GameSchemaOut(id=8, name="Nueva", player_amount=2, status=GameStatus.waiting, host_id=1,
+                         player_turn=0, forbidden_color=Colors.none)
+
+    index.apply_event(GameEvent(type=GAME_CREATED, game_id=8, game=game))
+    assert index.page(limit=1).games[0].name == "Nueva"
+
+    full_game = game.model_copy(update={"status": GameStatus.full})
+    index.apply_event(GameEvent(type=PLAYER_JOINED, game_id=8, game=full_game))
+    assert 8 not in [row.id for row in index.page(status=GameStatus.waiting).games]
+    assert [row.id for row in index.page(status=GameStatus.full).games] == [8]
+
+    index.apply_event(GameEvent(type=GAME_DELETED, game_id=8, game=full_game))
+    assert 8 not in index.rows
+    assert index.page(name_prefix="nue").games == []
+
+
+def test_get_lobby_endpoint():
+    for game_id in range(1, 5):
+        lobby_index.upsert(lobby_row(game_id, f"Partida {game_id}"))
+    app.dependency_overrides[auth_scheme] = lambda: Player(id=1, name="Juan", blocked=False)
+
+    response = client.get("/games/lobby", params={"status": "waiting", "limit": 3})
+    assert response.status_code == 200
+    assert [game["id"] for game in response.json()["games"]] == [4, 3, 2]
+    assert response.json()["next_cursor"] == 2
+
+    response = client.get("/games/lobby", params={"cursor": 2, "name": "partida"})
+    assert response.json() == {"games": [{"id": 1, "name": "Partida 1", "player_count": 1, "player_amount": 4,
+                                          "status": "waiting", "host_id": 1}], "next_cursor": None}
+
+    assert client.get("/games/lobby", params={"status": "non_existent_status"}).status_code == 404
+    app.dependency_overrides = {}
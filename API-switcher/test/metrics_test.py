@@ -0,0 +1,100 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.db.db import count_statements
+from app.endpoints.game_endpoints import auth_scheme
+from app.models.game_models import Game
+from app.models.player_models import Player
+from app.services.metrics_services import Metric, MetricsRegistry, HTTP_REQUEST_SECONDS, DB_STATEMENTS_PER_REQUEST
+import pytest
+
+client = TestClient(app)
+
+
+def test_render_metrics():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests", "Requests", ("route",))
+    sockets = registry.gauge("sockets", "Sockets", ("channel",), collect=lambda: {("lobby",): 2})
+    latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+
+    requests.labels("/games").inc()
+    requests.labels("/games").inc(2)
+    latency.labels().observe(0.5)
+
+    assert registry.render().splitlines() == [
+        "# HELP requests Requests",
+        "# TYPE requests counter",
+        'requests_total{route="/games"} 3.0',
+        "# HELP sockets Sockets",
+        "# TYPE sockets gauge",
+        'sockets{channel="lobby"} 2',
+        "# HELP latency_seconds Latency",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 0',
+        'latency_seconds_bucket{le="1.0"} 1',
+        'latency_seconds_bucket{le="+Inf"} 1',
+        "latency_seconds_sum 0.5",
+        "latency_seconds_count 1",
+    ]
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("requests", "Requests", ("route",)).labels('a"b').inc()
+
+    assert 'requests_total{route="a\\"b"} 1.0' in registry.render()
+
+
+def test_metric_kinds_implement_their_samples():
+    class NoSamples(Metric):
+        def new_child(self):
+            return 0
+
+    with pytest.raises(TypeError):
+        NoSamples("metric", "Metric")
+
+
+def test_nested_statement_counts(database):
+    session_factory, _ = database
+    db = session_factory()
+    with count_statements() as outer:
+        db.query(Game).all()
+        with count_statements() as inner:
+            db.query(Player).all()
+    db.close()
+
+    assert (outer.count, inner.count) == (2, 1)
+    assert outer.duration >= inner.duration > 0
+
+
+def test_request_metrics_by_route(database):
+    session_factory, _ = database
+    db = session_factory()
+    player = Player(name="Juan")
+    db.add(player)
+    db.commit()
+    db.refresh(player)
+    db.expunge_all()
+    db.close()
+    app.dependency_overrides[auth_scheme] = lambda: player
+    route = ("GET", "/games/")
+    requests_before = HTTP_REQUEST_SECONDS.labels(*route).count
+    statements_before = DB_STATEMENTS_PER_REQUEST.labels(*route).total
+
+    response = client.get("/games/")
+
+    assert response.status_code == 200
+    assert HTTP_REQUEST_SECONDS.labels(*route).count == requests_before + 1
+    assert DB_STATEMENTS_PER_REQUEST.labels(*route).total > statements_before
+
+
+def test_metrics_endpoint():
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    for name in ("http_request_duration_seconds", "db_statements_per_request", "figure_scan_duration_seconds",
+                 "broadcast_duration_seconds", "websocket_connections", "state_update_queue_depth", "games",
+                 "websocket_send_queue_depth", "game_managers", "game_manager_state_bytes"):
+        assert f"# TYPE {name} " in response.text
+    assert 'websocket_connections{channel="lobby"}' in response.text
+    assert "\ngame_managers 0\n" in response.text
@@ -1,16 +1,18 @@
 from unittest.mock import MagicMock, patch, AsyncMock
 from fastapi.testclient import TestClient
 from app.main import app
-from app.db.db import get_db
+from app.db.db import get_async_db
 from app.db.enums import GameStatus, MovementType
 from app.models.game_models import Game
+from app.models.board_models import Board
 from app.models.player_models import Player
 from app.models.movement_card_model import MovementCard
-from app.dependencies.dependencies import get_game
-from app.endpoints.game_endpoints import auth_scheme
-from app.schemas.movement_schema import MovementSchema, Coordinate
-from app.schemas.movement_cards_schema import MovementCardSchema
+from app.dependencies.dependencies import get_async_game
+from app.endpoints.game_endpoints import async_auth_scheme
+from app.engine.state import PlayMovement
+from app.services.action_services import apply_action
 from app.models.movement_model import Movement
+from helpers import as_async_session
 
 client = TestClient(app)
 
@@ -33,7 +35,7 @@ def test_add_partial_move():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
     
-    mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+    mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
 
     movement_data = {
             "movement_card": {
@@ -52,17 +54,13 @@ def test_add_partial_move():
             }
         }
     
-    app.dependency_overrides[get_db] = lambda: mock_db
-    app.dependency_overrides[get_game] = lambda: mock_game
-    app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+    app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+    app.dependency_overrides[get_async_game] = lambda: mock_game
+    app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
     # This test does not check wether the movement is valid, but rather if the partial move is correctly added to the database.
-    with patch("app.endpoints.game_endpoints.validate_movement") as mock_validate_movement, \
-         patch("app.endpoints.game_endpoints.discard_movement_card") as mock_discard_movement_card, \
-         patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager:
-        
-        mock_discard_movement_card.return_value = None
-        mock_validate_movement.return_value = None
+    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager:
+
         mock_manager[mock_game].broadcast_partial_board = AsyncMock(return_value=None)
         mock_manager[mock_game].broadcast_figures_in_board = AsyncMock(return_value=None)
         mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
@@ -70,7 +68,7 @@ def test_add_partial_move():
 
         client.put("/games/1/movement/add", json=movement_data)
 
-        actual_movement = mock_db.add.call_args[0][0]
+        actual_movement = mock_list_players[2].movements[-1]
         assert actual_movement.player_id == 3
         assert actual_movement.movement_type == MovementType.MOV_01
         assert actual_movement.x1 == 2
@@ -101,14 +99,14 @@ def test_undo_movement_success():
         mock_player_turn = Player(id=3, name="Maria", movements=partial_movements, movement_cards=movement_cards)
 
         # Simulamos el juego
-        mock_game = Game(id=1, players=[mock_player_turn], player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=0)
+        mock_game = Game(id=1, board=Board(1), players=[mock_player_turn], player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=0)
 
         mock_db.merge.return_value = mock_player_turn
 
         # Configuración de dependencias
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_player_turn
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_player_turn
 
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
 
@@ -133,14 +131,14 @@ def test_undo_movement_forbidden_not_player_turn():
         mock_player_turn = Player(id=2, name="Maria", movements=[], movement_cards=[])
 
         # Simulamos el juego
-        mock_game = Game(id=1, players=[player_turn, mock_player_turn], player_amount=2, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=0)
+        mock_game = Game(id=1, board=Board(1), players=[player_turn, mock_player_turn], player_amount=2, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=0)
 
         mock_db.merge.return_value = mock_player_turn
 
         # Configuración de dependencias
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_player_turn  # Maria intenta deshacer el movimiento
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_player_turn  # Maria intenta deshacer el movimiento
 
         # Llamada al cliente para deshacer el movimiento
         response = client.put("/games/1/movement/back")
@@ -161,12 +159,12 @@ def test_undo_movement_no_partial_movements():
         mock_player_turn = Player(id=1, name="Juan", movements=[], movement_cards=[])
 
         # Simulamos el juego
-        mock_game = Game(id=1, players=[mock_player_turn], player_amount=1, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=0)
+        mock_game = Game(id=1, board=Board(1), players=[mock_player_turn], player_amount=1, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=0)
 
         # Configuración de dependencias
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_player_turn  # Juan intenta deshacer el movimiento
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_player_turn  # Juan intenta deshacer el movimiento
 
         # Llamada al cliente para deshacer el movimiento
         response = client.put("/games/1/movement/back")
@@ -210,14 +208,14 @@ def test_undo_movement_multiple_partial_movements():
         ]
 
         # Simulamos el juego
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
 
         mock_db.merge.return_value = mock_player_turn
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
         # Configuración de dependencias
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_player_turn
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_player_turn
 
         # Llamada al cliente para deshacer el movimiento tres veces
         for _ in range(3):
@@ -237,10 +235,9 @@ def test_undo_movement_multiple_partial_movements():
 
 # ------------------------------------------------- TESTS ABOUT MOVEMENT VALIDATION ---------------------------------------------------------
 
-# This test also checks if make_partial_move is called.
+# This test also checks that the partial move is saved.
 def test_add_movement_mov01_succesfull():
-    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
-    patch("app.endpoints.game_endpoints.make_partial_move") as mock_make_partial_move:
+    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager:
         mock_db = MagicMock()
 
         mock_movement_cards = [
@@ -253,7 +250,7 @@ def test_add_movement_mov01_succesfull():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
 
@@ -263,9 +260,9 @@ def test_add_movement_mov01_succesfull():
         mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -292,14 +289,13 @@ def test_add_movement_mov01_succesfull():
 
         assert response.json() == expected_response
         assert response.status_code == 200
-        mock_make_partial_move.assert_called_once()
+        assert len(mock_list_players[2].movements) == 1
         
     app.dependency_overrides = {}
 
-# This test also checks if make_partial_move is NOT called.
+# This test also checks that the partial move is NOT saved.
 def test_add_movement_mov01_fail():
-    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager, \
-         patch("app.endpoints.game_endpoints.make_partial_move") as mock_make_partial_move:
+    with patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager:
         mock_db = MagicMock()
 
         mock_movement_cards = [
@@ -312,16 +308,16 @@ def test_add_movement_mov01_fail():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
         
         mock_manager[mock_game.id].broadcast_movement = AsyncMock(return_value=None)
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -348,7 +344,7 @@ def test_add_movement_mov01_fail():
 
         assert response.json() == expected_response
         assert response.status_code == 400
-        assert mock_make_partial_move.call_count == 0
+        assert mock_list_players[2].movements == []
         
     app.dependency_overrides = {}
 
@@ -366,7 +362,7 @@ def test_add_movement_mov02_succesfull():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
 
@@ -376,9 +372,9 @@ def test_add_movement_mov02_succesfull():
         mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -422,7 +418,7 @@ def test_add_movement_mov02_fail():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
         
@@ -430,9 +426,9 @@ def test_add_movement_mov02_fail():
         mock_manager[mock_game].broadcast_figures_in_board = AsyncMock(return_value=None)
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -476,7 +472,7 @@ def test_add_movement_mov03_succesfull():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
 
@@ -486,9 +482,9 @@ def test_add_movement_mov03_succesfull():
         mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -532,15 +528,15 @@ def test_add_movement_mov03_fail():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
         
         mock_manager[mock_game.id].broadcast_movement = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -584,7 +580,7 @@ def test_add_movement_mov04_succesfull():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
 
@@ -594,9 +590,9 @@ def test_add_movement_mov04_succesfull():
         mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -640,15 +636,15 @@ def test_add_movement_mov04_fail():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
 
         mock_manager[mock_game.id].broadcast_movement = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -692,7 +688,7 @@ def test_add_movement_mov05_succesfull():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
 
@@ -702,9 +698,9 @@ def test_add_movement_mov05_succesfull():
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
         mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -748,15 +744,15 @@ def test_add_movement_mov05_fail():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
 
         mock_manager[mock_game.id].broadcast_movement = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -800,7 +796,7 @@ def test_add_movement_mov06_succesfull():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
 
@@ -810,9 +806,9 @@ def test_add_movement_mov06_succesfull():
         mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -856,15 +852,15 @@ def test_add_movement_mov06_fail():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
 
         mock_manager[mock_game.id].broadcast_movement = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -908,7 +904,7 @@ def test_add_movement_mov07_succesfull():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
 
@@ -918,9 +914,9 @@ def test_add_movement_mov07_succesfull():
         mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
         
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -964,15 +960,15 @@ def test_add_movement_mov07_fail():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_db.merge.return_value = mock_list_players[2]
 
         mock_manager[mock_game.id].broadcast_movement = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -1016,11 +1012,11 @@ def test_add_movement_game_not_in_game_fail():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.waiting, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.waiting, host_id=1, player_turn=2)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -1064,11 +1060,11 @@ def test_add_movement_player_not_turn_fail():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=0)  # Juan es el jugador en turno
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=0)  # Juan es el jugador en turno
         
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -1098,9 +1094,8 @@ def test_add_movement_player_not_turn_fail():
         
     app.dependency_overrides = {}
 
-def test_add_movement_calls_validate_and_discard():
-    with patch("app.endpoints.game_endpoints.validate_movement") as mock_validate, \
-         patch("app.endpoints.game_endpoints.discard_movement_card") as mock_discard, \
+def test_add_movement_goes_through_the_engine():
+    with patch("app.endpoints.game_endpoints.apply_action", wraps=apply_action) as mock_apply, \
          patch("app.endpoints.game_endpoints.game_connection_managers") as mock_manager:
         
         mock_db = MagicMock()
@@ -1108,20 +1103,16 @@ def test_add_movement_calls_validate_and_discard():
         mock_list_players = [
             Player(id=1, name="Juan"),
             Player(id=2, name="Pedro"),
-            Player(id=3, name="Maria")
+            Player(id=3, name="Maria", movement_cards=[
+                MovementCard(id=1, movement_type=MovementType.MOV_01, associated_player=3, in_hand=True)])
         ]
         
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3,
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3,
                          name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
-        mock_manager[mock_game].broadcast_partial_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_figures_in_board = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
-        mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
-        
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         
         movement_data = {
@@ -1136,30 +1127,18 @@ def test_add_movement_calls_validate_and_discard():
                 "y": 0
             },
             "piece_2_coordinates": {
-                "x": 0,
-                "y": 5
+                "x": 2,
+                "y": 2
             }
         }
         
         response = client.put("/games/1/movement/add", json=movement_data)
         
-        # Verify that the validate_movement function is called
-        mock_validate.assert_called_once_with(
-            MovementSchema(
-                movement_card=MovementCardSchema(
-                    id=1,
-                    movement_type=MovementType.MOV_01,
-                    associated_player=3,
-                    in_hand=True
-                ),
-                piece_1_coordinates=Coordinate(x=0, y=0),
-                piece_2_coordinates=Coordinate(x=0, y=5)
-            ),
-            mock_game
-        )
+        # The rules of the movement are the ones of the game engine
+        mock_apply.assert_called_once_with(mock_game, PlayMovement(3, MovementType.MOV_01, 0, 0, 2, 2))
         
-        # Verify that the discard_movement_card function is called
-        mock_discard.assert_called_once()
+        # The card of the movement leaves the hand
+        assert not mock_list_players[2].movement_cards[0].in_hand
         
         assert response.status_code == 200
         assert response.json() == {"message": "Movimiento realizado por Maria"}
@@ -1180,7 +1159,7 @@ def test_add_movement_card_discarded():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
 
         mock_db.merge.return_value = mock_list_players[2]
 
@@ -1189,9 +1168,9 @@ def test_add_movement_card_discarded():
         mock_manager[mock_game].broadcast_game = AsyncMock(return_value=None)
         mock_manager[mock_game].broadcast_partial_moves_in_board = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
@@ -1236,13 +1215,13 @@ def test_add_movement_mov01_with_validmov02_fail():
             Player(id=3, name="Maria", movement_cards=mock_movement_cards)
         ]
 
-        mock_game = Game(id=1, players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
+        mock_game = Game(id=1, board=Board(1), players=mock_list_players, player_amount=3, name="Game 1", status=GameStatus.in_game, host_id=1, player_turn=2)
         
         mock_manager[mock_game.id].broadcast_movement = AsyncMock(return_value=None)
 
-        app.dependency_overrides[get_db] = lambda: mock_db
-        app.dependency_overrides[get_game] = lambda: mock_game
-        app.dependency_overrides[auth_scheme] = lambda: mock_list_players[2]
+        app.dependency_overrides[get_async_db] = lambda: as_async_session(mock_db)
+        app.dependency_overrides[get_async_game] = lambda: mock_game
+        app.dependency_overrides[async_auth_scheme] = lambda: mock_list_players[2]
 
         movement_data = {
             "movement_card": {
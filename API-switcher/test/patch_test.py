@@ -0,0 +1,58 @@
+from app.services.patch_services import make_patch, apply_patch
+import random
+
+
+def test_swapped_cells_are_replaced():
+    old = {"board": {"color_distribution": [["red", "blue"], ["green", "yellow"]]}}
+    new = {"board": {"color_distribution": [["blue", "red"], ["green", "yellow"]]}}
+
+    patch = make_patch(old, new)
+
+    assert patch == [
+        {"op": "replace", "path": "/board/color_distribution/0/0", "value": "blue"},
+        {"op": "replace", "path": "/board/color_distribution/0/1", "value": "red"},
+    ]
+    assert apply_patch(old, patch) == new
+
+
+def test_lists_that_change_length_are_replaced_whole():
+    old = {"game": {"player_turn": 0, "players": [{"id": 1, "cards": [1, 2, 3]}]}}
+    new = {"game": {"player_turn": 1, "players": [{"id": 1, "cards": [1, 3]}]}}
+
+    patch = make_patch(old, new)
+
+    assert patch == [
+        {"op": "replace", "path": "/game/player_turn", "value": 1},
+        {"op": "replace", "path": "/game/players/0/cards", "value": [1, 3]},
+    ]
+    assert apply_patch(old, patch) == new
+
+
+def test_added_and_removed_keys():
+    old = {"board": [], "a/b": 1, "figures": []}
+    new = {"board": [], "a/b": 2, "game": {"id": 1}}
+
+    patch = make_patch(old, new)
+
+    assert {"op": "remove", "path": "/figures"} in patch
+    assert {"op": "replace", "path": "/a~1b", "value": 2} in patch
+    assert apply_patch(old, patch) == new
+    assert make_patch(new, new) == []
+
+
+def test_random_documents_roundtrip():
+    rng = random.Random(8)
+
+    def random_value(depth):
+        kind = rng.randrange(4 if depth < 3 else 2)
+        if kind == 0:
+            return rng.choice([None, True, 0, 1, "red", "blue"])
+        if kind == 1:
+            return rng.randrange(3)
+        if kind == 2:
+            return [random_value(depth + 1) for _ in range(rng.randrange(3))]
+        return {rng.choice("abc"): random_value(depth + 1) for _ in range(rng.randrange(3))}
+
+    for _ in range(500):
+        old, new = random_value(0), random_value(0)
+        assert apply_patch(old, make_patch(old, new)) == new
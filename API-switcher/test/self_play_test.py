@@ -0,0 +1,28 @@
+from benchmarks.self_play import run, player_range
+import argparse
+import pytest
+
+
+@pytest.mark.parametrize("bot", ["random", "greedy"])
+def test_self_play_run(bot):
+    result = run(games=2, players=(2, 4), bot=bot, seed=3, max_turns=10)
+
+    assert result["games"] == 2
+    assert result["moves_per_sec"] > 0
+    assert result["figure_scan_p50_us"] <= result["figure_scan_p95_us"] <= result["figure_scan_p99_us"]
+    assert result["avg_figures_per_board"] >= 0
+
+
+def test_self_play_is_reproducible():
+    first, second = run(games=2, seed=5, max_turns=10), run(games=2, seed=5, max_turns=10)
+
+    assert first["avg_figures_per_board"] == second["avg_figures_per_board"]
+    assert first["avg_turns"] == second["avg_turns"]
+
+
+def test_player_range():
+    assert player_range("3") == (3, 3)
+    assert player_range("2-4") == (2, 4)
+
+    with pytest.raises(argparse.ArgumentTypeError):
+        player_range("1-5")
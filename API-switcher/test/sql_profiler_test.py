@@ -0,0 +1,106 @@
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.main import app
+from app.db.db import count_statements
+from app.endpoints.game_endpoints import auth_scheme, async_auth_scheme
+from app.models.game_models import Game
+from app.models.player_models import Player
+from app.services.sql_profiler_services import (repeated_statements, duplicate_count, server_timing,
+                                                parse_server_timing)
+from app.services.websocket_services import GameManagerRegistry
+import logging
+import pytest
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def players(database):
+    session_factory, _ = database
+    db = session_factory()
+    players = [Player(name="Juan"), Player(name="Maria")]
+    db.add_all(players)
+    db.commit()
+    for player in players:
+        db.refresh(player)
+    db.expunge_all()
+    db.close()
+    with patch("app.endpoints.game_endpoints.game_connection_managers", GameManagerRegistry()):
+        yield players
+
+
+def as_player(player: Player):
+    app.dependency_overrides[auth_scheme] = lambda: player
+    app.dependency_overrides[async_auth_scheme] = lambda: player
+
+
+def test_profile_statements(database):
+    session_factory, _ = database
+    db = session_factory()
+    with count_statements(record=True) as profile:
+        for _ in range(3):
+            db.query(Game).all()
+        db.query(Player).all()
+    db.close()
+
+    assert profile.count == 4
+    assert duplicate_count(profile) == 2
+    [(statement, times, seconds)] = repeated_statements(profile)
+    assert "FROM game" in statement and times == 3 and seconds > 0
+
+    timing = parse_server_timing(server_timing(profile))
+    assert timing["db-statements"]["desc"] == "4"
+    assert timing["db-duplicates"]["desc"] == "2"
+    assert float(timing["db"]["dur"]) > 0
+
+
+def test_no_header_when_off(players):
+    as_player(players[0])
+
+    response = client.get("/games/")
+
+    assert response.status_code == 200
+    assert "server-timing" not in response.headers
+
+
+def test_log_repeated_statements(players, query_budget, caplog):
+    as_player(players[0])
+
+    with patch("app.services.sql_profiler_services.SQL_PROFILER_THRESHOLD", 0), caplog.at_level(logging.WARNING):
+        response = client.get("/games/")
+
+    query_budget(response, statements=1)
+    assert "GET /games/ envio 1 sentencias SQL" in caplog.text
+
+
+def test_game_query_budgets(players, query_budget):
+    """Statements each endpoint may send while a game is created, joined, started and played"""
+    juan, maria = players
+
+    as_player(juan)
+    response = client.post("/games/", json={"name": "Partida", "player_amount": 2})
+    assert response.status_code == 200
+    query_budget(response, statements=7)
+    game_id = response.json()["id"]
+
+    as_player(maria)
+    response = client.put(f"/games/{game_id}/join")
+    assert response.status_code == 200
+    # The cards of both players are read again after the commit
+    query_budget(response, statements=14, duplicates=2)
+
+    as_player(juan)
+    response = client.put(f"/games/{game_id}/start")
+    assert response.status_code == 200
+    # The cards of each table go in a single INSERT and are read back with a single SELECT
+    query_budget(response, statements=12)
+
+    in_turn = players[response.json()["game"]["player_turn"]]
+    as_player(in_turn)
+    response = client.put(f"/games/{game_id}/finish-turn")
+    assert response.status_code == 200
+    query_budget(response, statements=6)
+
+    response = client.get("/games/lobby")
+    assert response.status_code == 200
+    query_budget(response, statements=0)
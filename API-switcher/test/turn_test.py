@@ -0,0 +1,109 @@
+from fastapi.testclient import TestClient
+from unittest.mock import patch
+from app.main import app
+from app.db.db import count_statements, get_db
+from app.db.enums import Colors, GameStatus, MovementType
+from app.endpoints.game_endpoints import async_auth_scheme
+from app.models.board_models import Board
+from app.models.game_models import Game
+from app.models.movement_card_model import MovementCard
+from app.models.movement_model import Movement
+from app.models.player_models import Player
+from app.services.turn_services import get_game_rng, forget_game_rng
+from app.services.websocket_services import GameManagerRegistry
+import pytest
+
+client = TestClient(app)
+
+
+def create_game_in_turn(session_factory) -> tuple[int, Player]:
+    """Started game of two players, the first one made two partial movements"""
+    db = session_factory()
+    players = [Player(name="Juan"), Player(name="Maria")]
+    db.add_all(players)
+    db.commit()
+    game = Game(name="Partida", player_amount=2, host_id=players[0].id, status=GameStatus.in_game,
+                forbidden_color=Colors.none, player_turn=0)
+    game.players.extend(players)
+    db.add(game)
+    db.commit()
+    db.add(Board(game.id))
+    juan = players[0]
+    db.add_all([MovementCard(movement_type=MovementType.MOV_01, associated_player=juan.id, in_hand=False),
+                MovementCard(movement_type=MovementType.MOV_02, associated_player=juan.id, in_hand=False),
+                MovementCard(movement_type=MovementType.MOV_03, associated_player=juan.id, in_hand=True)])
+    db.add_all([Movement(movement_type=MovementType.MOV_01, final_movement=False, player_id=juan.id, x1=0, y1=0, x2=2, y2=2),
+                Movement(movement_type=MovementType.MOV_02, final_movement=False, player_id=juan.id, x1=0, y1=0, x2=0, y2=2)])
+    db.commit()
+    game_id = game.id
+    juan = db.get(Player, juan.id)
+    db.expunge_all()
+    db.close()
+    return game_id, juan
+
+
+def test_finish_turn_single_transaction(database):
+    session_factory, commits = database
+    game_id, juan = create_game_in_turn(session_factory)
+    app.dependency_overrides[async_auth_scheme] = lambda: juan
+    commits.clear()
+
+    with patch("app.endpoints.game_endpoints.game_connection_managers", GameManagerRegistry()):
+        response = client.put(f"/games/{game_id}/finish-turn")
+
+    assert response.status_code == 200
+    assert response.json()["game"]["player_turn"] == 1
+    assert len(commits) == 1
+    # Two cards back to the hand, two movements deleted and the next turn
+    assert int(response.headers["X-Statement-Count"]) == 3
+
+    db = session_factory()
+    juan = db.get(Player, juan.id)
+    assert [card.in_hand for card in juan.movement_cards] == [True, True, True]
+    assert juan.movements == []
+    assert db.get(Game, game_id).player_turn == 1
+    db.close()
+
+
+def test_turn_actions_authenticate_with_the_async_session(database):
+    session_factory, _ = database
+    game_id, juan = create_game_in_turn(session_factory)
+    db = session_factory()
+    db.get(Player, juan.id).token = "token-juan"
+    db.commit()
+    db.close()
+
+    def no_sync_session():
+        raise AssertionError("the turn actions don't open a Session")
+
+    app.dependency_overrides[get_db] = no_sync_session
+    with patch("app.endpoints.game_endpoints.game_connection_managers", GameManagerRegistry()):
+        response = client.put(f"/games/{game_id}/finish-turn", headers={"Authorization": "Bearer token-juan"})
+        assert client.put(f"/games/{game_id}/finish-turn", headers={"Authorization": "Bearer otro"}).status_code == 401
+
+    assert response.status_code == 200
+    assert response.json()["game"]["player_turn"] == 1
+
+
+def test_game_rng_is_seeded_per_game():
+    with patch("app.services.turn_services.GAME_RNG_SEED", "42"):
+        first = [get_game_rng(1).random() for _ in range(3)]
+        other_game = get_game_rng(2).random()
+        forget_game_rng(1)
+        assert [get_game_rng(1).random() for _ in range(3)] == first
+
+    assert other_game not in first
+    # The generator of a game keeps its state between turns
+    assert get_game_rng(1) is get_game_rng(1)
+
+
+def test_count_statements(database):
+    session_factory, commits = database
+    db = session_factory()
+    with count_statements() as statements:
+        db.query(Game).all()
+        db.query(Player).all()
+    db.query(Game).all()
+    db.close()
+
+    assert statements.count == 2
@@ -8,11 +8,18 @@ from app.endpoints.game_endpoints import auth_scheme
 from fastapi import WebSocket
 from fastapi.encoders import jsonable_encoder
 from app.db.enums import GameStatus
-from app.endpoints.websocket_endpoints import handle_creation, handle_change, handle_deletion
+from app.services.event_services import EventBus, GameEvent, event_bus, publish_game_event, GAME_CREATED, GAME_DELETED, GAME_STATUS_CHANGED
 import pytest
-from app.endpoints.websocket_endpoints import game_list_manager
+import json
+import asyncio
+from app.endpoints.websocket_endpoints import game_list_manager, game_connection_managers
 from app.services.game_services import convert_game_to_schema
-from app.services.websocket_services import ConnectionManager, GameManager
+from app.services.websocket_services import ConnectionManager, GameManager, GameManagerRegistry, encode_message
+from app.services.patch_services import apply_patch
+from app.services.lobby_services import lobby_index, game_to_lobby_row
+from app.services.game_state_services import game_state_cache
+from app.services.figure_services import get_figure_detector, figure_detectors
+from app.services.turn_services import get_game_rng, game_rngs
 from app.models.board_models import Board
 from app.db.enums import Colors
 from app.schemas.board_schemas import BoardSchemaOut
@@ -59,15 +66,15 @@ async def test_connect_game_list(mock_websocket, mock_game):
     """
     Test to see if the connect method is adding the websocket to the active connections list.
     """
-    mock_db = MagicMock()
-    mock_db.query.return_value.filter.return_value.all.return_value = [
-        mock_game]
+    lobby_row = game_to_lobby_row(convert_game_to_schema(mock_game))
+    lobby_index.upsert(lobby_row)
+    lobby_index.upsert(lobby_row.model_copy(update={"id": 2, "status": GameStatus.in_game}))
 
-    expected_payload = [convert_game_to_schema(mock_game)]
-    expected_message = {"type": "initial game list",
-                        "message": "", "payload": jsonable_encoder(expected_payload)}
+    expected_payload = [lobby_row]
+    expected_message = {"type": "initial game list", "message": "",
+                        "payload": jsonable_encoder(expected_payload), "next_cursor": None}
 
-    with patch.object(mock_websocket, "send_json") as mock_send_json, patch("app.dependencies.dependencies.get_db", return_value=iter([mock_db])), patch("app.dependencies.dependencies.get_game_list", return_value=[mock_game]):
+    with patch.object(mock_websocket, "send_json") as mock_send_json:
         await game_list_manager.connect(mock_websocket)
         assert mock_websocket in game_list_manager.connection_manager.active_connections
         await game_list_manager.broadcast_game_list(mock_websocket)
@@ -90,19 +97,54 @@ async def test_disconnect_game_list(mock_websocket):
     app.dependency_overrides = {}
 
 
-def test_all_listener_handlers(mock_game):
+@pytest.mark.asyncio
+async def test_game_events_reach_the_lobby(mock_game):
     """
-    Test to see if the handlers (after_insert, after_delete, after_update) are calling the broadcast_game method.
+    Test to see if the game events published on the bus are calling the broadcast_game method, in order.
     """
+    game_schema = convert_game_to_schema(mock_game)
+    lobby_row = game_to_lobby_row(game_schema)
     with patch.object(game_list_manager, "broadcast_game") as mock_broadcast:
-        handle_creation(None, None, mock_game)
-        mock_broadcast.assert_called_once_with("game added", mock_game)
-        mock_broadcast.reset_mock()
-        handle_deletion(None, None, mock_game)
-        mock_broadcast.assert_called_once_with("game deleted", mock_game)
-        mock_broadcast.reset_mock()
-        handle_change(None, None, mock_game)
-        mock_broadcast.assert_called_once_with("game updated", mock_game)
+        publish_game_event(GAME_CREATED, mock_game)
+        publish_game_event(GAME_STATUS_CHANGED, game_schema)
+        publish_game_event(GAME_DELETED, game_schema)
+        await event_bus.drain()
+
+        assert mock_broadcast.call_args_list == [
+            (("game added", lobby_row),), (("game updated", lobby_row),), (("game deleted", lobby_row),)]
+        assert lobby_index.rows == {}
+
+
+@pytest.mark.asyncio
+async def test_event_bus_isolates_failing_subscribers(mock_game):
+    bus = EventBus()
+    received = []
+
+    async def failing_handler(event):
+        raise RuntimeError("subscriber error")
+
+    async def handler(event):
+        received.append(event.type)
+
+    bus.subscribe(GAME_CREATED, failing_handler)
+    bus.subscribe(GAME_CREATED, handler)
+    event = GameEvent(type=GAME_CREATED, game_id=1, game=convert_game_to_schema(mock_game))
+    bus.publish(event)
+    bus.publish(event)
+    # Nobody listens to this one
+    bus.publish(event._replace(type=GAME_DELETED))
+    await bus.drain()
+
+    assert received == [GAME_CREATED, GAME_CREATED]
+
+
+def test_event_bus_outside_the_loop(mock_game):
+    bus = EventBus()
+    bus.subscribe(GAME_CREATED, AsyncMock())
+
+    bus.publish(GameEvent(type=GAME_CREATED, game_id=1, game=convert_game_to_schema(mock_game)))
+
+    assert bus.worker is None
 
 
 @pytest.mark.asyncio
@@ -111,7 +153,7 @@ async def test_broadcast_correctly(mock_websocket, mock_game):
     Test to see if the broadcast_game method is sending the correct message to the websocket.
     """
 
-    with patch.object(mock_websocket, "send_json") as mock_send_json, patch.object(game_list_manager, "broadcast_game_list") as mock_broadcast_game_list:
+    with patch.object(mock_websocket, "send_text") as mock_send_text, patch.object(game_list_manager, "broadcast_game_list") as mock_broadcast_game_list:
         await game_list_manager.connect(mock_websocket)
         mock_game_schema = convert_game_to_schema(mock_game)
         expected_message = {
@@ -125,14 +167,15 @@ async def test_broadcast_correctly(mock_websocket, mock_game):
 
         def capture_response(*args, **kwargs):
             nonlocal response
-            response = args[0]
+            response = json.loads(args[0])
 
-        mock_send_json.return_value = None
-        mock_send_json.side_effect = capture_response
+        mock_send_text.return_value = None
+        mock_send_text.side_effect = capture_response
 
         await game_list_manager.broadcast_game("game added", mock_game)
         await game_list_manager.broadcast_game_list(mock_game)
-        mock_send_json.assert_called_once()
+        await game_list_manager.connection_manager.drain()
+        mock_send_text.assert_called_once()
         mock_broadcast_game_list.assert_called_once()
         assert response == expected_message_json
 
@@ -144,7 +187,7 @@ async def test_multiple_broadcasting(mock_websocket, mock_game):
     """
     with patch.object(game_list_manager, "broadcast_game_list") as mock_broadcast_game_list:
         mock_websocket2 = MagicMock(spec=WebSocket)
-        with patch.object(mock_websocket, "send_json") as mock_send_json, patch.object(mock_websocket2, "send_json") as mock_send_json2:
+        with patch.object(mock_websocket, "send_text") as mock_send_text, patch.object(mock_websocket2, "send_text") as mock_send_text2:
             await game_list_manager.connect(mock_websocket)
             await game_list_manager.connect(mock_websocket2)
 
@@ -155,17 +198,18 @@ async def test_multiple_broadcasting(mock_websocket, mock_game):
             }
             expected_message_json = jsonable_encoder(expected_message)
 
-            mock_send_json.return_value = None
+            mock_send_text.return_value = None
 
             await game_list_manager.broadcast_game("game added", mock_game)
             await game_list_manager.broadcast_game_list(mock_game)
             await game_list_manager.broadcast_game_list(mock_game)
+            await game_list_manager.connection_manager.drain()
 
             assert mock_broadcast_game_list.call_count == 2
-            mock_send_json.assert_called_once()
-            mock_send_json2.assert_called_once()
-            assert mock_send_json.call_args_list[0][0][0] == expected_message_json
-            assert mock_send_json2.call_args_list[0][0][0] == expected_message_json
+            mock_send_text.assert_called_once()
+            mock_send_text2.assert_called_once()
+            assert json.loads(mock_send_text.call_args_list[0][0][0]) == expected_message_json
+            assert json.loads(mock_send_text2.call_args_list[0][0][0]) == expected_message_json
 
 
 # === Game Connection's Websocket tests ===
@@ -218,14 +262,15 @@ async def test_broadcast_connection(mock_websocket, mock_game):
     }
     expected_message_json = jsonable_encoder(expected_message)
 
-    with patch.object(mock_websocket, "send_json") as mock_send_json, patch.object(mock_websocket2, "send_json") as mock_send_json2:
+    with patch.object(mock_websocket, "send_text") as mock_send_text, patch.object(mock_websocket2, "send_text") as mock_send_text2:
         await game_connection_manager.broadcast_connection(game=mock_game, player_id=1, player_name="Mock player")
+        await game_connection_manager.drain()
 
-        mock_send_json.assert_called_once()
-        mock_send_json2.assert_called_once()
+        mock_send_text.assert_called_once()
+        mock_send_text2.assert_called_once()
 
-        assert mock_send_json.call_args_list[0][0][0] == expected_message_json
-        assert mock_send_json2.call_args_list[0][0][0] == expected_message_json
+        assert json.loads(mock_send_text.call_args_list[0][0][0]) == expected_message_json
+        assert json.loads(mock_send_text2.call_args_list[0][0][0]) == expected_message_json
 
 
 @pytest.mark.asyncio
@@ -245,14 +290,15 @@ async def test_broadcast_disconnection(mock_websocket, mock_game):
     }
     expected_message_json = jsonable_encoder(expected_message)
 
-    with patch.object(mock_websocket, "send_json") as mock_send_json, patch.object(mock_websocket2, "send_json") as mock_send_json2:
+    with patch.object(mock_websocket, "send_text") as mock_send_text, patch.object(mock_websocket2, "send_text") as mock_send_text2:
         await game_connection_manager.broadcast_disconnection(game=mock_game, player_id=1, player_name="Mock player")
+        await game_connection_manager.drain()
 
-        mock_send_json.assert_called_once()
-        mock_send_json2.assert_called_once()
+        mock_send_text.assert_called_once()
+        mock_send_text2.assert_called_once()
 
-        assert mock_send_json.call_args_list[0][0][0] == expected_message_json
-        assert mock_send_json2.call_args_list[0][0][0] == expected_message_json
+        assert json.loads(mock_send_text.call_args_list[0][0][0]) == expected_message_json
+        assert json.loads(mock_send_text2.call_args_list[0][0][0]) == expected_message_json
 
 
 @pytest.mark.asyncio
@@ -271,14 +317,15 @@ async def test_broadcast_start(mock_websocket, mock_game):
     }
     expected_message_json = jsonable_encoder(expected_message)
 
-    with patch.object(mock_websocket, "send_json") as mock_send_json, patch.object(mock_websocket2, "send_json") as mock_send_json2:
+    with patch.object(mock_websocket, "send_text") as mock_send_text, patch.object(mock_websocket2, "send_text") as mock_send_text2:
         await game_connection_manager.broadcast_game_start(mock_game, "Juan")
+        await game_connection_manager.drain()
 
-        mock_send_json.assert_called_once()
-        mock_send_json2.assert_called_once()
+        mock_send_text.assert_called_once()
+        mock_send_text2.assert_called_once()
 
-        assert mock_send_json.call_args_list[0][0][0] == expected_message_json
-        assert mock_send_json2.call_args_list[0][0][0] == expected_message_json
+        assert json.loads(mock_send_text.call_args_list[0][0][0]) == expected_message_json
+        assert json.loads(mock_send_text2.call_args_list[0][0][0]) == expected_message_json
 
 
 @pytest.mark.asyncio
@@ -290,16 +337,80 @@ async def test_websocket_game_reconnection(mock_websocket, mock_game):
 
     game_connection_manager.disconnect(mock_websocket)
 
-    with patch.object(mock_websocket, "send_json") as mock_send_json, patch.object(mock_websocket2, "send_json") as mock_send_json2:
+    with patch.object(mock_websocket, "send_text") as mock_send_text, patch.object(mock_websocket2, "send_text") as mock_send_text2:
 
         await game_connection_manager.broadcast_game_start(mock_game, "")
 
         await game_connection_manager.connect(websocket=mock_websocket)
 
         await game_connection_manager.broadcast_game_start(mock_game, "")
+        await game_connection_manager.drain()
+
+        mock_send_text.assert_called_once()  # called strictly once
+        mock_send_text2.assert_called()  # called at least once
+
+
+@pytest.mark.asyncio
+async def test_registry_creates_managers_lazily(mock_websocket):
+    registry = GameManagerRegistry()
+    assert registry.get(1) is None
+
+    manager = registry[1]
+    await manager.connect(mock_websocket)
+    manager.remember_state("board", {"color_distribution": [["red"]]})
+
+    assert registry[1] is manager
+    assert 1 in registry and len(registry) == 1
+    stats = registry.stats()
+    assert stats["managers"] == 1
+    assert stats["connections"] == {1: 1}
+    assert stats["state_bytes"] == len(encode_message(manager.state))
+
+
+@pytest.mark.asyncio
+async def test_registry_evicts_idle_managers(mock_websocket):
+    registry = GameManagerRegistry(idle_timeout=60)
+    connected, idle, recent = registry[1], registry[2], registry[3]
+    await connected.connect(mock_websocket)
+    for manager in (connected, idle):
+        manager.last_activity -= 120
 
-        mock_send_json.assert_called_once()  # called strictly once
-        mock_send_json2.assert_called()  # called at least once
+    # Looked for when a new manager is created
+    registry[4]
+
+    assert registry.get(1) is connected and registry.get(3) is recent
+    assert registry.get(2) is None
+    connected.disconnect(mock_websocket)
+    assert registry.evict_idle() == 0
+    assert registry.evict_idle(now=connected.last_activity + 60) == 3
+
+
+@pytest.mark.asyncio
+async def test_idle_eviction_forgets_the_game_caches(mock_game):
+    registry = GameManagerRegistry(idle_timeout=60)
+    manager = registry[mock_game.id]
+    mock_game.board = MagicMock(color_distribution=[[Colors.red] * 6 for _ in range(6)])
+    game_state_cache.get_board(mock_game)
+    get_figure_detector(mock_game.id)
+    get_game_rng(mock_game.id)
+
+    assert registry.evict_idle(now=manager.last_activity + 60) == 1
+
+    assert mock_game.id not in game_state_cache.states
+    assert mock_game.id not in figure_detectors
+    assert mock_game.id not in game_rngs
+
+
+@pytest.mark.asyncio
+async def test_finished_games_are_evicted(mock_game):
+    manager = game_connection_managers[mock_game.id]
+
+    publish_game_event(GAME_DELETED, convert_game_to_schema(mock_game))
+    await event_bus.drain()
+
+    assert game_connection_managers.get(mock_game.id) is None
+    # The endpoints still get a manager for a game nobody is connected to
+    assert game_connection_managers[mock_game.id] is not manager
 
 
 # ------------------------------------------------- TESTS DE VICTORY CONDITIONS ---------------------------------------------------------
@@ -314,7 +425,7 @@ def test_victory_when_player_is_alone():
             Player(id=2, name="Pedro", blocked=False)
         ]
 
-        mock_game = Game(id=1, name="gametest", player_amount=2, status=GameStatus.in_game,
+        mock_game = Game(id=1, name="gametest", player_amount=2, status=GameStatus.in_game, board=Board(1),
                          host_id=2, player_turn=1, players=mock_list_players,
                          forbidden_color=Colors.none)
         mock_manager[mock_game.id].broadcast_disconnection = AsyncMock(
@@ -330,14 +441,6 @@ def test_victory_when_player_is_alone():
         app.dependency_overrides[get_game] = lambda: mock_game
         app.dependency_overrides[auth_scheme] = lambda: mock_player
         
-        def remove_player():
-            new_players = [
-                player for player in mock_game.players if player.id != mock_player.id]
-            mock_game.players = new_players
-            mock_player.game_id = None
-
-        mock_db.commit.side_effect = remove_player
-
         # Hacer la petición PUT con el cliente de prueba
         response = client.put("/games/1/quit")
         # Asegurarse de que la respuesta fue exitosa
@@ -384,7 +487,7 @@ def test_no_victory_when_multiple_players_remain():
             Player(id=3, name="Maria", blocked=False)
         ]
 
-        mock_game = Game(id=1, name="gametest", player_amount=3, status=GameStatus.in_game,
+        mock_game = Game(id=1, name="gametest", player_amount=3, status=GameStatus.in_game, board=Board(1),
                          host_id=2, player_turn=1, players=mock_list_players, forbidden_color=Colors.none)
 
         mock_manager[mock_game.id].broadcast_disconnection = AsyncMock(
@@ -398,14 +501,6 @@ def test_no_victory_when_multiple_players_remain():
         app.dependency_overrides[get_game] = lambda: mock_game
         app.dependency_overrides[auth_scheme] = lambda: mock_player
 
-        def remove_player():
-            new_players = [
-                player for player in mock_game.players if player.id != mock_player.id]
-            mock_game.players = new_players
-            mock_player.game_id = None
-
-        mock_db.commit.side_effect = remove_player
-
         # Hacer la petición PUT con el cliente de prueba
         response = client.put("/games/1/quit")
 
@@ -449,14 +544,15 @@ async def test_broadcast_board(mock_websocket, mock_game):
                                                   Colors.green.value, Colors.red.value, Colors.blue.value])
         mock_game.board = mock_board
 
-    with patch.object(mock_websocket, "send_json") as mock_send_json:
+    with patch.object(mock_websocket, "send_text") as mock_send_text:
         await game_connection_manager.connect(websocket=mock_websocket)
         await game_connection_manager.broadcast_board(mock_game)
+        await game_connection_manager.drain()
 
-        mock_send_json.assert_called_once()
-        assert mock_send_json.call_args_list[0][0][0]["type"] == "board"
-        assert mock_send_json.call_args_list[0][0][0]["message"] == ""
-        assert mock_send_json.call_args_list[0][0][0]["payload"][
+        mock_send_text.assert_called_once()
+        assert json.loads(mock_send_text.call_args_list[0][0][0])["type"] == "board"
+        assert json.loads(mock_send_text.call_args_list[0][0][0])["message"] == ""
+        assert json.loads(mock_send_text.call_args_list[0][0][0])["payload"][
             "color_distribution"] == mock_board.color_distribution
 
 
@@ -493,15 +589,16 @@ async def test_broadcast_partial_board(mock_websocket):
                                   [Colors.blue.value, Colors.red.value],
                                   [Colors.blue.value, Colors.red.value]]
 
-        with patch.object(mock_websocket, "send_json") as mock_send_json:
+        with patch.object(mock_websocket, "send_text") as mock_send_text:
             await game_connection_manager.connect(websocket=mock_websocket)
             await game_connection_manager.broadcast_partial_board(mock_game)
+            await game_connection_manager.drain()
 
-            sent_value = mock_send_json.call_args_list[0][0][0]
+            sent_value = json.loads(mock_send_text.call_args_list[0][0][0])
 
-            assert mock_send_json.call_args_list[0][0][0]["type"] == "board"
-            assert mock_send_json.call_args_list[0][0][0]["message"] == ""
-            assert mock_send_json.call_args_list[0][0][0]["payload"]["color_distribution"] == expected_partial_board
+            assert json.loads(mock_send_text.call_args_list[0][0][0])["type"] == "board"
+            assert json.loads(mock_send_text.call_args_list[0][0][0])["message"] == ""
+            assert json.loads(mock_send_text.call_args_list[0][0][0])["payload"]["color_distribution"] == expected_partial_board
 
 
 @pytest.mark.asyncio
@@ -534,13 +631,264 @@ async def test_broadcast_figures_in_board(mock_websocket):
             "payload": figures
         }
 
-        with patch("app.services.websocket_services.get_all_figures_in_board", return_value=figures):
-            with patch.object(mock_websocket, "send_json") as mock_send_json:
+        with patch("app.services.websocket_services.request_figures_in_board", return_value=figures):
+            with patch.object(mock_websocket, "send_text") as mock_send_text:
                 await game_connection_manager.connect(websocket=mock_websocket)
                 await game_connection_manager.broadcast_figures_in_board(mock_game)
+                await game_connection_manager.drain()
 
-                sent_value = mock_send_json.call_args_list[0][0][0]
+                sent_value = json.loads(mock_send_text.call_args_list[0][0][0])
 
                 assert sent_value["type"] == "figures"
                 assert sent_value["message"] == ""
-                assert sent_value["payload"] == figures
\ No newline at end of file
+                assert sent_value["payload"] == figures
+
+
+@pytest.mark.asyncio
+async def test_broadcast_serializes_once(mock_websocket, mock_game):
+    mock_websocket2 = MagicMock(spec=WebSocket)
+    game_connection_manager = GameManager()
+    await game_connection_manager.connect(websocket=mock_websocket)
+    await game_connection_manager.connect(websocket=mock_websocket2)
+
+    with patch("app.services.websocket_services.encode_message", wraps=encode_message) as mock_encoder:
+        await game_connection_manager.broadcast_game_start(mock_game, "Juan")
+        await game_connection_manager.drain()
+
+        mock_encoder.assert_called_once()
+        # Both sockets get the very same frame
+        assert mock_websocket.send_text.call_args[0][0] is mock_websocket2.send_text.call_args[0][0]
+
+
+@pytest.mark.asyncio
+async def test_broadcast_drops_dead_and_slow_connections(mock_websocket, mock_game):
+    dead_websocket = MagicMock(spec=WebSocket)
+    dead_websocket.send_text.side_effect = RuntimeError("closed")
+    slow_websocket = MagicMock(spec=WebSocket)
+
+    async def never_sends(data):
+        await asyncio.sleep(10)
+
+    slow_websocket.send_text.side_effect = never_sends
+
+    game_connection_manager = GameManager()
+    game_connection_manager.connection_manager.send_timeout = 0.05
+    for websocket in (mock_websocket, dead_websocket, slow_websocket):
+        await game_connection_manager.connect(websocket=websocket)
+
+    await game_connection_manager.broadcast_game_start(mock_game, "Juan")
+    await game_connection_manager.drain()
+    await asyncio.gather(*game_connection_manager.connection_manager.closing_tasks)
+
+    assert game_connection_manager.connection_manager.active_connections == {mock_websocket}
+    mock_websocket.send_text.assert_called_once()
+    dead_websocket.close.assert_called_once()
+    slow_websocket.close.assert_called_once()
+
+    # The endpoint disconnecting a dropped socket doesn't fail
+    game_connection_manager.disconnect(dead_websocket)
+
+
+@pytest.mark.asyncio
+async def test_stalled_client_does_not_hold_the_broadcast(mock_websocket, mock_game):
+    stalled_websocket = MagicMock(spec=WebSocket)
+    release = asyncio.Event()
+
+    async def stalls(data):
+        await release.wait()
+
+    stalled_websocket.send_text.side_effect = stalls
+    game_connection_manager = GameManager()
+    for websocket in (mock_websocket, stalled_websocket):
+        await game_connection_manager.connect(websocket=websocket)
+
+    await asyncio.wait_for(game_connection_manager.broadcast_game_start(mock_game, "Juan"), 1)
+    await asyncio.wait_for(game_connection_manager.broadcast_game_start(mock_game, "Maria"), 1)
+
+    async def sent_twice():
+        while mock_websocket.send_text.call_count < 2:
+            await asyncio.sleep(0)
+
+    await asyncio.wait_for(sent_twice(), 1)
+    # Only the writer of the stalled socket is still running
+    writers = [queue.writer for queue in game_connection_manager.connection_manager.send_queues.values() if queue.writer]
+    assert len(writers) == 1
+
+    assert mock_websocket.send_text.call_count == 2
+    assert game_connection_manager.connection_manager.queued_frames == 1
+    release.set()
+    await game_connection_manager.drain()
+    assert stalled_websocket.send_text.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_full_queue_replaces_the_oldest_snapshot(mock_websocket):
+    connection_manager = ConnectionManager(queue_size=2)
+    await connection_manager.connect(mock_websocket)
+
+    await connection_manager.broadcast({"type": "board", "payload": 1}, snapshot="board")
+    await connection_manager.broadcast({"type": "game won", "payload": 1})
+    await connection_manager.broadcast({"type": "board", "payload": 2}, snapshot="board")
+    await connection_manager.drain()
+
+    sent = [json.loads(call[0][0]) for call in mock_websocket.send_text.call_args_list]
+    assert sent == [{"type": "game won", "payload": 1}, {"type": "board", "payload": 2}]
+    assert mock_websocket in connection_manager.active_connections
+
+
+@pytest.mark.asyncio
+async def test_full_queue_drops_the_connection(mock_websocket):
+    snapshot_manager = ConnectionManager(queue_size=1)
+    strict_manager = ConnectionManager(queue_size=1, overflow_policy="disconnect")
+    strict_websocket = MagicMock(spec=WebSocket)
+    await snapshot_manager.connect(mock_websocket)
+    await strict_manager.connect(strict_websocket)
+
+    # Nothing to replace: an event that isn't a snapshot can't be dropped
+    await snapshot_manager.broadcast({"type": "board"}, snapshot="board")
+    await snapshot_manager.broadcast({"type": "game won"})
+    # The disconnect policy never drops frames
+    await strict_manager.broadcast({"type": "board"}, snapshot="board")
+    await strict_manager.broadcast({"type": "board"}, snapshot="board")
+    await asyncio.gather(*snapshot_manager.closing_tasks, *strict_manager.closing_tasks)
+
+    assert not snapshot_manager.active_connections and not snapshot_manager.send_queues
+    assert not strict_manager.active_connections and not strict_manager.send_queues
+    mock_websocket.send_text.assert_not_called()
+    mock_websocket.close.assert_called_once()
+    strict_websocket.close.assert_called_once()
+
+    with pytest.raises(ValueError):
+        ConnectionManager(overflow_policy="block")
+
+
+@pytest.mark.asyncio
+async def test_state_updates_are_coalesced(mock_websocket, mock_game):
+    game_connection_manager = GameManager(update_window=0.01)
+    await game_connection_manager.connect(websocket=mock_websocket)
+
+    with patch("app.services.websocket_services.calculate_partial_board", side_effect=["board 1", "board 2"]) as mock_board, \
+            patch("app.services.websocket_services.request_figures_in_board", return_value=[]), \
+            patch("app.services.websocket_services.get_move_tiles", return_value=[]):
+        game_connection_manager.queue_state_update(mock_game)
+        game_connection_manager.queue_state_update(mock_game, parts=["board"], message="Turno de Juan")
+        await game_connection_manager.update_task
+        await game_connection_manager.drain()
+
+        assert mock_board.call_count == 2
+        mock_websocket.send_text.assert_called_once()
+        sent_value = json.loads(mock_websocket.send_text.call_args[0][0])
+        assert sent_value["type"] == "state update"
+        assert sent_value["version"] == 1
+        assert sent_value["messages"] == ["Turno de Juan"]
+        assert sent_value["payload"] == {"board": "board 2", "figures": [], "partial_moves": [],
+                                         "game": jsonable_encoder(convert_game_to_schema(mock_game))}
+
+        game_connection_manager.queue_state_update(mock_game, parts=["partial_moves"])
+        await game_connection_manager.update_task
+        await game_connection_manager.drain()
+
+        sent_value = json.loads(mock_websocket.send_text.call_args[0][0])
+        assert sent_value["version"] == 2
+        assert sent_value["payload"] == {"partial_moves": []}
+
+
+@pytest.mark.asyncio
+async def test_state_update_is_sent_before_game_won(mock_websocket, mock_game):
+    game_connection_manager = GameManager(update_window=10)
+    await game_connection_manager.connect(websocket=mock_websocket)
+    winner = Player(id=1, name="Juan")
+
+    with patch("app.services.websocket_services.get_move_tiles", return_value=[]):
+        game_connection_manager.queue_state_update(mock_game, parts=["partial_moves"])
+        pending_task = game_connection_manager.update_task
+        await game_connection_manager.broadcast_game_won(mock_game, winner)
+        pending_task.cancel()
+    await game_connection_manager.drain()
+
+    sent_types = [json.loads(call[0][0])["type"] for call in mock_websocket.send_text.call_args_list]
+    assert sent_types == ["state update", "game won"]
+
+
+@pytest.mark.asyncio
+async def test_delta_clients_get_snapshot_and_patches(mock_websocket, mock_game):
+    delta_websocket = MagicMock(spec=WebSocket)
+    game_connection_manager = GameManager(update_window=0)
+    await game_connection_manager.connect(websocket=mock_websocket)
+
+    boards = [{"color_distribution": [["red", "blue"], ["green", "yellow"]]},
+              {"color_distribution": [["blue", "red"], ["green", "yellow"]]}]
+    with patch("app.services.websocket_services.calculate_partial_board", side_effect=boards), \
+            patch("app.services.websocket_services.request_figures_in_board", return_value=[]), \
+            patch("app.services.websocket_services.get_move_tiles", side_effect=[[], [{"x": 0, "y": 0}]]):
+        await game_connection_manager.connect_delta(delta_websocket, mock_game)
+
+        delta_websocket.accept.assert_called_once()
+        snapshot = jsonable_encoder(delta_websocket.send_json.call_args[0][0])
+        assert snapshot["type"] == "state snapshot"
+        assert snapshot["version"] == 1
+        assert snapshot["payload"]["board"] == boards[0]
+
+        game_connection_manager.queue_state_update(mock_game, parts=["board", "partial_moves"])
+        await game_connection_manager.update_task
+        await game_connection_manager.drain()
+
+    patch_message = json.loads(delta_websocket.send_text.call_args[0][0])
+    assert patch_message["type"] == "state patch"
+    assert (patch_message["base_version"], patch_message["version"]) == (1, 2)
+    assert [operation["path"] for operation in patch_message["patch"]] == [
+        "/board/color_distribution/0/0", "/board/color_distribution/0/1", "/partial_moves"]
+    assert apply_patch(snapshot["payload"], patch_message["patch"]) == game_connection_manager.state
+
+    # Clients of the full protocol still get whole parts
+    full_message = json.loads(mock_websocket.send_text.call_args[0][0])
+    assert full_message["type"] == "state update"
+    assert full_message["payload"]["board"] == boards[1]
+
+    # Events with a whole part of the state move the base of the next patch
+    await game_connection_manager.broadcast_game(mock_game)
+    await game_connection_manager.drain()
+    assert game_connection_manager.state["game"] == jsonable_encoder(convert_game_to_schema(mock_game))
+    assert delta_websocket.send_text.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_delta_connection_only_gets_the_snapshot(mock_websocket, mock_game):
+    game_connection_manager = GameManager(update_window=0)
+    first_delta_websocket = MagicMock(spec=WebSocket)
+    with patch("app.services.websocket_services.calculate_partial_board", return_value={"color_distribution": []}), \
+            patch("app.services.websocket_services.request_figures_in_board", return_value=[]), \
+            patch("app.services.websocket_services.get_move_tiles", return_value=[]):
+        await game_connection_manager.connect_delta(first_delta_websocket, mock_game)
+        await game_connection_manager.connect(websocket=mock_websocket)
+
+        new_delta_websocket = MagicMock(spec=WebSocket)
+        await game_connection_manager.connect_delta(new_delta_websocket, mock_game)
+        await game_connection_manager.drain()
+
+    # The game didn't change: the new client gets its snapshot and the others nothing
+    assert new_delta_websocket.send_json.call_args[0][0]["version"] == 1
+    first_delta_websocket.send_text.assert_not_called()
+    mock_websocket.send_text.assert_not_called()
+    assert game_connection_manager.version == 1
+
+
+def test_delta_protocol_resync(mock_game):
+    mock_db = MagicMock()
+    app.dependency_overrides[get_db] = lambda: mock_db
+    with patch("app.endpoints.websocket_endpoints.load_game", return_value=mock_game), \
+            patch("app.endpoints.websocket_endpoints.game_connection_managers", GameManagerRegistry()), \
+            patch("app.services.websocket_services.calculate_partial_board", return_value={"color_distribution": []}), \
+            patch("app.services.websocket_services.request_figures_in_board", return_value=[]), \
+            patch("app.services.websocket_services.get_move_tiles", return_value=[]):
+        with client.websocket_connect("/ws/games/1?protocol=delta") as websocket:
+            snapshot = websocket.receive_json()
+            assert snapshot["type"] == "state snapshot"
+            assert snapshot["payload"]["game"]["id"] == 1
+
+            websocket.send_text(json.dumps({"type": "resync"}))
+            resync = websocket.receive_json()
+            assert resync["type"] == "state snapshot"
+            assert resync["version"] == snapshot["version"]
+            assert resync["payload"] == snapshot["payload"]
+    app.dependency_overrides.clear()
@@ -29,6 +29,35 @@ export default function GameContainer() {
     useWinnerNotification(lastMessage);
 
   useEffect(() => {
+    const setBoard = (board) => {
+      handleSetBoard(board.color_distribution);
+      setBoardStorage(board.color_distribution);
+    };
+
+    const setFigures = (figures) => {
+      // Parse all figures to one big list and then set them to be highlighted
+      const tiles = [];
+
+      figures.forEach((figure) => {
+        figure.tiles.forEach((tile) => {
+          tiles.push(tile);
+        });
+      });
+
+      handleHighlightTiles(tiles);
+      setFigureStorage(figures);
+    };
+
+    const setPartialMoves = (partialMoves) => {
+      const tiles_partial_move = [];
+
+      partialMoves.forEach((tile) => {
+          tiles_partial_move.push(tile);
+      });
+
+      handleHighlightTilesPartialMove(tiles_partial_move)
+    };
+
     if (lastMessage) {
       try {
         const data = JSON.parse(lastMessage.data);
@@ -37,34 +66,29 @@ export default function GameContainer() {
           addMessage(data.message);
         }
 
+        if (data.type === "state update") {
+          // One frame with every part of the game that changed
+          const { board, figures, game, partial_moves } = data.payload;
+
+          (data.messages || []).forEach((message) => addMessage(message));
+          if (game) updateGame(game);
+          if (board) setBoard(board);
+          if (figures) setFigures(figures);
+          if (partial_moves) setPartialMoves(partial_moves);
+          return;
+        }
+
         if (data.type === "board") {
-          handleSetBoard(data.payload.color_distribution);
-          setBoardStorage(data.payload.color_distribution);
+          setBoard(data.payload);
         } else {
           updateGame(data.payload);
         }
 
         if (data.type === "figures") {
-          // Parse all figures to one big list and then set them to be highlighted
-          const tiles = [];
-
-          data.payload.forEach((figure) => {
-            figure.tiles.forEach((tile) => {
-              tiles.push(tile);
-            });
-          });
-
-          handleHighlightTiles(tiles);
-          setFigureStorage(data.payload);
+          setFigures(data.payload);
         }
         if (data.type === "partial_moves"){
-          const tiles_partial_move = [];
-
-          data.payload.forEach((tile) => {
-              tiles_partial_move.push(tile);
-          });
-
-          handleHighlightTilesPartialMove(tiles_partial_move)
+          setPartialMoves(data.payload);
         }
       } catch (error) {
         console.error("Error parsing WebSocket message:", error);
@@ -76,6 +100,7 @@ export default function GameContainer() {
     addMessage,
     handleSetBoard,
     handleHighlightTiles,
+    handleHighlightTilesPartialMove,
   ]);
 
   return (
@@ -142,7 +142,7 @@ export const GameList = () => {
                       <Card.Title>{game.name}</Card.Title>
                       <Card.Text>
                         Jugadores:{" "}
-                        {`${game.players ? game.players.length : 0}/${
+                        {`${game.player_count ?? (game.players ? game.players.length : 0)}/${
                           game.player_amount
                         }`}
                       </Card.Text>